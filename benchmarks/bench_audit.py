@@ -0,0 +1,51 @@
+import pytest
+
+from src.audit import BiasAuditor
+from src.synthetic import SyntheticDataGenerator
+
+_DATA = {}
+
+
+def _mock_predict(df):
+    return ((df['experience'] > 4) & (df['gender'] == 1)).astype(int)
+
+
+@pytest.fixture
+def audit_data(rows):
+    # Generated once per size and shared by every benchmark in this module
+    if rows not in _DATA:
+        df = SyntheticDataGenerator(seed=0).generate(rows)
+        df['hired_pred'] = _mock_predict(df)
+        _DATA.clear()
+        _DATA[rows] = df
+    return _DATA[rows]
+
+
+def _auditor(df):
+    return BiasAuditor(
+        data=df,
+        protected_attribute='gender',
+        privileged_group=1,
+        unprivileged_group=0,
+        label_column='hired_pred',
+        favorable_label=1
+    )
+
+
+def bench_complete_audit(bench, rows, audit_data):
+    bench.time(_auditor(audit_data).run_complete_audit, rows=rows)
+
+
+def bench_complete_audit_with_truth(bench, rows, audit_data):
+    bench.time(_auditor(audit_data).run_complete_audit, true_label_column='hired', rows=rows)
+
+
+def bench_perturbation_test(bench, rows, audit_data):
+    bench.time(_auditor(audit_data).run_perturbation_test, _mock_predict, feature_columns=['experience'], rows=rows)
+
+
+def bench_perturbation_test_sampled(bench, rows, audit_data):
+    bench.time(
+        _auditor(audit_data).run_perturbation_test, _mock_predict,
+        feature_columns=['experience'], sample_size=10_000, random_state=0, rows=rows
+    )
@@ -0,0 +1,24 @@
+import numpy as np
+
+from src.interceptor.detector import BiasDetector
+
+TWIN_TYPES = np.array(["gender_flip", "age_younger", "age_older"], dtype=object)
+
+
+def bench_check_batch_throughput(bench, rows):
+    # Three twins per candidate, probabilities close enough that some pairs flag
+    rng = np.random.default_rng(0)
+    original_probability = rng.random(rows)
+    owner = np.repeat(np.arange(rows), 3)
+    twin_probability = np.clip(original_probability[owner] + rng.normal(0, 0.08, 3 * rows), 0, 1)
+    detector = BiasDetector(twin_type_thresholds={"gender_flip": 0.05})
+
+    def check():
+        result = detector.check_batch(
+            original_probability, original_probability > 0.5,
+            twin_probability, twin_probability > 0.5,
+            np.tile(TWIN_TYPES, rows), owner,
+        )
+        return result.bias_detected
+
+    bench.time(check, rows=rows)
@@ -0,0 +1,43 @@
+import asyncio
+import time
+
+import httpx
+import numpy as np
+
+from src.main import app
+
+CANDIDATE = {"age": 55, "experience": 20, "education": 2, "gender": 1}
+
+
+async def _latencies(n_requests, concurrency):
+    """Per-request latency of POST /predict through the ASGI app (no network)."""
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker(count):
+            for _ in range(count):
+                start = time.perf_counter()
+                response = await client.post("/predict", json=CANDIDATE)
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200
+
+        # Warm up the app and the model path
+        await worker(20)
+        latencies.clear()
+        await asyncio.gather(*(worker(n_requests // concurrency) for _ in range(concurrency)))
+    return np.array(latencies)
+
+
+def _record_percentiles(bench, latencies, label):
+    p50, p99 = np.percentile(latencies, [50, 99])
+    bench.record(float(p50), unit="s", name=f"predict_latency_p50[{label}]", requests=len(latencies))
+    # Tail latency is dominated by scheduler noise; only gate large regressions
+    bench.record(float(p99), unit="s", name=f"predict_latency_p99[{label}]", requests=len(latencies), tolerance=1.0)
+
+
+def bench_predict_latency_sequential(bench):
+    _record_percentiles(bench, asyncio.run(_latencies(500, 1)), "sequential")
+
+
+def bench_predict_latency_concurrent(bench):
+    _record_percentiles(bench, asyncio.run(_latencies(1000, 16)), "concurrency16")
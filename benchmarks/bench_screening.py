@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+from src.screen import DataScreener, StreamingDataScreener
+from src.synthetic import SyntheticDataGenerator
+
+BATCH_ROWS = 200
+
+
+@pytest.fixture
+def reference(rows):
+    return SyntheticDataGenerator(seed=0).generate(rows)
+
+
+@pytest.fixture
+def batch():
+    return SyntheticDataGenerator(seed=1, bias_level=0.5).generate(BATCH_ROWS)
+
+
+def bench_drift_full_reference(bench, rows, reference, batch):
+    """KS test of one batch against the full reference (cost grows with reference size)."""
+    screener = DataScreener(reference, 'gender')
+    bench.time(screener.check_distributional_drift, batch, threshold=0.05, rows=rows)
+
+
+def bench_proxies_full_reference(bench, rows, reference, batch):
+    """Proxy correlations over reference + batch, as the original dashboard computed them."""
+    screener = DataScreener(reference, 'gender')
+    bench.time(lambda: screener.check_for_proxies(pd.concat([reference, batch])), rows=rows)
+
+
+def bench_drift_incremental(bench, rows, reference, batch):
+    """Same check against the pre-sorted reference sketch and a rolling window."""
+    screener = StreamingDataScreener(reference, 'gender', window_size=BATCH_ROWS)
+    bench.time(screener.check_drift_incremental, batch, threshold=0.05, rows=rows)
+
+
+def bench_proxies_online(bench, rows, reference, batch):
+    screener = StreamingDataScreener(reference, 'gender', window_size=BATCH_ROWS)
+
+    def update_and_check():
+        screener.update_proxy_stats(batch)
+        return screener.check_for_proxies_online()
+
+    bench.time(update_and_check, rows=rows)
@@ -0,0 +1,44 @@
+import tracemalloc
+
+import pandas as pd
+
+from src.interceptor.twins import ShadowTwinGenerator
+
+CANDIDATE = {"age": 55, "experience": 20, "education": 2, "gender": 1}
+
+
+def _traced(fn, *args):
+    """Returns (peak bytes allocated during the call, blocks still held by its result)."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        start_size = tracemalloc.get_traced_memory()[0]
+        result = fn(*args)
+        peak = tracemalloc.get_traced_memory()[1] - start_size
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    retained = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    del result
+    return peak, retained
+
+
+def bench_generate_twins_allocations(bench):
+    generator = ShadowTwinGenerator()
+    generator.generate_twins(CANDIDATE)
+    peak, retained = _traced(generator.generate_twins, CANDIDATE)
+    bench.record(peak, unit="B", name="generate_twins_peak_bytes", retained_blocks=retained)
+
+
+def bench_generate_twin_matrix_allocations(bench):
+    generator = ShadowTwinGenerator()
+    candidates = pd.DataFrame([CANDIDATE] * 1000)
+    generator.generate_twin_matrix(candidates)
+    peak, retained = _traced(generator.generate_twin_matrix, candidates)
+    bench.record(peak, unit="B", name="generate_twin_matrix_1000_peak_bytes", retained_blocks=retained)
+
+
+def bench_generate_twins_latency(bench):
+    generator = ShadowTwinGenerator()
+    bench.time(generator.generate_twins, CANDIDATE, rounds=20)
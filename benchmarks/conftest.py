@@ -0,0 +1,234 @@
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import pytest
+
+# Add project root to path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+# Keep the interceptor app from creating a decision log in the working directory
+os.environ.setdefault("DECISION_LOG_PATH", "")
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), ".results", "latest.json")
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("bench", "benchmark options")
+    group.addoption("--bench-baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    group.addoption("--bench-save", action="store_true", help="Write this run's results as the new baseline")
+    group.addoption("--bench-output", default=DEFAULT_OUTPUT, help="Where to write this run's results")
+    group.addoption("--bench-max-regression", type=float,
+                    default=float(os.environ.get("BENCH_MAX_REGRESSION", 0.25)),
+                    help="Allowed slowdown versus the baseline as a fraction (0.25 = 25%%)")
+    group.addoption("--bench-strict", action="store_true",
+                    help="Fail measurements that have no baseline entry instead of only warning")
+    group.addoption("--bench-confirm", type=int, default=int(os.environ.get("BENCH_CONFIRM", 2)),
+                    help="Extra measurement passes a timed benchmark gets before a regression fails it")
+    group.addoption("--bench-rows", default=os.environ.get("BENCH_ROWS", "10000,100000"),
+                    help="Comma-separated dataset sizes for the throughput benchmarks")
+    group.addoption("--bench-rounds", type=int, default=int(os.environ.get("BENCH_ROUNDS", 5)),
+                    help="Timed repetitions per benchmark (the fastest is compared)")
+
+
+def pytest_generate_tests(metafunc):
+    if "rows" in metafunc.fixturenames:
+        sizes = [int(float(s)) for s in metafunc.config.getoption("--bench-rows").split(",") if s.strip()]
+        metafunc.parametrize("rows", sizes, ids=[f"{n:.0e}".replace("+0", "") for n in sizes])
+
+
+class BenchmarkSession:
+    """Collects results for the whole run and holds the baseline they are compared to."""
+    def __init__(self, config):
+        self.config = config
+        self.baseline_path = config.getoption("--bench-baseline")
+        self.save = config.getoption("--bench-save")
+        self.max_regression = config.getoption("--bench-max-regression")
+        self.rounds = config.getoption("--bench-rounds")
+        self.strict = config.getoption("--bench-strict")
+        self.confirm_rounds = config.getoption("--bench-confirm")
+        self.results = {}
+        # Measurements that could not be gated because the baseline has no entry for them
+        self.ungated = []
+
+        self.baseline = {}
+        self.baseline_found = os.path.exists(self.baseline_path)
+        if self.baseline_found:
+            with open(self.baseline_path) as f:
+                self.baseline = json.load(f).get("results", {})
+
+    def write(self):
+        machine = {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system()}
+        output = self.config.getoption("--bench-output")
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        with open(output, "w") as f:
+            json.dump({"machine": machine, "results": self.results}, f, indent=2, sort_keys=True)
+
+        if self.save and self.results:
+            # Entries not run this time are kept
+            merged = dict(self.baseline)
+            merged.update(self.results)
+            with open(self.baseline_path, "w") as f:
+                json.dump({"machine": machine, "results": merged}, f, indent=2, sort_keys=True)
+
+
+class Benchmark:
+    """
+    Per-test handle for recording measurements.
+
+    Every measurement has one primary value where lower is better (seconds,
+    bytes, allocation count); that value is compared with the baseline and
+    the test fails if it regressed by more than the allowed fraction.
+    """
+    def __init__(self, session, test_name):
+        self.session = session
+        self.test_name = test_name
+
+    def time(self, fn, *args, name=None, rounds=None, warmup=1, rows=None, min_round_seconds=0.01, tolerance=None,
+             **kwargs):
+        """
+        Times `fn(*args, **kwargs)` and records the fastest round's wall-clock
+        seconds per call. The minimum is the least noisy estimate of the code's
+        own cost on a shared machine; the median and mean are reported alongside.
+
+        Fast calls are repeated within each round until it lasts at least
+        `min_round_seconds` (like timeit's autorange), so microsecond-scale
+        benchmarks are not dominated by timer and scheduler noise. A result
+        that looks regressed is re-measured up to --bench-confirm times and
+        only fails if the fastest round still exceeds the allowed slowdown.
+
+        Args:
+            name (str): Result name (defaults to the test id).
+            rounds (int): Timed repetitions (defaults to --bench-rounds).
+            warmup (int): Untimed calls first.
+            rows (int): If given, throughput in rows/s is reported too.
+            min_round_seconds (float): Shortest duration of one timed round.
+            tolerance (float): Overrides --bench-max-regression for this measurement.
+
+        Returns:
+            The return value of the last call.
+        """
+        rounds = rounds or self.session.rounds
+        for _ in range(warmup):
+            result = fn(*args, **kwargs)
+
+        # Calls per round: double until one round takes long enough
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                result = fn(*args, **kwargs)
+            if time.perf_counter() - start >= min_round_seconds or number >= 1_000_000:
+                break
+            number *= 2
+
+        def measure():
+            nonlocal result
+            for _ in range(rounds):
+                start = time.perf_counter()
+                for _ in range(number):
+                    result = fn(*args, **kwargs)
+                timings.append((time.perf_counter() - start) / number)
+
+        timings = []
+        measure()
+        for _ in range(self.session.confirm_rounds):
+            # A regression must reproduce: re-measure before failing on a noisy sample
+            if not self._regressed(name, min(timings), tolerance):
+                break
+            measure()
+
+        best = min(timings)
+        extra = {"median": statistics.median(timings), "mean": statistics.fmean(timings), "rounds": rounds,
+                 "calls_per_round": number}
+        if rows:
+            extra["rows"] = rows
+            extra["rows_per_second"] = rows / best if best > 0 else None
+        self.record(best, unit="s", name=name, tolerance=tolerance, **extra)
+        return result
+
+    def _allowed(self, tolerance=None):
+        return self.session.max_regression if tolerance is None else tolerance
+
+    def _regressed(self, name, value, tolerance=None):
+        baseline = self.session.baseline.get(name or self.test_name)
+        if self.session.save or not baseline or not baseline.get("value"):
+            return False
+        return value / baseline["value"] > 1 + self._allowed(tolerance)
+
+    def record(self, value, unit, name=None, tolerance=None, **extra):
+        """
+        Records one measurement and checks it against the baseline.
+
+        Args:
+            value (float): Primary value, lower is better.
+            unit (str): Unit of `value`, for the report.
+            name (str): Result name (defaults to the test id).
+            tolerance (float): Overrides --bench-max-regression for this measurement.
+        """
+        name = name or self.test_name
+        entry = {"value": value, "unit": unit, **extra}
+        self.session.results[name] = entry
+
+        if self.session.save:
+            return
+        baseline = self.session.baseline.get(name)
+        if not baseline or not baseline.get("value"):
+            self.session.ungated.append(name)
+            if self.session.strict:
+                pytest.fail(f"{name}: no baseline entry in {self.session.baseline_path} "
+                            f"(record one with --bench-save)")
+            return
+        allowed = self._allowed(tolerance)
+        ratio = value / baseline["value"]
+        entry["baseline"] = baseline["value"]
+        entry["ratio"] = ratio
+        if ratio > 1 + allowed:
+            pytest.fail(
+                f"{name}: {value:.6g}{unit} vs baseline {baseline['value']:.6g}{unit} "
+                f"({(ratio - 1) * 100:.0f}% slower, {allowed * 100:.0f}% allowed)"
+            )
+
+
+def pytest_configure(config):
+    config._bench_session = BenchmarkSession(config)
+
+
+def pytest_unconfigure(config):
+    session = getattr(config, "_bench_session", None)
+    if session is not None:
+        session.write()
+
+
+@pytest.fixture
+def bench(request):
+    return Benchmark(request.config._bench_session, request.node.name)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    session = config._bench_session
+    results = session.results
+    if not results:
+        return
+    terminalreporter.section("benchmarks")
+    if not session.save and not session.baseline_found:
+        terminalreporter.write_line(
+            f"WARNING: baseline {session.baseline_path} not found; no regressions were checked. "
+            f"Record one with --bench-save.", red=True, bold=True)
+    elif session.ungated:
+        terminalreporter.write_line(
+            f"WARNING: {len(session.ungated)} measurement(s) have no baseline entry and were not checked: "
+            f"{', '.join(sorted(session.ungated))}", yellow=True)
+    for name in sorted(results):
+        entry = results[name]
+        line = f"{name:<60} {entry['value']:>12.6g} {entry['unit']:<6}"
+        if entry.get("rows_per_second"):
+            line += f" {entry['rows_per_second']:>14,.0f} rows/s"
+        if "ratio" in entry:
+            line += f"  x{entry['ratio']:.2f} vs baseline"
+        terminalreporter.write_line(line)
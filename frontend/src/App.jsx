@@ -36,7 +36,7 @@ function App() {
 
         try {
             // Assuming backend is at localhost:8000
-            const response = await fetch('http://localhost:8000/predict', {
+            const response = await fetch('http://localhost:8000/predict?compact=false', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -55,7 +55,7 @@ document.addEventListener('DOMContentLoaded', () => {
         submitBtn.textContent = 'Intercepting...';
 
         try {
-            const response = await fetch('http://localhost:8000/predict', {
+            const response = await fetch('http://localhost:8000/predict?compact=false', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
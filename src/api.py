@@ -1,22 +1,40 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, Header, HTTPException
+from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import pandas as pd
-import io
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 import json
 import logging
+import os
+import threading
+import time
 
 from src.utils import generate_synthetic_data
-from src.audit import BiasAuditor
-from src.screen import DataScreener
+from src.audit import StreamingAuditor
+from src.ingest import iter_upload_chunks
+from src.jobs import FINISHED_STATES, JobManager
+from src.instrumentation import AUDIT_ROWS, AUDIT_SECONDS, SCREEN_ROWS, SCREEN_SECONDS, router as instrumentation_router
+from src.audit_planner import AuditPlanner
+from src.screen import StreamingDataScreener
 from src.report import BiasReporter
+from src.report_store import ReportStore
+from src.reference import ReferenceDataManager
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("api")
 
-app = FastAPI(title="Bias Detection Dashboard")
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    # Stop background audit jobs (unfinished ones are marked failed on next start)
+    state.jobs.close(wait=False)
+
+app = FastAPI(title="Bias Detection Dashboard", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,21 +44,90 @@ app.add_middleware(
 )
 
 # Global configuration / State
-# In a real app, this would be per-session or database-backed.
+# Reports live in a tenant-scoped SQLite store shared by all worker processes;
+# only read-only reference data is kept per process.
 class SystemState:
     def __init__(self):
-        self.reporter = BiasReporter()
-        self.ref_data = generate_synthetic_data(n_samples=2000, bias_level=0.5)
-        logger.info("System State Initialized with Reference Data")
+        self.reports = ReportStore(
+            os.environ.get("REPORT_STORE_PATH", "report_store.db"),
+            max_versions=int(os.environ.get("REPORT_STORE_MAX_VERSIONS", 5)),
+            max_tenants=int(os.environ.get("REPORT_STORE_MAX_TENANTS", 1000)),
+        )
+        # Background audit jobs; state is shared through SQLite, work runs in this process
+        self.jobs = JobManager(
+            os.environ.get("JOB_STORE_PATH", "jobs.db"),
+            work_dir=os.environ.get("JOB_WORK_DIR", "job_uploads"),
+            max_workers=int(os.environ.get("JOB_WORKERS", 2)),
+        )
+        # Loaded lazily on first use (synthetic data unless REFERENCE_DATA_PATH is set)
+        self.reference = ReferenceDataManager(os.environ.get("REFERENCE_DATA_PATH") or None)
+        # tenant -> (reference version, screener, lock); least recently used tenants are evicted
+        self._screeners = OrderedDict()
+        self._screeners_lock = threading.Lock()
+        self.max_screener_tenants = int(os.environ.get("SCREENER_MAX_TENANTS", 1000))
+        logger.info("System State Initialized")
+
+    def screener(self, tenant):
+        """
+        The tenant's streaming screener, bound to the current reference version
+        (rebuilt on hot-swap). Each tenant has its own drift window and proxy
+        accumulators, so no tenant's results depend on another's batches.
+        State is per worker process.
+
+        Returns:
+            tuple: (screener, lock to hold while updating it)
+        """
+        reference = self.reference.get()
+        with self._screeners_lock:
+            entry = self._screeners.get(tenant)
+            if entry is None or entry[0] != reference.version:
+                # Reference is summarized once; live batches roll through a sliding window
+                screener = StreamingDataScreener(
+                    reference_data=reference.data,
+                    protected_attribute='gender',
+                    window_size=200,
+                    window_mode='sliding',
+                    sketch=reference.sketch,
+                    proxy_reference=reference.proxy_moments
+                )
+                entry = self._screeners[tenant] = (reference.version, screener, threading.Lock())
+                while len(self._screeners) > self.max_screener_tenants:
+                    self._screeners.popitem(last=False)
+            self._screeners.move_to_end(tenant)
+        return entry[1], entry[2]
 
 state = SystemState()
 
 class ScreenInput(BaseModel):
     data: List[Dict[str, Any]]
 
+class ReferenceReload(BaseModel):
+    path: Optional[str] = None
+
 @app.get("/api/state")
 def get_system_state():
-    return {"status": "Active", "reference_data_size": len(state.ref_data)}
+    reference = state.reference.get()
+    return {
+        "status": "Active",
+        "reference_data_size": len(reference),
+        "reference_version": reference.version,
+        "reference_source": reference.source
+    }
+
+@app.get("/api/reference")
+def get_reference_summary():
+    """Precomputed per-feature summary statistics of the current reference data."""
+    reference = state.reference.get()
+    return {"version": reference.version, "source": reference.source, "summary": reference.summary}
+
+@app.post("/api/reference/reload")
+def reload_reference(request: ReferenceReload):
+    """Hot-swaps the reference data (Parquet file or directory of .npy columns)."""
+    try:
+        reference = state.reference.reload(request.path)
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"version": reference.version, "source": reference.source, "rows": len(reference)}
 
 @app.get("/api/generate_data")
 def get_sample_data(n_samples: int = 200):
@@ -48,19 +135,52 @@ def get_sample_data(n_samples: int = 200):
     df = generate_synthetic_data(n_samples=n_samples, bias_level=0.8)
     return json.loads(df.to_json(orient="records"))
 
-@app.post("/api/audit")
-async def run_audit(file: UploadFile = File(...)):
-    """Runs the Historical Bias Audit on uploaded file."""
+# Columns the historical audit reads; anything else in an upload is never parsed into memory
+AUDIT_COLUMNS = ['gender', 'experience', 'hired', 'hired_pred']
+UPLOAD_CHUNK_ROWS = int(os.environ.get("UPLOAD_CHUNK_ROWS", 100_000))
+JOB_EVENT_INTERVAL = float(os.environ.get("JOB_EVENT_INTERVAL", 0.5))
+
+def _upload_chunks(fileobj, content_type=None, filename=None, columns=None):
+    """
+    Streams an uploaded CSV, JSON, JSONL or Parquet file in DataFrame chunks.
+
+    The format is sniffed from magic bytes / the first character, then the
+    content type and file name. Reading starts from the spooled temporary file
+    behind the UploadFile (or a job's spooled input), so the raw body is never
+    held in memory as one blob.
+    Returns (format, first chunk, iterator over the chunks).
+    """
+    try:
+        fileobj.seek(0)
+        fmt, chunks = iter_upload_chunks(
+            fileobj, content_type=content_type, filename=filename,
+            columns=columns, chunksize=UPLOAD_CHUNK_ROWS
+        )
+        # Parse the first chunk eagerly so format errors surface as a 400
+        first = next(chunks, None)
+    except Exception as e:
+        logger.error(f"File upload error: {e}")
+        raise HTTPException(status_code=400, detail="Invalid file format. Upload CSV, JSON, JSONL or Parquet.")
+    if first is None:
+        raise HTTPException(status_code=400, detail="Uploaded file contains no rows.")
+
+    def all_chunks():
+        yield first
+        yield from chunks
+
+    return fmt, first, all_chunks()
+
+def _read_upload(file, columns=None):
+    """Parses an uploaded file into one DataFrame (only `columns`, if given)."""
+    _, _, chunks = _upload_chunks(file.file, file.content_type, file.filename, columns)
     try:
-        content = await file.read()
-        try:
-            df = pd.read_json(io.BytesIO(content))
-        except ValueError:
-            df = pd.read_csv(io.BytesIO(content))
+        return pd.concat(list(chunks), ignore_index=True)
     except Exception as e:
         logger.error(f"File upload error: {e}")
-        raise HTTPException(status_code=400, detail="Invalid file format. Upload CSV or JSON.")
-            
+        raise HTTPException(status_code=400, detail="Invalid file format. Upload CSV, JSON, JSONL or Parquet.")
+
+def _ensure_predictions(df):
+    """Adds a simulated 'hired_pred' column when the upload has no predictions."""
     # Mock Prediction Augmentation
     # If the user uploads raw data without predictions, we simulate a model's output
     if 'hired_pred' not in df.columns:
@@ -73,49 +193,224 @@ async def run_audit(file: UploadFile = File(...)):
             import numpy as np
             logger.warning("Missing 'experience' or 'gender' columns. Generating random predictions.")
             df['hired_pred'] = np.random.randint(0, 2, df.shape[0])
-    
-    auditor = BiasAuditor(
-        data=df,
+    return df
+
+def _mock_predict(sub_df):
+    # Mimics the prediction heuristic in `_ensure_predictions`
+    return ((sub_df['experience'] > 4) & (sub_df['gender'] == 1)).astype(int)
+
+def _audit_upload(fileobj, content_type=None, filename=None, progress_callback=None):
+    """
+    Historical bias audit of an uploaded file, streamed chunk by chunk.
+
+    Args:
+        fileobj: Seekable binary file object with the upload.
+        content_type, filename: Hints for format detection.
+        progress_callback (callable): Called with a progress dict after every chunk
+            and when each result section finishes.
+    """
+    started = time.perf_counter()
+    fmt, first, chunks = _upload_chunks(fileobj, content_type, filename, AUDIT_COLUMNS)
+
+    auditor = StreamingAuditor(
         protected_attribute='gender',
         privileged_group=1,
         unprivileged_group=0,
         label_column='hired_pred',
-        favorable_label=1
+        favorable_label=1,
+        # Check if ground truth exists
+        true_label_column='hired' if 'hired' in first.columns else None,
+        prepare_chunk=_ensure_predictions,
+        progress_callback=(lambda p: progress_callback(stage="reading", **p)) if progress_callback else None,
+        # Perturbation test (using a mock function that mimics the logic above)
+        model_predict_fn=_mock_predict if 'experience' in first.columns else None,
+        feature_columns=['experience'],
     )
-    
-    # Run audit
-    # Check if ground truth exists
-    true_col = 'hired' if 'hired' in df.columns else None
-    results = auditor.run_complete_audit(true_label_column=true_col)
-    
-    # Run perturbation test (using a mock function that mimics the logic above)
-    def mock_predict(sub_df):
-        return ((sub_df['experience'] > 4) & (sub_df['gender'] == 1)).astype(int)
-        
-    perturb_results = auditor.run_perturbation_test(mock_predict)
-    results['perturbation_test'] = perturb_results
-    
-    # Update global reporter
-    state.reporter.add_audit_results(results)
-    
+
+    try:
+        auditor.audit_chunks(chunks)
+    except (KeyError, ValueError, TypeError) as e:
+        logger.error(f"File upload error: {e}")
+        raise HTTPException(status_code=400, detail=f"Could not audit upload: {e}")
+    finally:
+        # Release the reader now (e.g. on cancellation) rather than at garbage collection
+        chunks.close()
+
+    finished = ["fairness_metrics", "perturbation_test"]
+    if progress_callback:
+        progress_callback(stage="confidence_intervals", metrics_finished=list(finished))
+    results = auditor.results(confidence_intervals=True)
+    finished.append("confidence_intervals")
+
+    if auditor.perturbation is not None:
+        results['perturbation_test'] = auditor.perturbation_results()
+    else:
+        results['perturbation_test'] = {"flip_rate": 0.0, "flipped_indices": []}
+    if progress_callback:
+        progress_callback(stage="complete", metrics_finished=finished)
+    AUDIT_SECONDS.observe(time.perf_counter() - started, kind="historical")
+    AUDIT_ROWS.observe(auditor.rows_processed, kind="historical")
+    logger.info(f"Audited {auditor.rows_processed:,} rows from a {fmt} upload in {auditor.chunks_processed} chunks")
+    return results
+
+@app.post("/api/audit")
+def run_audit(file: UploadFile = File(...), x_tenant_id: str = Header("default")):
+    """Runs the Historical Bias Audit on uploaded file (synchronously; see /api/jobs/audit)."""
+    results = _audit_upload(file.file, file.content_type, file.filename)
+
+    # Update the tenant's scorecard
+    state.reports.put_section(x_tenant_id, "historical_audit", results)
+
+    return results
+
+@app.post("/api/jobs/audit", status_code=202)
+def submit_audit_job(file: UploadFile = File(...), x_tenant_id: str = Header("default")):
+    """
+    Queues the Historical Bias Audit as a background job and returns immediately.
+    Follow it with /api/jobs/{job_id}/events, then fetch /api/jobs/{job_id}/result.
+    """
+    content_type, filename = file.content_type, file.filename
+
+    def audit_job(context):
+        with open(context.input_path, "rb") as fileobj:
+            try:
+                results = _audit_upload(fileobj, content_type, filename, progress_callback=context.report)
+            except HTTPException as e:
+                raise ValueError(e.detail)
+        state.reports.put_section(x_tenant_id, "historical_audit", results)
+        return results
+
+    suffix = os.path.splitext(filename or "")[1]
+    job_id = state.jobs.submit(x_tenant_id, "audit", audit_job, upload=file.file, suffix=suffix)
+    return {"job_id": job_id, "status": "queued"}
+
+def _job_or_404(job_id, tenant):
+    job = state.jobs.status(job_id, tenant)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    return job
+
+@app.get("/api/jobs")
+def list_jobs(limit: int = 50, x_tenant_id: str = Header("default")):
+    return {"jobs": state.jobs.list_jobs(x_tenant_id, limit)}
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str, x_tenant_id: str = Header("default")):
+    return _job_or_404(job_id, x_tenant_id)
+
+@app.get("/api/jobs/{job_id}/result")
+def get_job_result(job_id: str, x_tenant_id: str = Header("default")):
+    status, result = state.jobs.result(job_id, x_tenant_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    if status != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {status}")
+    return result
+
+@app.post("/api/jobs/{job_id}/cancel")
+def cancel_job(job_id: str, x_tenant_id: str = Header("default")):
+    job = state.jobs.cancel(job_id, x_tenant_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    return job
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str, x_tenant_id: str = Header("default")):
+    """
+    Server-Sent Events stream of a job's progress. One `progress` event is sent
+    whenever the stored progress changes and a final `end` event with the job status.
+    """
+    _job_or_404(job_id, x_tenant_id)
+
+    async def events():
+        last = None
+        while True:
+            # Status reads are short SQLite queries; keep them off the event loop anyway
+            job = await asyncio.to_thread(state.jobs.status, job_id)
+            if job is None:
+                return
+            if job["status"] in FINISHED_STATES:
+                yield f"event: end\ndata: {json.dumps(job)}\n\n"
+                return
+            snapshot = (job["status"], json.dumps(job["progress"], sort_keys=True))
+            if snapshot != last:
+                last = snapshot
+                yield f"event: progress\ndata: {json.dumps(job)}\n\n"
+            await asyncio.sleep(JOB_EVENT_INTERVAL)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/api/audit/multi")
+def run_multi_audit(
+    file: UploadFile = File(...),
+    attributes: str = Form("gender"),
+    intersections: str = Form(""),
+    segment_column: str = Form(""),
+    min_group_size: int = Form(30),
+    x_tenant_id: str = Header("default"),
+):
+    """
+    Audits several protected attributes and their intersections in parallel.
+
+    attributes: comma-separated columns, e.g. "gender,age_band,ethnicity".
+    intersections: semicolon-separated groups joined by '+', e.g. "gender+age_band;gender+ethnicity".
+    segment_column: optional column (e.g. job family) to audit every slice per segment.
+    """
+    attribute_list = [a.strip() for a in attributes.split(',') if a.strip()]
+    intersection_list = [
+        [a.strip() for a in group.split('+')]
+        for group in intersections.split(';') if group.strip()
+    ]
+    # Only parse the columns the plan touches
+    columns = set(AUDIT_COLUMNS) | set(attribute_list) | {a for group in intersection_list for a in group}
+    if segment_column:
+        columns.add(segment_column)
+    df = _ensure_predictions(_read_upload(file, sorted(columns)))
+
+    planner = AuditPlanner(
+        data=df,
+        label_column='hired_pred',
+        favorable_label=1,
+        attributes=attribute_list,
+        intersections=intersection_list,
+        true_label_column='hired' if 'hired' in df.columns else None,
+        segment_column=segment_column or None,
+        min_group_size=min_group_size,
+    )
+
+    try:
+        with AUDIT_SECONDS.time(kind="multi_attribute"):
+            results = planner.run()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    AUDIT_ROWS.observe(len(df), kind="multi_attribute")
+
+    state.reports.put_section(x_tenant_id, "multi_attribute_audit", results)
     return results
 
 @app.post("/api/screen")
-def screen_data(input_data: ScreenInput):
+def screen_data(input_data: ScreenInput, x_tenant_id: str = Header("default")):
     """Runs Real-Time Screening on a batch of data."""
     df = pd.DataFrame(input_data.data)
     
     if df.empty:
         return {"error": "No data provided"}
 
-    screener = DataScreener(reference_data=state.ref_data, protected_attribute='gender')
-    
-    # Check Drift
-    drift_results = screener.check_distributional_drift(df, threshold=0.05)
-    
-    # Check Proxies
-    # Needs accumulated data to be meaningful, but we run it on the batch
-    proxy_results = screener.check_for_proxies(pd.concat([state.ref_data, df], ignore_index=True))
+    started = time.perf_counter()
+    screener, screener_lock = state.screener(x_tenant_id)
+
+    with screener_lock:
+        # Check Drift (incrementally, against the tenant's rolling window of recent batches)
+        drift_results = screener.check_drift_incremental(df, threshold=0.05)
+
+        # Check Proxies
+        # Running correlations over reference + the tenant's screened batches (no re-concat)
+        if 'gender' in df.columns:
+            screener.update_proxy_stats(df)
+            proxy_results = screener.check_for_proxies_online()
+        else:
+            proxy_results = {"error": "Protected attribute not found in batch for proxy detection."}
     
     screen_results = {
         "drift": drift_results,
@@ -123,13 +418,20 @@ def screen_data(input_data: ScreenInput):
         "batch_risk": "High" if any(d['drift_detected'] for d in drift_results.values()) else "Low"
     }
     
-    state.reporter.add_screening_results(screen_results)
+    SCREEN_SECONDS.observe(time.perf_counter() - started)
+    SCREEN_ROWS.observe(len(df))
+
+    state.reports.put_section(x_tenant_id, "screening_checks", screen_results)
     return screen_results
 
 @app.get("/api/report")
-def get_report():
-    """Returns the current accumulated Bias Scorecard."""
-    return json.loads(state.reporter.generate_scorecard())
+def get_report(x_tenant_id: str = Header("default")):
+    """Returns the current accumulated Bias Scorecard for the tenant (X-Tenant-ID header)."""
+    _, sections = state.reports.get_report(x_tenant_id)
+    return json.loads(BiasReporter(sections).generate_scorecard())
+
+# /metrics (Prometheus) and the runtime sampling profiler; registered before the static mount
+app.include_router(instrumentation_router)
 
 # Mount Frontend
 app.mount("/", StaticFiles(directory="web", html=True), name="static")
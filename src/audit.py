@@ -1,10 +1,37 @@
-import pandas as pd
-import numpy as np
+import logging
+import time
+
+from src.confidence import metric_intervals
+from src.contingency import ContingencyTable
+from src.ingest import iter_chunks
+from src.perturbation import PerturbationEngine
+
+logger = logging.getLogger("audit")
 
 # In a real scenario, we might import aif360 here, but for this implementation
 # we will write the metric calculations from scratch to ensure they work 
 # without complex dependencies, while mimicking the logic.
 
+def summarize_table(table, privileged_group, unprivileged_group):
+    """
+    Builds the `run_complete_audit` result dictionary from a contingency table.
+    Label-dependent metrics are only included when the table has ground truth.
+    """
+    metrics = table.metrics(privileged_group, unprivileged_group)
+
+    results = {
+        "disparate_impact": metrics["disparate_impact"],
+        "statistical_parity_difference": metrics["statistical_parity_difference"]
+    }
+
+    if table.has_truth:
+        results["equal_opportunity_difference"] = metrics["equal_opportunity_difference"]
+        results["equalized_odds_difference"] = metrics["equalized_odds_difference"]
+        results["false_positive_rate_difference"] = metrics["false_positive_rate_difference"]
+        results["predictive_parity_difference"] = metrics["predictive_parity_difference"]
+
+    return results
+
 class BiasAuditor:
     def __init__(self, data, protected_attribute, privileged_group, unprivileged_group, label_column, favorable_label):
         """
@@ -25,42 +52,34 @@ class BiasAuditor:
         self.label_column = label_column
         self.favorable_label = favorable_label
 
+    def contingency_table(self, true_label_column=None):
+        """
+        Builds the group x predicted x true-label counts in one pass over the data.
+        All metrics below are derived from this table.
+        """
+        return ContingencyTable.from_frame(
+            self.df,
+            self.protected_attribute,
+            self.label_column,
+            self.favorable_label,
+            true_label_column,
+        )
+
     def calculate_disparate_impact(self):
         """
         Calculate Disparate Impact (DI).
         DI = P(Y=1 | D=unprivileged) / P(Y=1 | D=privileged)
         """
-        priv_df = self.df[self.df[self.protected_attribute] == self.privileged_group]
-        unpriv_df = self.df[self.df[self.protected_attribute] == self.unprivileged_group]
-        
-        if len(priv_df) == 0 or len(unpriv_df) == 0:
-            return None
-
-        priv_pos_rate = len(priv_df[priv_df[self.label_column] == self.favorable_label]) / len(priv_df)
-        unpriv_pos_rate = len(unpriv_df[unpriv_df[self.label_column] == self.favorable_label]) / len(unpriv_df)
-        
-        if priv_pos_rate == 0:
-            return 0.0 # Avoid division by zero, though logically strange implication
-            
-        di = unpriv_pos_rate / priv_pos_rate
-        return di
+        table = self.contingency_table()
+        return table.metrics(self.privileged_group, self.unprivileged_group)["disparate_impact"]
 
     def calculate_statistical_parity_difference(self):
         """
         Calculate Statistical Parity Difference (SPD).
         SPD = P(Y=1 | D=unprivileged) - P(Y=1 | D=privileged)
         """
-        priv_df = self.df[self.df[self.protected_attribute] == self.privileged_group]
-        unpriv_df = self.df[self.df[self.protected_attribute] == self.unprivileged_group]
-        
-        if len(priv_df) == 0 or len(unpriv_df) == 0:
-            return None
-
-        priv_pos_rate = len(priv_df[priv_df[self.label_column] == self.favorable_label]) / len(priv_df)
-        unpriv_pos_rate = len(unpriv_df[unpriv_df[self.label_column] == self.favorable_label]) / len(unpriv_df)
-        
-        spd = unpriv_pos_rate - priv_pos_rate
-        return spd
+        table = self.contingency_table()
+        return table.metrics(self.privileged_group, self.unprivileged_group)["statistical_parity_difference"]
 
     def calculate_equal_opportunity_difference(self, true_label_column):
         """
@@ -73,87 +92,226 @@ class BiasAuditor:
         Args:
             true_label_column (str): Name of the column with ground truth labels.
         """
-        # Filter for actual positive cases (Y_true = 1)
-        # We need to assess recall/TPR for these groups.
-        
-        actual_positives = self.df[self.df[true_label_column] == self.favorable_label]
-        
-        priv_df = actual_positives[actual_positives[self.protected_attribute] == self.privileged_group]
-        unpriv_df = actual_positives[actual_positives[self.protected_attribute] == self.unprivileged_group]
-        
-        if len(priv_df) == 0 or len(unpriv_df) == 0:
-            return None # Cannot calculate TPR if there are no actual positives in a group
+        table = self.contingency_table(true_label_column)
+        return table.metrics(self.privileged_group, self.unprivileged_group)["equal_opportunity_difference"]
 
-        # TPR = TP / (TP + FN) = (Predicted=1 & True=1) / (True=1)
-        # Since we filtered `actual_positives`, len(priv_df) is (TP+FN).
-        # We just need to count how many of these were PREDICTED as positive.
-        
-        priv_tpr = len(priv_df[priv_df[self.label_column] == self.favorable_label]) / len(priv_df)
-        unpriv_tpr = len(unpriv_df[unpriv_df[self.label_column] == self.favorable_label]) / len(unpriv_df)
-        
-        eod = unpriv_tpr - priv_tpr
-        return eod
-
-    def run_complete_audit(self, true_label_column=None):
+    def run_complete_audit(self, true_label_column=None, confidence_intervals=False, confidence=0.95,
+                           n_resamples=2000, random_state=None, n_jobs=1):
         """
         Runs all configured metrics and returns a dictionary.
+        A single contingency table is built and every metric is derived from it.
+
+        With ground truth labels, the report also includes equalized odds,
+        false positive rate difference and predictive parity difference.
+
+        Args:
+            true_label_column (str): Ground truth column, optional.
+            confidence_intervals (bool): Add analytic and bootstrap intervals
+                plus significance tests under 'confidence_intervals'.
+            confidence (float): Interval coverage.
+            n_resamples (int): Bootstrap resamples.
+            random_state (int): Bootstrap seed.
+            n_jobs (int): Processes for the bootstrap.
         """
-        results = {
-            "disparate_impact": self.calculate_disparate_impact(),
-            "statistical_parity_difference": self.calculate_statistical_parity_difference()
-        }
-        
-        if true_label_column:
-            results["equal_opportunity_difference"] = self.calculate_equal_opportunity_difference(true_label_column)
-            
+        table = self.contingency_table(true_label_column)
+        results = summarize_table(table, self.privileged_group, self.unprivileged_group)
+
+        if confidence_intervals:
+            results["confidence_intervals"] = metric_intervals(
+                table, self.privileged_group, self.unprivileged_group,
+                confidence=confidence, n_resamples=n_resamples, random_state=random_state, n_jobs=n_jobs
+            )
+
         return results
 
-    def run_perturbation_test(self, model_predict_fn, sensitive_value=None):
+    def run_perturbation_test(self, model_predict_fn, sensitive_value=None, all_alternatives=False,
+                              sample_size=None, feature_columns=None, confidence=0.95, random_state=None):
         """
         Runs perturbation testing by flipping the protected attribute and checking for label changes.
         
         Args:
             model_predict_fn (callable): A function that takes a DataFrame and returns predictions.
-            sensitive_value (any): The value to flip to/from. If None, uses unprivileged_group.
+            sensitive_value (any): The value to flip from. If None, uses unprivileged_group.
+            all_alternatives (bool): Test every other observed value of the attribute
+                (multi-valued attributes) instead of only the privileged group.
+            sample_size (int): Test a stratified sample of this many rows to bound cost.
+            feature_columns (list): Columns the model needs; other columns are never copied.
+            confidence (float): Confidence level for the flip-rate interval.
+            random_state (int): Seed for sampling.
         
         Returns:
             dict: Summary of flip rate and indices of flipped samples.
         """
         if sensitive_value is None:
             sensitive_value = self.unprivileged_group
-            
-        # Create perturbed data
-        # We assume binary protected attribute for simplicity in this demo
-        df_perturbed = self.df.copy()
-        
-        # Simple flip logic: if it matches optimal/sensitive, flip it.
-        # This assumes the column is binary 0/1 or similar.
-        # For more complex cases, we'd need explicit mapping.
-        
-        # For this implementation, we assume we are testing: "If I change Unprivileged -> Privileged, does outcome change?"
-        # So we only look at rows currently in Unprivileged group.
-        
-        target_rows = self.df[self.df[self.protected_attribute] == self.unprivileged_group].index
-        
-        if len(target_rows) == 0:
-            return {"flip_rate": 0.0, "flipped_indices": []}
-            
-        # Set them to privileged
-        df_perturbed.loc[target_rows, self.protected_attribute] = self.privileged_group
-        
-        # Get original predictions (if not already in df, but we usually audit trained models)
-        # Using the passed predict_fn to ensure we test the model's current behavior
-        original_preds = model_predict_fn(self.df.loc[target_rows])
-        new_preds = model_predict_fn(df_perturbed.loc[target_rows])
-        
-        # Check differences
-        diff = (original_preds != new_preds)
-        flip_count = np.sum(diff)
-        flip_rate = flip_count / len(target_rows)
-        
+
+        # Default question: "If I change Unprivileged -> Privileged, does outcome change?"
+        engine = PerturbationEngine(model_predict_fn, self.protected_attribute, feature_columns)
+        return engine.run(
+            self.df,
+            source_values=[sensitive_value],
+            target_values=None if all_alternatives else [self.privileged_group],
+            sample_size=sample_size,
+            confidence=confidence,
+            random_state=random_state,
+        )
+
+
+class StreamingAuditor:
+    """
+    Out-of-core version of `BiasAuditor.run_complete_audit`.
+
+    Decision logs are read in chunks and folded into a mergeable contingency
+    table, so memory stays bounded by the chunk size regardless of file size.
+    """
+    def __init__(self, protected_attribute, privileged_group, unprivileged_group, label_column, favorable_label,
+                 true_label_column=None, prepare_chunk=None, progress_callback=None, log_interval=5.0,
+                 model_predict_fn=None, feature_columns=None, max_flipped_indices=1000):
+        """
+        Args:
+            protected_attribute, privileged_group, unprivileged_group, label_column, favorable_label:
+                Same meaning as in `BiasAuditor`.
+            true_label_column (str): Ground truth column, optional.
+            prepare_chunk (callable): Optional hook applied to every chunk before counting
+                (e.g. to add a prediction column).
+            progress_callback (callable): Called with a progress dict after every chunk.
+            log_interval (float): Seconds between throughput log lines.
+            model_predict_fn (callable): If set, every chunk is also perturbation tested
+                (unprivileged -> privileged) and the flips are accumulated.
+            feature_columns (list): Columns `model_predict_fn` needs.
+            max_flipped_indices (int): Flipped row indices kept for the result (the first ones
+                seen); flips beyond that are only counted, so memory stays bounded.
+        """
+        self.protected_attribute = protected_attribute
+        self.privileged_group = privileged_group
+        self.unprivileged_group = unprivileged_group
+        self.label_column = label_column
+        self.favorable_label = favorable_label
+        self.true_label_column = true_label_column
+        self.prepare_chunk = prepare_chunk
+        self.progress_callback = progress_callback
+        self.log_interval = log_interval
+
+        self.table = ContingencyTable.empty(has_truth=true_label_column is not None)
+        self.perturbation = None
+        if model_predict_fn is not None:
+            self.perturbation = PerturbationEngine(model_predict_fn, protected_attribute, feature_columns)
+        self.max_flipped_indices = max_flipped_indices
+        self._flipped_indices = []
+        self._flipped_count = 0
+        self._perturbed_rows = 0
+        self.rows_processed = 0
+        self.chunks_processed = 0
+        self._started = None
+        self._last_log = None
+
+    @property
+    def required_columns(self):
+        columns = [self.protected_attribute, self.label_column]
+        if self.true_label_column:
+            columns.append(self.true_label_column)
+        return columns
+
+    def update(self, chunk):
+        """Folds one DataFrame chunk into the running counts."""
+        now = time.perf_counter()
+        if self._started is None:
+            self._started = self._last_log = now
+
+        if self.prepare_chunk is not None:
+            chunk = self.prepare_chunk(chunk)
+
+        self.table = self.table.merge(ContingencyTable.from_frame(
+            chunk,
+            self.protected_attribute,
+            self.label_column,
+            self.favorable_label,
+            self.true_label_column,
+        ))
+        if self.perturbation is not None:
+            # Rows are independent, so per-chunk flips add up to the full-data result
+            perturbed = self.perturbation.run(
+                chunk, source_values=[self.unprivileged_group], target_values=[self.privileged_group]
+            )
+            flipped = perturbed["flipped_indices"]
+            self._flipped_count += len(flipped)
+            room = self.max_flipped_indices - len(self._flipped_indices)
+            if room > 0:
+                self._flipped_indices.extend(flipped[:room])
+            self._perturbed_rows += perturbed.get("analyzed_count", 0)
+
+        self.rows_processed += len(chunk)
+        self.chunks_processed += 1
+
+        progress = self.progress()
+        if now - self._last_log >= self.log_interval:
+            self._last_log = now
+            logger.info(f"Audited {progress['rows_processed']:,} rows ({progress['rows_per_second']:,.0f} rows/s)")
+        if self.progress_callback is not None:
+            self.progress_callback(progress)
+
+    def progress(self):
+        elapsed = time.perf_counter() - self._started if self._started is not None else 0.0
         return {
-            "flip_rate": flip_rate,
-            "flipped_indices": target_rows[diff].tolist(),
-            "analyzed_count": len(target_rows)
+            "rows_processed": self.rows_processed,
+            "chunks_processed": self.chunks_processed,
+            "elapsed_seconds": elapsed,
+            "rows_per_second": self.rows_processed / elapsed if elapsed > 0 else 0.0,
         }
 
+    def audit_chunks(self, chunks):
+        """Consumes an iterable of DataFrame chunks and returns the audit results."""
+        if self._started is None:
+            # Start the clock before the first read so rows/s includes parsing
+            self._started = self._last_log = time.perf_counter()
+        for chunk in chunks:
+            self.update(chunk)
+        return self.results()
+
+    def audit_file(self, source, fmt=None, chunksize=100_000, columns=None):
+        """
+        Streams a CSV, JSONL or Parquet file through the audit.
+
+        Args:
+            source (str | file-like): Path or binary file object.
+            fmt (str): 'csv', 'jsonl' or 'parquet'. Inferred from the path if None.
+            chunksize (int): Rows per chunk.
+            columns (list): Columns to load. Defaults to only the columns the audit
+                needs, or every column when `prepare_chunk` is set.
+        """
+        if columns is None and self.prepare_chunk is None:
+            columns = self.required_columns
+        return self.audit_chunks(iter_chunks(source, fmt=fmt, chunksize=chunksize, columns=columns))
+
+    def results(self, confidence_intervals=False, confidence=0.95, n_resamples=2000, random_state=None):
+        """Same dictionary as `BiasAuditor.run_complete_audit`."""
+        results = summarize_table(self.table, self.privileged_group, self.unprivileged_group)
+        if confidence_intervals:
+            results["confidence_intervals"] = metric_intervals(
+                self.table, self.privileged_group, self.unprivileged_group,
+                confidence=confidence, n_resamples=n_resamples, random_state=random_state
+            )
+        return results
+
+    def perturbation_results(self):
+        """
+        Same dictionary as `BiasAuditor.run_perturbation_test` over every streamed row.
+        Every candidate row is tested, so the interval has zero width.
+        `flipped_indices` holds at most `max_flipped_indices` rows; `flipped_count` has the total.
+        """
+        if self.perturbation is None:
+            raise ValueError("StreamingAuditor was created without a model_predict_fn")
+        if self._perturbed_rows == 0:
+            return {"flip_rate": 0.0, "flipped_indices": [], "flipped_count": 0}
+
+        flip_rate = self._flipped_count / self._perturbed_rows
+        return {
+            "flip_rate": flip_rate,
+            "flipped_indices": list(self._flipped_indices),
+            "flipped_count": self._flipped_count,
+            "flipped_indices_truncated": self._flipped_count > len(self._flipped_indices),
+            "analyzed_count": self._perturbed_rows,
+            "population_count": self._perturbed_rows,
+            "sampled": False,
+            "confidence_interval": [flip_rate, flip_rate]
+        }
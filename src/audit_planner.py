@@ -0,0 +1,223 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from src.contingency import ContingencyTable
+
+logger = logging.getLogger("audit_planner")
+
+
+def _to_shared(array):
+    """Copies an array into a new shared memory block. Returns (block, spec)."""
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+    return block, (block.name, array.dtype.str, array.shape[0])
+
+
+def _attach(spec):
+    name, dtype, length = spec
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray((length,), dtype=np.dtype(dtype), buffer=block.buf)
+
+
+def _count_slice(column_specs, cardinalities, outcome_spec, segment_spec, n_segments):
+    """
+    Worker: counts (segment, group, predicted, true) for one slice.
+
+    Columns are read from shared memory, so the DataFrame is never pickled.
+    """
+    blocks = []
+    try:
+        return _count_from_blocks(blocks, column_specs, cardinalities, outcome_spec, segment_spec, n_segments)
+    finally:
+        # Views into the blocks are released once _count_from_blocks returns
+        for block in blocks:
+            block.close()
+
+
+def _count_from_blocks(blocks, column_specs, cardinalities, outcome_spec, segment_spec, n_segments):
+    # An intersection of attributes is encoded as a mixed-radix group code
+    combined = None
+    valid = None
+    for spec, cardinality in zip(column_specs, cardinalities):
+        block, codes = _attach(spec)
+        blocks.append(block)
+        col_valid = codes >= 0
+        codes = codes.astype(np.int64)
+        combined = codes if combined is None else combined * cardinality + codes
+        valid = col_valid if valid is None else valid & col_valid
+
+    block, outcome = _attach(outcome_spec)
+    blocks.append(block)
+
+    n_groups = int(np.prod(cardinalities))
+    flat = combined * 4 + outcome
+    if segment_spec is not None:
+        block, segments = _attach(segment_spec)
+        blocks.append(block)
+        valid &= segments >= 0
+        flat += segments.astype(np.int64) * (n_groups * 4)
+
+    counts = np.bincount(flat[valid], minlength=n_segments * n_groups * 4)
+    return counts.reshape(n_segments, n_groups, 2, 2)
+
+
+class AuditPlanner:
+    """
+    Audits many protected attributes, their intersections and (optionally)
+    every job family in one run, fanning the slices out to a process pool.
+
+    Columns are factorized once in the parent and placed in shared memory;
+    workers only receive block names and return small count tensors.
+    """
+    def __init__(self, data, label_column, favorable_label, attributes, intersections=(),
+                 privileged_groups=None, true_label_column=None, segment_column=None,
+                 min_group_size=1, max_workers=None):
+        """
+        Args:
+            data (pd.DataFrame): Decisions to audit.
+            label_column (str): Prediction column.
+            favorable_label (any): Value indicating a positive/favorable outcome.
+            attributes (list): Protected attributes audited on their own.
+            intersections (list): Tuples of attributes audited jointly, e.g. ('gender', 'age_band').
+            privileged_groups (dict): Reference group per attribute (or per intersection tuple).
+                Attributes without an entry use the group with the highest positive rate.
+            true_label_column (str): Ground truth column, optional.
+            segment_column (str): Optional column (e.g. job family) to audit each slice per segment.
+            min_group_size (int): Groups with fewer rows are reported but not compared.
+            max_workers (int): Process pool size. 0 runs every slice in-process.
+        """
+        self.df = data
+        self.label_column = label_column
+        self.favorable_label = favorable_label
+        self.attributes = list(attributes)
+        self.intersections = [tuple(i) for i in intersections]
+        self.privileged_groups = privileged_groups or {}
+        self.true_label_column = true_label_column
+        self.segment_column = segment_column
+        self.min_group_size = min_group_size
+        self.max_workers = max_workers
+
+    def plan(self):
+        """Returns the list of slices to audit, each a tuple of attributes."""
+        slices = [(attribute,) for attribute in self.attributes] + self.intersections
+        missing = {a for s in slices for a in s if a not in self.df.columns}
+        if missing:
+            raise ValueError(f"Attributes not found in data: {sorted(missing)}")
+        return slices
+
+    def run(self):
+        """Runs every planned slice and returns one combined report."""
+        slices = self.plan()
+        needed = sorted({a for s in slices for a in s})
+        logger.info(f"Auditing {len(slices)} slices over {len(self.df):,} rows")
+
+        # Encode once in the parent: int32 codes per attribute, int8 outcome cell
+        uniques = {}
+        arrays = {}
+        for attribute in needed:
+            codes, values = pd.factorize(self.df[attribute])
+            arrays[attribute] = codes.astype(np.int32)
+            uniques[attribute] = values.tolist()
+
+        outcome = (self.df[self.label_column].to_numpy() == self.favorable_label).astype(np.int8) * 2
+        if self.true_label_column:
+            outcome += (self.df[self.true_label_column].to_numpy() == self.favorable_label).astype(np.int8)
+
+        segment_values = [None]
+        if self.segment_column:
+            seg_codes, seg_values = pd.factorize(self.df[self.segment_column])
+            arrays[self.segment_column] = seg_codes.astype(np.int32)
+            segment_values = seg_values.tolist()
+
+        blocks = []
+        try:
+            specs = {}
+            for name, array in arrays.items():
+                block, specs[name] = _to_shared(array)
+                blocks.append(block)
+            block, outcome_spec = _to_shared(outcome)
+            blocks.append(block)
+
+            jobs = [
+                (
+                    [specs[a] for a in s],
+                    [len(uniques[a]) for a in s],
+                    outcome_spec,
+                    specs.get(self.segment_column),
+                    len(segment_values),
+                )
+                for s in slices
+            ]
+
+            if self.max_workers == 0:
+                counts = [_count_slice(*job) for job in jobs]
+            else:
+                with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                    counts = list(pool.map(_count_slice, *zip(*jobs)))
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+        report = {"rows": int(len(self.df)), "slices": []}
+        for s, slice_counts in zip(slices, counts):
+            groups = self._group_labels(s, uniques)
+            for segment, segment_counts in zip(segment_values, slice_counts):
+                table = ContingencyTable(groups, segment_counts, self.true_label_column is not None)
+                entry = self._summarize_slice(s, table)
+                if self.segment_column:
+                    entry["segment"] = segment
+                report["slices"].append(entry)
+
+        return report
+
+    @staticmethod
+    def _group_labels(attributes, uniques):
+        """Group labels in mixed-radix order: plain values, or tuples for intersections."""
+        if len(attributes) == 1:
+            return list(uniques[attributes[0]])
+        labels = [()]
+        for attribute in attributes:
+            labels = [prefix + (value,) for prefix in labels for value in uniques[attribute]]
+        return labels
+
+    def _summarize_slice(self, attributes, table):
+        """Compares every sufficiently large group in a slice to the reference group."""
+        key = attributes[0] if len(attributes) == 1 else attributes
+        sizes = table.counts.sum(axis=(1, 2))
+        positives = table.counts[:, 1, :].sum(axis=1)
+
+        eligible = [i for i, size in enumerate(sizes) if size >= max(self.min_group_size, 1)]
+        if key in self.privileged_groups:
+            reference = self.privileged_groups[key]
+        elif eligible:
+            reference = table.groups[max(eligible, key=lambda i: positives[i] / sizes[i])]
+        else:
+            reference = None
+
+        groups = []
+        for i, group in enumerate(table.groups):
+            if sizes[i] == 0:
+                continue
+            entry = {
+                "group": group,
+                "count": int(sizes[i]),
+                "positive_rate": float(positives[i] / sizes[i]),
+            }
+            if reference is not None and group != reference and i in eligible:
+                entry["metrics"] = table.metrics(reference, group)
+            groups.append(entry)
+
+        di_values = [g["metrics"]["disparate_impact"] for g in groups
+                     if "metrics" in g and g["metrics"]["disparate_impact"] is not None]
+
+        return {
+            "attributes": list(attributes),
+            "reference_group": reference,
+            "groups": groups,
+            "min_disparate_impact": min(di_values) if di_values else None,
+        }
@@ -0,0 +1,159 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import stats
+
+from src.contingency import fairness_metrics
+
+# Metrics with closed-form intervals; bootstrap covers everything `fairness_metrics` returns
+ANALYTIC_METRICS = ("disparate_impact", "statistical_parity_difference", "equal_opportunity_difference")
+
+
+def _bootstrap_chunk(priv, unpriv, size, seed):
+    """Draws `size` resamples of both groups' 2x2 counts and evaluates every metric."""
+    rng = np.random.default_rng(seed)
+
+    def resample(block):
+        n = int(block.sum())
+        if n == 0:
+            return np.zeros((size, 2, 2), dtype=np.int64)
+        return rng.multinomial(n, block.ravel() / n, size=size).reshape(size, 2, 2)
+
+    priv_draws = resample(priv)
+    metrics = fairness_metrics(priv_draws, resample(unpriv))
+    # DI is undefined (not 0) when a resample has no privileged favourable outcomes;
+    # NaN drops those draws instead of piling them up at 0 and dragging the lower bound down
+    metrics["disparate_impact"] = np.where(
+        priv_draws[..., 1, :].sum(axis=-1) == 0, np.nan, metrics["disparate_impact"]
+    )
+    return metrics
+
+
+def bootstrap_intervals(table, privileged_group, unprivileged_group, n_resamples=2000, confidence=0.95,
+                        random_state=None, n_jobs=1, chunk_size=1000):
+    """
+    Percentile bootstrap intervals for every fairness metric.
+
+    Resamples are drawn as multinomial counts over each group's 2x2 cells
+    (a stratified bootstrap over groups), so the cost depends on the number of
+    resamples and not on the number of raw rows.
+
+    Args:
+        table (ContingencyTable): Counts to resample.
+        privileged_group, unprivileged_group: Groups to compare.
+        n_resamples (int): Number of bootstrap resamples.
+        confidence (float): Interval coverage.
+        random_state (int): Seed; chunks get independent child streams.
+        n_jobs (int): Processes to spread chunks across (1 = in-process).
+        chunk_size (int): Resamples evaluated per vectorized batch.
+
+    Returns:
+        dict: Metric name -> {'ci_lower', 'ci_upper', 'std_error'} (None where undefined).
+    """
+    if n_resamples < 1:
+        raise ValueError(f"n_resamples must be at least 1, got {n_resamples}")
+    priv = table.group_counts(privileged_group)
+    unpriv = table.group_counts(unprivileged_group)
+
+    sizes = [chunk_size] * (n_resamples // chunk_size)
+    if n_resamples % chunk_size:
+        sizes.append(n_resamples % chunk_size)
+    seeds = np.random.SeedSequence(random_state).spawn(len(sizes))
+
+    args = [(priv, unpriv, size, seed) for size, seed in zip(sizes, seeds)]
+    if n_jobs == 1:
+        chunks = [_bootstrap_chunk(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            chunks = list(pool.map(_bootstrap_chunk, *zip(*args)))
+
+    alpha = (1 - confidence) / 2
+    names = chunks[0].keys() if table.has_truth else ANALYTIC_METRICS[:2]
+    intervals = {}
+    for name in names:
+        draws = np.concatenate([chunk[name] for chunk in chunks])
+        draws = draws[~np.isnan(draws)]
+        if len(draws) == 0:
+            intervals[name] = None
+            continue
+        lower, upper = np.quantile(draws, [alpha, 1 - alpha])
+        intervals[name] = {
+            "ci_lower": float(lower),
+            "ci_upper": float(upper),
+            "std_error": float(draws.std(ddof=1)) if len(draws) > 1 else 0.0
+        }
+    return intervals
+
+
+def _two_proportion(x1, n1, x0, n0, confidence):
+    """Difference p1 - p0 with a Wald interval and a pooled two-sided z-test."""
+    if n1 == 0 or n0 == 0:
+        return None
+    p1, p0 = x1 / n1, x0 / n0
+    z = stats.norm.ppf(0.5 + confidence / 2)
+
+    se = np.sqrt(p1 * (1 - p1) / n1 + p0 * (1 - p0) / n0)
+    pooled = (x1 + x0) / (n1 + n0)
+    se_pooled = np.sqrt(pooled * (1 - pooled) * (1 / n1 + 1 / n0))
+    p_value = 1.0 if se_pooled == 0 else float(2 * stats.norm.sf(abs(p1 - p0) / se_pooled))
+
+    return {
+        "estimate": float(p1 - p0),
+        "ci_lower": float(p1 - p0 - z * se),
+        "ci_upper": float(p1 - p0 + z * se),
+        "p_value": p_value
+    }
+
+
+def analytic_intervals(table, privileged_group, unprivileged_group, confidence=0.95):
+    """
+    Closed-form intervals and significance tests.
+
+    SPD and EOD use Wald intervals for a difference of proportions; DI uses the
+    delta method on log(DI). P-values test equal rates with a pooled z-test.
+
+    Returns:
+        dict: Metric name -> {'estimate', 'ci_lower', 'ci_upper', 'p_value'} (None where undefined).
+    """
+    priv = table.group_counts(privileged_group)
+    unpriv = table.group_counts(unprivileged_group)
+    z = stats.norm.ppf(0.5 + confidence / 2)
+
+    n_u, n_p = int(unpriv.sum()), int(priv.sum())
+    x_u, x_p = int(unpriv[1].sum()), int(priv[1].sum())
+
+    spd = _two_proportion(x_u, n_u, x_p, n_p, confidence)
+    results = {"statistical_parity_difference": spd, "disparate_impact": None}
+
+    if spd is not None and x_u > 0 and x_p > 0:
+        p_u, p_p = x_u / n_u, x_p / n_p
+        log_di = np.log(p_u / p_p)
+        se = np.sqrt((1 - p_u) / x_u + (1 - p_p) / x_p)
+        results["disparate_impact"] = {
+            "estimate": float(p_u / p_p),
+            "ci_lower": float(np.exp(log_di - z * se)),
+            "ci_upper": float(np.exp(log_di + z * se)),
+            "p_value": spd["p_value"]
+        }
+
+    if table.has_truth:
+        # TPR difference: proportions among actual positives only
+        results["equal_opportunity_difference"] = _two_proportion(
+            int(unpriv[1, 1]), int(unpriv[:, 1].sum()), int(priv[1, 1]), int(priv[:, 1].sum()), confidence
+        )
+
+    return results
+
+
+def metric_intervals(table, privileged_group, unprivileged_group, confidence=0.95, n_resamples=2000,
+                     random_state=None, n_jobs=1):
+    """Analytic and bootstrap intervals side by side."""
+    return {
+        "confidence": confidence,
+        "analytic": analytic_intervals(table, privileged_group, unprivileged_group, confidence),
+        "bootstrap": bootstrap_intervals(
+            table, privileged_group, unprivileged_group,
+            n_resamples=n_resamples, confidence=confidence, random_state=random_state, n_jobs=n_jobs
+        ),
+        "n_resamples": n_resamples
+    }
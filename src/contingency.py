@@ -0,0 +1,181 @@
+import numpy as np
+import pandas as pd
+
+# Cell layout of the per-group 2x2 block: counts[group, predicted, true]
+# where index 1 means "equals the favorable label".
+
+
+class ContingencyTable:
+    """
+    Group x predicted x true-label counts, built in a single pass over the data.
+
+    Every fairness metric the auditor reports can be derived from these counts,
+    so the raw rows only need to be scanned once. Tables are mergeable, which
+    lets chunked or parallel audits combine partial results.
+
+    Attributes:
+        groups (list): Distinct values of the protected attribute.
+        counts (np.ndarray): int64 array of shape (len(groups), 2, 2).
+        has_truth (bool): Whether the true-label axis was populated.
+    """
+    def __init__(self, groups, counts, has_truth):
+        self.groups = list(groups)
+        self.counts = counts
+        self.has_truth = has_truth
+        self._index = {group: i for i, group in enumerate(self.groups)}
+
+    @classmethod
+    def from_arrays(cls, group_values, predicted, favorable_label, true_labels=None):
+        """
+        Builds a table from aligned 1-D arrays.
+
+        Args:
+            group_values (array-like): Protected attribute value per row.
+            predicted (array-like): Predicted label per row.
+            favorable_label (any): Value indicating a positive/favorable outcome.
+            true_labels (array-like): Ground truth per row, optional.
+        """
+        codes, uniques = pd.factorize(np.asarray(group_values))
+        n_groups = len(uniques)
+
+        pred = np.asarray(predicted) == favorable_label
+        flat = codes.astype(np.int64) * 4 + pred.astype(np.int64) * 2
+        if true_labels is not None:
+            flat += (np.asarray(true_labels) == favorable_label).astype(np.int64)
+
+        # Rows with a missing group get code -1 and are dropped
+        flat = flat[codes >= 0]
+        counts = np.bincount(flat, minlength=n_groups * 4).reshape(n_groups, 2, 2)
+
+        return cls(uniques.tolist(), counts.astype(np.int64), true_labels is not None)
+
+    @classmethod
+    def from_frame(cls, df, protected_attribute, label_column, favorable_label, true_label_column=None):
+        """Builds a table from DataFrame columns."""
+        true_labels = df[true_label_column].to_numpy() if true_label_column else None
+        return cls.from_arrays(
+            df[protected_attribute].to_numpy(),
+            df[label_column].to_numpy(),
+            favorable_label,
+            true_labels,
+        )
+
+    @classmethod
+    def empty(cls, has_truth=False):
+        return cls([], np.zeros((0, 2, 2), dtype=np.int64), has_truth)
+
+    def merge(self, other):
+        """Returns a new table with the counts of both tables summed per group."""
+        groups = list(self.groups)
+        for group in other.groups:
+            if group not in self._index:
+                groups.append(group)
+
+        counts = np.zeros((len(groups), 2, 2), dtype=np.int64)
+        counts[:len(self.groups)] = self.counts
+        index = {group: i for i, group in enumerate(groups)}
+        for i, group in enumerate(other.groups):
+            counts[index[group]] += other.counts[i]
+
+        return ContingencyTable(groups, counts, self.has_truth and other.has_truth)
+
+    def __add__(self, other):
+        return self.merge(other)
+
+    def group_counts(self, group):
+        """Returns the 2x2 block for a group (zeros if the group never appeared)."""
+        i = self._index.get(group)
+        if i is None:
+            return np.zeros((2, 2), dtype=np.int64)
+        return self.counts[i]
+
+    def metrics(self, privileged_group, unprivileged_group):
+        """
+        Derives all fairness metrics for one privileged/unprivileged pair.
+        Undefined metrics (e.g. an empty group) are returned as None.
+        """
+        values = fairness_metrics(self.group_counts(privileged_group), self.group_counts(unprivileged_group))
+        if not self.has_truth:
+            values = {name: values[name] for name in LABEL_FREE_METRICS}
+
+        return {
+            name: None if np.isnan(value) else float(value)
+            for name, value in values.items()
+        }
+
+    def to_dict(self):
+        """JSON-friendly view of the raw counts per group."""
+        return {
+            str(group): {
+                "count": int(block.sum()),
+                "predicted_positive": int(block[1].sum()),
+                "actual_positive": int(block[:, 1].sum()) if self.has_truth else None,
+                "true_positive": int(block[1, 1]) if self.has_truth else None,
+            }
+            for group, block in zip(self.groups, self.counts)
+        }
+
+
+LABEL_FREE_METRICS = ("disparate_impact", "statistical_parity_difference")
+
+
+def _ratio(numerator, denominator):
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1), np.nan)
+
+
+def fairness_metrics(priv, unpriv):
+    """
+    Vectorized fairness metrics from 2x2 count blocks.
+
+    Args:
+        priv (np.ndarray): Privileged counts, shape (..., 2, 2) as [predicted, true].
+        unpriv (np.ndarray): Unprivileged counts, same shape.
+            Leading axes are broadcast, so a stack of bootstrap resamples
+            can be evaluated in one call.
+
+    Returns:
+        dict: Metric name -> float array of shape (...). NaN marks undefined values.
+    """
+    priv = np.asarray(priv)
+    unpriv = np.asarray(unpriv)
+
+    def rates(block):
+        n = block.sum(axis=(-2, -1))
+        pred_pos = block[..., 1, :].sum(axis=-1)
+        actual_pos = block[..., :, 1].sum(axis=-1)
+        actual_neg = block[..., :, 0].sum(axis=-1)
+        return {
+            "n": n,
+            "positive_rate": _ratio(pred_pos, n),
+            "tpr": _ratio(block[..., 1, 1], actual_pos),
+            "fpr": _ratio(block[..., 1, 0], actual_neg),
+            "ppv": _ratio(block[..., 1, 1], pred_pos),
+        }
+
+    p = rates(priv)
+    u = rates(unpriv)
+
+    # DI = P(Y=1 | unprivileged) / P(Y=1 | privileged); 0.0 when the privileged rate is 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        di = np.where(
+            p["positive_rate"] == 0,
+            0.0,
+            u["positive_rate"] / np.where(p["positive_rate"] == 0, 1, p["positive_rate"]),
+        )
+    di = np.where(np.isnan(p["positive_rate"]) | np.isnan(u["positive_rate"]), np.nan, di)
+
+    eod = u["tpr"] - p["tpr"]
+    fpr_diff = u["fpr"] - p["fpr"]
+
+    return {
+        "disparate_impact": di,
+        "statistical_parity_difference": u["positive_rate"] - p["positive_rate"],
+        "equal_opportunity_difference": eod,
+        "false_positive_rate_difference": fpr_diff,
+        # Equalized odds: the larger of the TPR and FPR gaps (NaN if either is undefined)
+        "equalized_odds_difference": np.maximum(np.abs(eod), np.abs(fpr_diff)),
+        "predictive_parity_difference": u["ppv"] - p["ppv"],
+    }
@@ -1,4 +1,5 @@
 import streamlit as st
+import asyncio
 import sys
 import os
 
@@ -6,13 +7,16 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
 from src.model.blackbox import hr_model
+from src.model.adapters import LocalModelAdapter
 from src.interceptor.twins import ShadowTwinGenerator
 from src.interceptor.detector import BiasDetector
+from src.interceptor.runtime import verify_candidate
 
 # Setup
 st.set_page_config(page_title="Runtime Verification Layer", layout="wide")
 twin_gen = ShadowTwinGenerator()
 bias_detector = BiasDetector()
+model_adapter = LocalModelAdapter(hr_model)
 
 st.title("🛡️ Runtime Verification Layer")
 st.markdown("### Intercepting HR Decisions in Real-Time")
@@ -39,18 +43,9 @@ if submitted:
     }
     
     # --- The Interceptor Logic (Simulating the API) ---
-    original_result = hr_model.predict(input_data)
-    
-    twins = twin_gen.generate_twins(input_data)
-    twins_results = []
-    for twin in twins:
-        res = hr_model.predict(twin)
-        twins_results.append({
-            "twin_data": twin,
-            "prediction": res
-        })
-        
-    bias_report = bias_detector.check_bias(original_result, twins_results)
+    original_result, bias_report = asyncio.run(
+        verify_candidate(model_adapter, twin_gen, bias_detector, input_data)
+    )
     # --------------------------------------------------
 
     with col2:
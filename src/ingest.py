@@ -0,0 +1,198 @@
+import io
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    logging.warning("pyarrow not found. Parquet ingestion will be unavailable.")
+    pq = None
+
+SUPPORTED_FORMATS = ("csv", "json", "jsonl", "parquet")
+
+_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+    "application/vnd.apache.parquet": "parquet",
+    "application/x-parquet": "parquet",
+}
+
+_EXTENSIONS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".json": "json",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+}
+
+
+def infer_format(path):
+    """Infers the file format from its extension."""
+    ext = os.path.splitext(str(path))[1].lower()
+    if ext not in _EXTENSIONS:
+        raise ValueError(f"Cannot infer format of '{path}'. Use one of: {', '.join(SUPPORTED_FORMATS)}")
+    return _EXTENSIONS[ext]
+
+
+def iter_chunks(source, fmt=None, chunksize=100_000, columns=None):
+    """
+    Reads a CSV, JSONL or Parquet source in bounded-size DataFrame chunks.
+
+    Args:
+        source (str | file-like): Path or binary file object.
+        fmt (str): 'csv', 'jsonl' or 'parquet'. Inferred from the path if None.
+        chunksize (int): Rows per chunk.
+        columns (list): Only load these columns (None loads everything).
+
+    Yields:
+        pd.DataFrame: One chunk at a time.
+    """
+    if fmt is None:
+        fmt = infer_format(source)
+
+    if fmt == "csv":
+        yield from pd.read_csv(source, chunksize=chunksize, usecols=columns)
+
+    elif fmt == "jsonl":
+        for chunk in pd.read_json(source, lines=True, chunksize=chunksize):
+            yield chunk[columns] if columns is not None else chunk
+
+    elif fmt == "json":
+        # A JSON document cannot be split safely, so it is parsed in one go
+        df = pd.read_json(source)
+        df = df[columns] if columns is not None else df
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+
+    elif fmt == "parquet":
+        if pq is None:
+            raise RuntimeError("pyarrow is required to read Parquet files")
+        parquet_file = pq.ParquetFile(source)
+        offset = 0
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            chunk = batch.to_pandas()
+            # Keep a continuous row index across batches, like the CSV reader does
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk
+
+    else:
+        raise ValueError(f"Unsupported format '{fmt}'. Use one of: {', '.join(SUPPORTED_FORMATS)}")
+
+
+def _is_record(line):
+    """True if `line` is one JSON object of scalar values (a JSONL row, not a column-oriented frame)."""
+    try:
+        obj = json.loads(line)
+    except ValueError:
+        return False
+    return isinstance(obj, dict) and not any(isinstance(value, (dict, list)) for value in obj.values())
+
+
+def detect_format(head, content_type=None, filename=None):
+    """
+    Detects the upload format from its first bytes, falling back to the
+    declared content type and then the file extension.
+
+    Args:
+        head (bytes): The first few hundred bytes of the file.
+        content_type (str): Declared MIME type, if any.
+        filename (str): Original file name, if any.
+    """
+    if head.startswith(b"PAR1"):
+        return "parquet"
+
+    text = head.lstrip(b"\xef\xbb\xbf \t\r\n")
+    if text.startswith(b"["):
+        return "json"
+    if text.startswith(b"{"):
+        # One object per line is JSONL; a single (column-oriented) object is plain JSON
+        first_line, _, rest = text.partition(b"\n")
+        if first_line.rstrip().endswith(b"}"):
+            if rest.lstrip().startswith(b"{"):
+                return "jsonl"
+            if not rest.strip() and _is_record(first_line):
+                return "jsonl"
+        return "json"
+
+    if content_type:
+        fmt = _CONTENT_TYPES.get(content_type.split(";")[0].strip().lower())
+        if fmt:
+            return fmt
+    if filename:
+        fmt = _EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+        if fmt:
+            return fmt
+    return "csv"
+
+
+def available_columns(fileobj, fmt):
+    """Returns the column names of a seekable file without parsing its body."""
+    position = fileobj.tell()
+    try:
+        if fmt == "parquet":
+            if pq is None:
+                raise RuntimeError("pyarrow is required to read Parquet files")
+            return list(pq.ParquetFile(fileobj).schema_arrow.names)
+        if fmt == "csv":
+            return list(pd.read_csv(fileobj, nrows=0).columns)
+        if fmt == "jsonl":
+            return list(pd.read_json(io.BytesIO(fileobj.readline()), lines=True).columns)
+        return None
+    finally:
+        fileobj.seek(position)
+
+
+def downcast_frame(df):
+    """
+    Shrinks integer columns in place: 0/1 flags become int8, other integers
+    the smallest integer type that fits. Floats are left untouched.
+    """
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_bool_dtype(values):
+            df[column] = values.astype(np.int8)
+        elif pd.api.types.is_integer_dtype(values) and not isinstance(values.dtype, pd.api.extensions.ExtensionDtype):
+            df[column] = pd.to_numeric(values, downcast="integer")
+    return df
+
+
+def iter_upload_chunks(fileobj, content_type=None, filename=None, columns=None, chunksize=100_000):
+    """
+    Streams an uploaded file (any seekable binary file object, e.g. the spooled
+    file behind FastAPI's UploadFile) in downcast DataFrame chunks.
+
+    Args:
+        fileobj: Seekable binary file object positioned at the start.
+        content_type (str): Declared MIME type.
+        filename (str): Original file name.
+        columns (list): Columns to keep if present; missing ones are ignored.
+        chunksize (int): Rows per chunk.
+
+    Returns:
+        tuple: (format, iterator of DataFrame chunks)
+    """
+    head = fileobj.read(512)
+    fileobj.seek(0)
+    fmt = detect_format(head, content_type, filename)
+
+    projected = None
+    if columns is not None:
+        present = available_columns(fileobj, fmt)
+        if present is not None:
+            projected = [c for c in present if c in set(columns)]
+
+    def chunks():
+        for chunk in iter_chunks(fileobj, fmt=fmt, chunksize=chunksize, columns=projected):
+            if columns is not None and projected is None:
+                chunk = chunk[[c for c in chunk.columns if c in set(columns)]]
+            yield downcast_frame(chunk)
+
+    return fmt, chunks()
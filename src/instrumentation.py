@@ -0,0 +1,397 @@
+import bisect
+import collections
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from src.model.adapters import ModelAdapter
+
+logger = logging.getLogger("instrumentation")
+
+# Seconds; covers sub-millisecond stages up to long audits
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+ROW_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms aggregated per thread.
+
+    Each thread updates only its own shard (a plain dict reached through
+    `threading.local`), so recording never takes a lock or contends with other
+    threads. Shards are merged only when /metrics is scraped. Every uvicorn
+    worker process has its own registry; scrape each worker (or label them) for
+    a fleet view.
+    """
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._shards = []
+        self._local = threading.local()
+        self._lock = threading.Lock()  # only for registration, never on the hot path
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def counter(self, name, documentation, labels=()):
+        return self._register(Counter(self, name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(self, name, documentation, labels, buckets))
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric '{metric.name}' is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def register_collector(self, collect):
+        """
+        Adds a callable evaluated at scrape time, returning
+        [(name, type, documentation, [(labels dict, value), ...])]. Used to export
+        counters that already exist elsewhere (e.g. cache stats) at zero hot-path cost.
+        """
+        with self._lock:
+            self._collectors.append(collect)
+
+    def _merged(self):
+        with self._lock:
+            shards = list(self._shards)
+        merged = {}
+        for shard in shards:
+            # Copy first; the owning thread may insert keys concurrently
+            for key, value in list(shard.items()):
+                if isinstance(value, list):
+                    total = merged.setdefault(key, [0] * len(value))
+                    for i, v in enumerate(value):
+                        total[i] += v
+                else:
+                    merged[key] = merged.get(key, 0) + value
+        return merged
+
+    def snapshot(self):
+        """Merged values as {metric name: {labels tuple: value or histogram dict}}."""
+        out = {name: {} for name in self._metrics}
+        for (name, labels), value in self._merged().items():
+            metric = self._metrics[name]
+            out[name][labels] = metric.summarize(value) if isinstance(metric, Histogram) else value
+        return out
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        merged = self._merged()
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for (key_name, labels), value in sorted(merged.items(), key=lambda item: item[0]):
+                if key_name == name:
+                    lines.extend(metric.render(labels, value))
+
+        for collect in list(self._collectors):
+            try:
+                families = collect()
+            except Exception as e:
+                logger.error(f"Metrics collector failed: {e}")
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(tuple(sorted(labels.items())))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_value(value):
+    if value is None:
+        return "NaN"
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for k, v in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, registry, name, documentation, labels):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+
+    def _key(self, labels):
+        return (self.name, tuple((k, labels[k]) for k in self.labels))
+
+    def inc(self, value=1, **labels):
+        shard = self.registry._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + value
+
+    def render(self, labels, value):
+        return [f"{self.name}{_format_labels(labels)} {_format_value(value)}"]
+
+
+class Histogram:
+    """Fixed-bucket histogram; a shard entry is [bucket counts..., +Inf count, sum]."""
+    type = "histogram"
+
+    def __init__(self, registry, name, documentation, labels, buckets):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+
+    def _key(self, labels):
+        return (self.name, tuple((k, labels[k]) for k in self.labels))
+
+    def observe(self, value, **labels):
+        shard = self.registry._shard()
+        key = self._key(labels)
+        entry = shard.get(key)
+        if entry is None:
+            entry = shard[key] = [0] * (len(self.buckets) + 2)
+        entry[bisect.bisect_left(self.buckets, value)] += 1
+        entry[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the wall-clock duration of the `with` block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def summarize(self, entry):
+        count = sum(entry[:-1])
+        return {
+            "count": count,
+            "sum": entry[-1],
+            "mean": entry[-1] / count if count else 0.0,
+            "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], entry[:-1])),
+        }
+
+    def render(self, labels, entry):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(list(self.buckets) + [float("inf")], entry[:-1]):
+            cumulative += count
+            le = "+Inf" if math.isinf(bound) else repr(float(bound))
+            lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(float(entry[-1]))}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+REGISTRY = MetricsRegistry()
+
+# Runtime verification layer
+STAGE_SECONDS = REGISTRY.histogram(
+    "bias_verification_stage_seconds", "Time spent per verification stage.", labels=("stage",))
+MODEL_CALLS = REGISTRY.counter(
+    "bias_model_calls_total", "Calls made to the underlying model.", labels=("method",))
+MODEL_ROWS = REGISTRY.counter(
+    "bias_model_rows_total", "Rows scored by the underlying model.")
+TWINS_GENERATED = REGISTRY.counter(
+    "bias_twins_generated_total", "Shadow twins generated.", labels=("twin_type",))
+TWINS_SKIPPED = REGISTRY.counter(
+    "bias_twins_skipped_total", "Shadow twins not sent to the model by adaptive sampling.", labels=("twin_type",))
+BIAS_FLAGS = REGISTRY.counter(
+    "bias_flags_total", "Twins that flipped the decision or diverged in probability.",
+    labels=("twin_type", "reason"))
+VERIFICATIONS = REGISTRY.counter(
+    "bias_verifications_total", "Candidates verified.", labels=("bias_detected",))
+SHADOW_EVENTS = REGISTRY.counter(
+    "bias_shadow_verifications_total", "Shadow-mode verifications by outcome.", labels=("outcome",))
+SHADOW_QUEUE_SECONDS = REGISTRY.histogram(
+    "bias_shadow_queue_wait_seconds", "Time shadow verifications wait in the queue.")
+
+# Dashboard API
+AUDIT_SECONDS = REGISTRY.histogram(
+    "bias_audit_duration_seconds", "Duration of audit runs.", labels=("kind",))
+AUDIT_ROWS = REGISTRY.histogram(
+    "bias_audit_rows", "Rows processed per audit run.", labels=("kind",), buckets=ROW_BUCKETS)
+SCREEN_SECONDS = REGISTRY.histogram(
+    "bias_screen_duration_seconds", "Duration of screening checks.")
+SCREEN_ROWS = REGISTRY.histogram(
+    "bias_screen_rows", "Rows per screened batch.", buckets=ROW_BUCKETS)
+
+
+def record_twins(twins):
+    for twin in twins:
+        TWINS_GENERATED.inc(twin_type=twin.get("twin_type", "unknown"))
+
+
+def record_verification(check):
+    """Counts verification outcomes and flagged twins by twin_type from a BiasCheckResult."""
+    detected = int(check.bias_detected.sum())
+    if detected:
+        VERIFICATIONS.inc(detected, bias_detected="true")
+    if check.n_candidates - detected:
+        VERIFICATIONS.inc(check.n_candidates - detected, bias_detected="false")
+    for (twin_type, reason), count in check.flag_counts().items():
+        BIAS_FLAGS.inc(count, twin_type=twin_type, reason=reason)
+
+
+class InstrumentedModelAdapter(ModelAdapter):
+    """
+    Counts and times the calls that actually reach the model.
+    Wrap the base adapter with it (inside any batcher or cache), so cache hits
+    and coalesced rows are not counted as model calls.
+    """
+    def __init__(self, adapter):
+        self.adapter = adapter
+        self.deterministic = getattr(adapter, 'deterministic', False)
+
+    async def predict(self, data: dict):
+        MODEL_CALLS.inc(method="predict")
+        MODEL_ROWS.inc()
+        with STAGE_SECONDS.time(stage="model_call"):
+            return await self.adapter.predict(data)
+
+    async def predict_batch(self, rows: list):
+        MODEL_CALLS.inc(method="predict_batch")
+        MODEL_ROWS.inc(len(rows))
+        with STAGE_SECONDS.time(stage="model_call"):
+            return await self.adapter.predict_batch(rows)
+
+    async def close(self):
+        await self.adapter.close()
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler that can be switched on at runtime for a fixed window.
+
+    A background thread snapshots every thread's Python stack (`sys._current_frames`)
+    every `interval` seconds and counts collapsed stacks. Nothing is hooked into
+    the interpreter, so it costs nothing while idle and little while running.
+    Results are in the folded format understood by flamegraph tools.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stacks = collections.Counter()
+        self._status = {"state": "idle"}
+
+    def start(self, seconds=10.0, interval=0.005, max_depth=64):
+        """Starts a profiling window. Returns False if one is already running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._stacks = collections.Counter()
+            self._status = {"state": "running", "started": time.time(), "seconds": seconds,
+                            "interval": interval, "samples": 0}
+            self._thread = threading.Thread(
+                target=self._run, args=(seconds, interval, max_depth), name="sampling-profiler", daemon=True
+            )
+            self._thread.start()
+        logger.info(f"Sampling profiler started for {seconds}s at {interval * 1000:.1f}ms intervals")
+        return True
+
+    def _run(self, seconds, interval, max_depth):
+        own = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        samples = 0
+        while time.monotonic() < deadline:
+            sweep = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                sweep.append(";".join(reversed(stack)))
+            # One short critical section per sweep; readers copy under the same lock
+            with self._lock:
+                self._stacks.update(sweep)
+            samples += 1
+            time.sleep(interval)
+        with self._lock:
+            self._status.update(state="finished", finished=time.time(), samples=samples)
+
+    def status(self):
+        with self._lock:
+            return dict(self._status)
+
+    def _snapshot(self):
+        with self._lock:
+            return collections.Counter(self._stacks)
+
+    def folded(self):
+        """Collapsed stacks, one 'frame;frame;frame count' line each."""
+        return "\n".join(f"{stack} {count}" for stack, count in self._snapshot().most_common())
+
+    def top(self, limit=25):
+        """Functions by self samples (innermost frame)."""
+        stacks = self._snapshot()
+        leaves = collections.Counter()
+        total = sum(stacks.values())
+        for stack, count in stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return [
+            {"frame": frame, "samples": count, "share": count / total if total else 0.0}
+            for frame, count in leaves.most_common(limit)
+        ]
+
+
+profiler = SamplingProfiler()
+
+# /metrics and the profiler endpoints, shared by both FastAPI apps
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+def _profiler_enabled():
+    if os.environ.get("ENABLE_PROFILER", "0") != "1":
+        raise HTTPException(status_code=404, detail="Profiler is disabled (set ENABLE_PROFILER=1).")
+
+
+@router.post("/debug/profile")
+def start_profile(seconds: float = 10.0, interval_ms: float = 5.0):
+    """Profiles every thread of this worker for `seconds` (max 300)."""
+    _profiler_enabled()
+    if not 0 < seconds <= 300 or interval_ms < 1:
+        raise HTTPException(status_code=400, detail="seconds must be in (0, 300] and interval_ms >= 1")
+    if not profiler.start(seconds, interval_ms / 1000):
+        raise HTTPException(status_code=409, detail="A profiling window is already running.")
+    return profiler.status()
+
+
+@router.get("/debug/profile")
+def get_profile(format: str = "json", limit: int = 25):
+    """Latest profile: top frames as JSON, or format=folded for flamegraph tools."""
+    _profiler_enabled()
+    if format == "folded":
+        return PlainTextResponse(profiler.folded())
+    return {**profiler.status(), "top": profiler.top(limit)}
@@ -0,0 +1,280 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from src.interceptor.detector import DECISION_FLIP, FLAG_NAMES, PROBABILITY_DIVERGENCE
+
+logger = logging.getLogger("decision_log")
+
+_FLAG_BITS = {name: bit for bit, name in FLAG_NAMES.items()}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    id INTEGER PRIMARY KEY,
+    request_id TEXT,
+    ts REAL NOT NULL,
+    age INTEGER,
+    experience INTEGER,
+    education INTEGER,
+    gender INTEGER,
+    hiring_probability REAL,
+    decision INTEGER,
+    bias_detected INTEGER
+);
+CREATE TABLE IF NOT EXISTS twin_results (
+    decision_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    twin_type TEXT NOT NULL,
+    hiring_probability REAL,
+    decision INTEGER,
+    flipped INTEGER,
+    divergent INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_decisions_request ON decisions(request_id);
+CREATE INDEX IF NOT EXISTS idx_twin_results_decision ON twin_results(decision_id);
+CREATE TABLE IF NOT EXISTS decision_buckets (
+    bucket_start INTEGER PRIMARY KEY,
+    requests INTEGER NOT NULL,
+    positive INTEGER NOT NULL,
+    bias_detected INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS twin_buckets (
+    bucket_start INTEGER NOT NULL,
+    twin_type TEXT NOT NULL,
+    twins INTEGER NOT NULL,
+    flips INTEGER NOT NULL,
+    divergent INTEGER NOT NULL,
+    PRIMARY KEY (bucket_start, twin_type)
+);
+"""
+
+
+class DecisionLog:
+    """
+    Append-only SQLite (WAL mode) log of every verification result.
+
+    Requests only enqueue a record; a background thread writes batches in one
+    transaction and maintains per-time-bucket counters, so windowed queries
+    such as "flip rate by twin_type in the last hour" read a handful of
+    pre-aggregated rows instead of rescanning raw decisions.
+    """
+    def __init__(self, path, bucket_seconds=60, divergence_threshold=0.1, max_queue=10000,
+                 batch_size=500, flush_interval=0.5):
+        """
+        Args:
+            path (str): SQLite database file.
+            bucket_seconds (int): Width of the pre-aggregated time buckets.
+            divergence_threshold (float): Probability gap counted as divergent for reports
+                without structured 'flags'; otherwise the detector's flags (and its
+                per-twin-type thresholds) are stored as they are.
+            max_queue (int): Records buffered before new ones are dropped.
+            batch_size (int): Maximum records per write transaction.
+            flush_interval (float): Longest a record waits before being written.
+        """
+        self.path = path
+        self.bucket_seconds = bucket_seconds
+        self.divergence_threshold = divergence_threshold
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+        self._thread = threading.Thread(target=self._run, name="decision-log-writer", daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def record(self, profile, original_result, twins_results, bias_report, request_id=None):
+        """Queues one verification result. Never blocks; drops the record if the queue is full."""
+        try:
+            self._queue.put_nowait((time.time(), request_id, profile, original_result, twins_results,
+                                    bool(bias_report.get("bias_detected")), bias_report.get("flags")))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _run(self):
+        while not self._stop.is_set() or not self._queue.empty():
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                logger.error(f"Decision log write failed ({len(batch)} records): {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _twin_flags(self, original, twins_results, flags):
+        """(flipped, divergent) per twin: from the report's structured flags, else recomputed."""
+        if flags is not None:
+            bits = [0] * len(twins_results)
+            for entry in flags:
+                for name in entry["flags"]:
+                    bits[entry["twin"]] |= _FLAG_BITS[name]
+            return [(int(bool(b & DECISION_FLIP)), int(bool(b & PROBABILITY_DIVERGENCE))) for b in bits]
+        return [
+            (int(item["prediction"]["decision"] != original["decision"]),
+             int(abs(item["prediction"]["hiring_probability"] - original["hiring_probability"])
+                 > self.divergence_threshold))
+            for item in twins_results
+        ]
+
+    def _write(self, batch):
+        decision_buckets = defaultdict(lambda: [0, 0, 0])
+        twin_buckets = defaultdict(lambda: [0, 0, 0])
+
+        conn = self._connect()
+        try:
+            with conn:
+                for ts, request_id, profile, original, twins_results, bias_detected, flags in batch:
+                    bucket = int(ts // self.bucket_seconds) * self.bucket_seconds
+                    cursor = conn.execute(
+                        "INSERT INTO decisions (request_id, ts, age, experience, education, gender, "
+                        "hiring_probability, decision, bias_detected) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (request_id, ts, profile.get("age"), profile.get("experience"), profile.get("education"),
+                         profile.get("gender"), original["hiring_probability"], original["decision"],
+                         int(bias_detected)),
+                    )
+                    counters = decision_buckets[bucket]
+                    counters[0] += 1
+                    counters[1] += int(original["decision"] == 1)
+                    counters[2] += int(bias_detected)
+
+                    twin_rows = []
+                    for item, (flipped, divergent) in zip(twins_results,
+                                                          self._twin_flags(original, twins_results, flags)):
+                        twin_type = item["twin_data"].get("twin_type", "unknown")
+                        prediction = item["prediction"]
+                        twin_rows.append((cursor.lastrowid, ts, twin_type, prediction["hiring_probability"],
+                                          prediction["decision"], flipped, divergent))
+                        counters = twin_buckets[(bucket, twin_type)]
+                        counters[0] += 1
+                        counters[1] += flipped
+                        counters[2] += divergent
+                    conn.executemany("INSERT INTO twin_results VALUES (?, ?, ?, ?, ?, ?, ?)", twin_rows)
+
+                conn.executemany(
+                    "INSERT INTO decision_buckets VALUES (?, ?, ?, ?) ON CONFLICT(bucket_start) DO UPDATE SET "
+                    "requests = requests + excluded.requests, positive = positive + excluded.positive, "
+                    "bias_detected = bias_detected + excluded.bias_detected",
+                    [(bucket, *counters) for bucket, counters in decision_buckets.items()],
+                )
+                conn.executemany(
+                    "INSERT INTO twin_buckets VALUES (?, ?, ?, ?, ?) ON CONFLICT(bucket_start, twin_type) DO UPDATE SET "
+                    "twins = twins + excluded.twins, flips = flips + excluded.flips, "
+                    "divergent = divergent + excluded.divergent",
+                    [(bucket, twin_type, *counters) for (bucket, twin_type), counters in twin_buckets.items()],
+                )
+        finally:
+            conn.close()
+        self.written += len(batch)
+
+    def _since(self, window_seconds):
+        # Include the partially elapsed bucket that contains the window start
+        start = time.time() - window_seconds
+        return int(start // self.bucket_seconds) * self.bucket_seconds
+
+    def flip_rate_by_twin_type(self, window_seconds=3600):
+        """Flip and divergence rates per twin type over the last `window_seconds` (bucket resolution)."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT twin_type, SUM(twins), SUM(flips), SUM(divergent) FROM twin_buckets "
+                "WHERE bucket_start >= ? GROUP BY twin_type",
+                (self._since(window_seconds),),
+            ).fetchall()
+        finally:
+            conn.close()
+
+        return {
+            twin_type: {
+                "twins": twins,
+                "flips": flips,
+                "flip_rate": flips / twins if twins else 0.0,
+                "divergence_rate": divergent / twins if twins else 0.0
+            }
+            for twin_type, twins, flips, divergent in rows
+        }
+
+    def summary(self, window_seconds=3600):
+        """Request counts, positive rate and bias-detected rate over the window."""
+        conn = self._connect()
+        try:
+            requests, positive, bias_detected = conn.execute(
+                "SELECT COALESCE(SUM(requests), 0), COALESCE(SUM(positive), 0), COALESCE(SUM(bias_detected), 0) "
+                "FROM decision_buckets WHERE bucket_start >= ?",
+                (self._since(window_seconds),),
+            ).fetchone()
+        finally:
+            conn.close()
+
+        return {
+            "window_seconds": window_seconds,
+            "requests": requests,
+            "positive_rate": positive / requests if requests else 0.0,
+            "bias_detected_rate": bias_detected / requests if requests else 0.0,
+            "queued": self._queue.qsize(),
+            "dropped": self.dropped
+        }
+
+    def lookup(self, request_id):
+        """The logged verification for one request id, or None if it has not been written."""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT id, ts, hiring_probability, decision, bias_detected FROM decisions WHERE request_id = ? "
+                "ORDER BY id DESC LIMIT 1",
+                (request_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            twins = conn.execute(
+                "SELECT twin_type, hiring_probability, decision, flipped, divergent FROM twin_results "
+                "WHERE decision_id = ?",
+                (row[0],),
+            ).fetchall()
+        finally:
+            conn.close()
+
+        return {
+            "request_id": request_id,
+            "ts": row[1],
+            "model_decision": {"hiring_probability": row[2], "decision": row[3]},
+            "bias_detected": bool(row[4]),
+            "twins": [
+                {"twin_type": twin_type, "hiring_probability": probability, "decision": decision,
+                 "flipped": bool(flipped), "divergent": bool(divergent)}
+                for twin_type, probability, decision, flipped, divergent in twins
+            ],
+        }
+
+    def flush(self, timeout=5.0):
+        """Waits until every queued record has been written (best effort)."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=10)
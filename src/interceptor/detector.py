@@ -1,35 +1,183 @@
+import numpy as np
+import pandas as pd
+
+# Flag bits per (original, twin) pair
+DECISION_FLIP = 1          # Hard bias: the twin got a different decision
+PROBABILITY_DIVERGENCE = 2  # Soft bias: hiring probabilities differ by more than the threshold
+FLAG_NAMES = {DECISION_FLIP: "decision_flip", PROBABILITY_DIVERGENCE: "probability_divergence"}
+
+
+class BiasCheckResult:
+    """
+    Flags for a batch of (original, twin) pairs, kept as arrays.
+
+    `flags` holds one uint8 bit field per twin (DECISION_FLIP | PROBABILITY_DIVERGENCE),
+    `owner` the index of the candidate each twin belongs to. Structured codes and
+    human-readable reasons are only built when asked for, per candidate.
+    """
+    def __init__(self, flags, divergence, thresholds, twin_type, owner, original_decision, twin_decision, n_candidates):
+        self.flags = flags
+        self.divergence = divergence
+        self.thresholds = thresholds
+        self.twin_type = twin_type
+        self.owner = owner
+        self.original_decision = original_decision
+        self.twin_decision = twin_decision
+        self.n_candidates = n_candidates
+        # Twins are usually grouped by candidate; the offsets make per-candidate slicing O(1)
+        self._order = None if len(owner) < 2 or np.all(owner[1:] >= owner[:-1]) else np.argsort(owner, kind="stable")
+        sorted_owner = owner if self._order is None else owner[self._order]
+        self._offsets = np.searchsorted(sorted_owner, np.arange(n_candidates + 1))
+
+    @property
+    def bias_detected(self):
+        """(n_candidates,) bool: any twin of the candidate was flagged."""
+        detected = np.zeros(self.n_candidates, dtype=bool)
+        detected[self.owner[self.flags != 0]] = True
+        return detected
+
+    def twins_of(self, candidate):
+        """Indices of the twins of one candidate, in input order."""
+        start, end = self._offsets[candidate], self._offsets[candidate + 1]
+        if self._order is None:
+            return np.arange(start, end)
+        return self._order[start:end]
+
+    def codes(self, candidate):
+        """
+        Structured flags of one candidate, flagged twins only:
+        [{'twin' (position among the candidate's twins), 'twin_type', 'flags', 'divergence', 'threshold'}].
+        """
+        out = []
+        for position, i in enumerate(self.twins_of(candidate)):
+            if not self.flags[i]:
+                continue
+            out.append({
+                "twin": position,
+                "twin_type": str(self.twin_type[i]),
+                "flags": [name for bit, name in FLAG_NAMES.items() if self.flags[i] & bit],
+                "divergence": round(float(self.divergence[i]), 6),
+                "threshold": float(self.thresholds[i]),
+            })
+        return out
+
+    def reasons(self, candidate):
+        """Human-readable reasons for one candidate (the original check_bias wording)."""
+        reasons = []
+        for i in self.twins_of(candidate):
+            twin_type = self.twin_type[i]
+            if self.flags[i] & DECISION_FLIP:
+                reasons.append(f"Decision flipped when {twin_type} was tested. "
+                               f"Original: {self.original_decision[self.owner[i]]}, Twin: {self.twin_decision[i]}")
+            if self.flags[i] & PROBABILITY_DIVERGENCE:
+                reasons.append(f"High probability divergence ({self.divergence[i]:.2f}) for {twin_type}.")
+        return reasons
+
+    def flag_counts(self):
+        """{(twin_type, flag name): flagged twins} over the whole batch."""
+        counts = {}
+        for bit, name in FLAG_NAMES.items():
+            hit = (self.flags & bit) != 0
+            if hit.any():
+                for twin_type, count in pd.Series(self.twin_type[hit]).value_counts().items():
+                    counts[(twin_type, name)] = int(count)
+        return counts
+
+    def report(self, candidate, twins_results=None, text=True):
+        """
+        Verification report for one candidate.
+
+        Args:
+            candidate (int): Candidate index.
+            twins_results (list): Twin dicts to embed as 'twin_details' (omitted when None).
+            text (bool): Include the human-readable 'reasons'.
+        """
+        report = {"bias_detected": bool(self.flags[self.twins_of(candidate)].any()), "flags": self.codes(candidate)}
+        if text:
+            report["reasons"] = self.reasons(candidate)
+        if twins_results is not None:
+            report["twin_details"] = twins_results
+        return report
+
+
 class BiasDetector:
-    def __init__(self, probability_threshold=0.1):
+    def __init__(self, probability_threshold=0.1, twin_type_thresholds=None):
+        """
+        Args:
+            probability_threshold (float): Probability divergence flagged as soft bias.
+            twin_type_thresholds (dict): Per twin_type overrides of `probability_threshold`,
+                e.g. {'gender_flip': 0.05}.
+        """
         self.probability_threshold = probability_threshold
+        self.twin_type_thresholds = dict(twin_type_thresholds or {})
+
+    def threshold_for(self, twin_type):
+        return self.twin_type_thresholds.get(twin_type, self.probability_threshold)
 
-    def check_bias(self, original_result: dict, twins_results: list):
+    def check_batch(self, original_probability, original_decision, twin_probability, twin_decision,
+                    twin_type=None, owner=None):
         """
-        Compares original result with twins results.
-        Returns a report dictionary.
+        Flags many (original, twin) pairs at once.
+
+        Args:
+            original_probability (array): Hiring probability per candidate, shape (n,).
+            original_decision (array): Decision per candidate, shape (n,).
+            twin_probability (array): Hiring probability per twin, shape (m,).
+            twin_decision (array): Decision per twin, shape (m,).
+            twin_type (array): twin_type per twin (default 'unknown').
+            owner (array): Candidate index per twin (default: twin i belongs to candidate i).
+
+        Returns:
+            BiasCheckResult
         """
-        bias_detected = False
-        reasons = []
+        original_probability = np.asarray(original_probability, dtype=float)
+        original_decision = np.asarray(original_decision)
+        twin_probability = np.asarray(twin_probability, dtype=float)
+        twin_decision = np.asarray(twin_decision)
+        m = len(twin_probability)
+        owner = np.arange(m) if owner is None else np.asarray(owner, dtype=np.intp)
+        twin_type = np.full(m, "unknown", dtype=object) if twin_type is None else np.asarray(twin_type, dtype=object)
+
+        if self.twin_type_thresholds:
+            # One dict lookup per distinct twin_type, not per twin
+            codes, uniques = pd.factorize(twin_type)
+            thresholds = np.array([self.threshold_for(t) for t in uniques], dtype=float)[codes]
+        else:
+            thresholds = np.full(m, self.probability_threshold)
+
+        divergence = np.abs(original_probability[owner] - twin_probability)
+        flags = np.where(original_decision[owner] != twin_decision, DECISION_FLIP, 0).astype(np.uint8)
+        flags |= np.where(divergence > thresholds, PROBABILITY_DIVERGENCE, 0).astype(np.uint8)
 
-        for twin_res in twins_results:
-            twin_data = twin_res['twin_data']
-            twin_prediction = twin_res['prediction']
-            twin_type = twin_data.get('twin_type', 'unknown')
-
-            # Check 1: Decision Flip (Hard Bias)
-            if original_result['decision'] != twin_prediction['decision']:
-                bias_detected = True
-                reasons.append(f"Decision flipped when {twin_type} was tested. Original: {original_result['decision']}, Twin: {twin_prediction['decision']}")
-
-            # Check 2: Probability deviation (Soft Bias)
-            # e.g., if a woman has 45% chance and man has 80% chance, even if both are '0' (rejected), that's a big gap.
-            prob_diff = abs(original_result['hiring_probability'] - twin_prediction['hiring_probability'])
-            if prob_diff > self.probability_threshold:
-                 # Only flag if not already flagged by decision flip to avoid redundancy, or flag as additional info
-                 reasons.append(f"High probability divergence ({prob_diff:.2f}) for {twin_type}.")
-                 bias_detected = True
-
-        return {
-            "bias_detected": bias_detected,
-            "reasons": reasons,
-            "twin_details": twins_results
-        }
+        return BiasCheckResult(flags, divergence, thresholds, twin_type, owner,
+                               original_decision, twin_decision, len(original_probability))
+
+    def check_results(self, original_results, twins_results, owner):
+        """
+        check_batch over prediction dicts.
+
+        Args:
+            original_results (list): Original predictions, one per candidate.
+            twins_results (list): {'twin_data', 'prediction'} per twin.
+            owner (list): Candidate index per twin.
+        """
+        return self.check_batch(
+            [res['hiring_probability'] for res in original_results],
+            [res['decision'] for res in original_results],
+            [item['prediction']['hiring_probability'] for item in twins_results],
+            [item['prediction']['decision'] for item in twins_results],
+            [item['twin_data'].get('twin_type', 'unknown') for item in twins_results],
+            owner,
+        )
+
+    def check_bias(self, original_result: dict, twins_results: list, text=False, include_details=False):
+        """
+        Compares original result with twins results.
+        Returns a report dictionary with the structured 'flags'.
+
+        Args:
+            text (bool): Include the human-readable 'reasons'.
+            include_details (bool): Embed the twins and their predictions as 'twin_details'.
+        """
+        result = self.check_results([original_result], twins_results, np.zeros(len(twins_results), dtype=np.intp))
+        return result.report(0, twins_results if include_details else None, text=text)
@@ -0,0 +1,261 @@
+import json
+import logging
+import os
+
+import numpy as np
+
+try:
+    import yaml
+except ImportError:
+    logging.warning("PyYAML not found. Twin policies must be written in JSON.")
+    yaml = None
+
+logger = logging.getLogger("policy")
+
+# Reproduces the original hardcoded twins: a binary gender flip, and an age
+# jump to 35 for candidates over 50 or to 55 otherwise. Gender codes outside
+# {0, 1} still get a gender twin (at 0) instead of none.
+DEFAULT_POLICY = {
+    "max_twins_per_request": None,
+    "rules": [
+        {"name": "gender_flip", "type": "swap", "attribute": "gender", "values": [0, 1], "otherwise": 0},
+        {
+            "name": "age",
+            "type": "threshold",
+            "attribute": "age",
+            "threshold": 50,
+            "above": {"value": 35, "twin_type": "age_younger"},
+            "below": {"value": 55, "twin_type": "age_older"},
+        },
+    ],
+}
+
+RULE_TYPES = ("swap", "map", "categorical", "threshold", "sweep", "combined")
+
+
+def load_policy(path):
+    """Reads a twin policy from a .json, .yaml or .yml file."""
+    with open(path) as f:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise RuntimeError("PyYAML is required to read YAML twin policies")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+class TwinVariant:
+    """
+    One compiled perturbation: which rows it applies to, the replacement
+    column values and the twin_type label, all computed on whole columns.
+
+    `apply(columns, n)` returns (mask (n,), {column: new values (n,)}, twin_type
+    as a string or an (n,) object array).
+    """
+    def __init__(self, name, attributes, apply):
+        self.name = name
+        self.attributes = tuple(attributes)
+        self._apply = apply
+
+    def applicable(self, columns):
+        return all(attribute in columns for attribute in self.attributes)
+
+    def apply(self, columns, n):
+        return self._apply(columns, n)
+
+
+def _holds(dtype, value):
+    try:
+        return bool(np.array(value).astype(dtype) == value)
+    except (TypeError, ValueError, OverflowError):
+        return False
+
+
+def twin_dtype(values, targets):
+    """
+    Dtype for twin values of a column: the column's own dtype if it holds every
+    target unchanged, else the numeric promotion (e.g. int -> float for 37.5),
+    else object (strings longer than the column's, mixed types).
+    """
+    if all(_holds(values.dtype, target) for target in targets):
+        return values.dtype
+    if values.dtype.kind in "iufb" and all(isinstance(t, (bool, int, float, np.number)) for t in targets):
+        return np.result_type(values.dtype, *(np.asarray(target).dtype for target in targets))
+    return np.dtype(object)
+
+
+def _compile_map(rule, pairs):
+    attribute, name = rule["attribute"], rule["name"]
+    otherwise = rule.get("otherwise")
+    targets = [target for _, target in pairs] + ([otherwise] if otherwise is not None else [])
+    warned = []
+
+    def apply(columns, n):
+        values = columns[attribute]
+        # One comparison per mapped value (mappings are small; candidates are many)
+        hits = [values == source for source, _ in pairs]
+        new = values.astype(twin_dtype(values, targets))
+        for hit, (_, target) in zip(hits, pairs):
+            new[hit] = target
+        mask = np.logical_or.reduce(hits) if hits else np.zeros(n, dtype=bool)
+        if otherwise is not None:
+            # Values outside the mapping are twinned to the fallback (unless already there)
+            outside = ~mask & (values != otherwise)
+            new[outside] = otherwise
+            mask |= outside
+        elif not mask.all() and not warned:
+            # Rows outside the mapping keep their value and are masked out
+            warned.append(True)
+            logger.warning(f"Twin rule '{name}': {attribute} values outside "
+                           f"{sorted({source for source, _ in pairs})} get no twin; set 'otherwise' to twin them")
+        return mask, {attribute: new}, name
+
+    return [TwinVariant(name, [attribute], apply)]
+
+
+def _compile_categorical(rule):
+    attribute = rule["attribute"]
+    template = rule.get("twin_type", rule["name"] + "_{value}")
+    domain = list(rule["values"])
+    variants = []
+    for value in domain:
+        def apply(columns, n, value=value):
+            values = columns[attribute]
+            in_domain = np.logical_or.reduce([values == v for v in domain])
+            mask = in_domain & (values != value)
+            new = np.full(n, value, dtype=twin_dtype(values, [value]))
+            return mask, {attribute: new}, template.format(value=value)
+        variants.append(TwinVariant(template.format(value=value), [attribute], apply))
+    return variants
+
+
+def _compile_threshold(rule):
+    attribute, threshold = rule["attribute"], rule["threshold"]
+    above, below = rule["above"], rule["below"]
+
+    def apply(columns, n):
+        values = columns[attribute]
+        is_above = values > threshold
+        new = np.full(n, below["value"], dtype=twin_dtype(values, [above["value"], below["value"]]))
+        new[is_above] = above["value"]
+        names = np.where(is_above, above["twin_type"], below["twin_type"]).astype(object)
+        return np.ones(n, dtype=bool), {attribute: new}, names
+
+    return [TwinVariant(rule["name"], [attribute], apply)]
+
+
+def _compile_sweep(rule):
+    attribute = rule["attribute"]
+    template = rule.get("twin_type", rule["name"] + "_{value}")
+    min_distance = rule.get("min_distance", 0)
+    variants = []
+    for value in rule["values"]:
+        def apply(columns, n, value=value):
+            values = columns[attribute]
+            # Skip targets the candidate is already at (or within min_distance of)
+            mask = np.abs(values - value) > min_distance if min_distance else values != value
+            new = np.full(n, value, dtype=twin_dtype(values, [value]))
+            return mask, {attribute: new}, template.format(value=value)
+        variants.append(TwinVariant(template.format(value=value), [attribute], apply))
+    return variants
+
+
+def _compile_combined(rule, compiled):
+    parts = []
+    for component in rule["rules"]:
+        if component not in compiled:
+            raise ValueError(f"Combined rule '{rule['name']}' refers to unknown rule '{component}' "
+                             f"(components must be defined earlier)")
+        if len(compiled[component]) != 1:
+            raise ValueError(f"Combined rule '{rule['name']}': component '{component}' must produce "
+                             f"exactly one twin per candidate")
+        parts.append(compiled[component][0])
+
+    attributes = [a for part in parts for a in part.attributes]
+    if len(set(attributes)) != len(attributes):
+        raise ValueError(f"Combined rule '{rule['name']}' perturbs the same attribute twice")
+
+    def apply(columns, n):
+        mask = np.ones(n, dtype=bool)
+        perturbed = {}
+        names = None
+        for part in parts:
+            part_mask, part_columns, part_name = part.apply(columns, n)
+            mask &= part_mask
+            perturbed.update(part_columns)
+            part_name = np.broadcast_to(np.asarray(part_name, dtype=object), (n,))
+            names = part_name if names is None else names + "+" + part_name
+        if "twin_type" in rule:
+            names = rule["twin_type"]
+        return mask, perturbed, names
+
+    return [TwinVariant(rule["name"], attributes, apply)]
+
+
+class TwinPolicy:
+    """
+    Declarative twin policy compiled into vectorized perturbation plans.
+
+    Rules (in priority order; earlier rules win when the budget is tight):
+        swap         {'attribute', 'values': [a, b]}              a <-> b
+        map          {'attribute', 'mapping': [[from, to], ...]}  explicit value mapping
+                     (swap and map take an optional 'otherwise': the twin value for
+                     values outside the mapping, which otherwise get no twin)
+        categorical  {'attribute', 'values': [...]}                one twin per other value
+        threshold    {'attribute', 'threshold', 'above': {'value', 'twin_type'}, 'below': {...}}
+        sweep        {'attribute', 'values': [...], 'min_distance'}  e.g. age-band sweeps
+        combined     {'rules': [rule names]}                      intersectional twin applying
+                                                                  several single-twin rules at once
+    Every rule has a unique 'name' (the default twin_type, or its prefix for
+    multi-twin rules as '<name>_<value>'; override with a 'twin_type' template)
+    and may set "enabled": false.
+
+    Compilation happens once; generating twins for a batch then costs one set
+    of array operations per variant, independent of the number of candidates.
+    """
+    def __init__(self, policy=None):
+        """
+        Args:
+            policy (dict | str): Policy dict, or the path of a JSON / YAML file.
+                Defaults to DEFAULT_POLICY.
+        """
+        if policy is None:
+            policy = DEFAULT_POLICY
+        elif isinstance(policy, (str, os.PathLike)):
+            policy = load_policy(str(policy))
+
+        self.max_twins_per_request = policy.get("max_twins_per_request")
+        self.variants = []
+        compiled = {}
+        for rule in policy.get("rules", []):
+            if "name" not in rule:
+                raise ValueError(f"Twin rule without a name: {rule}")
+            if rule["name"] in compiled:
+                raise ValueError(f"Duplicate twin rule name '{rule['name']}'")
+            kind = rule.get("type")
+            if kind not in RULE_TYPES:
+                raise ValueError(f"Twin rule '{rule['name']}' has unknown type '{kind}'. "
+                                 f"Use one of: {', '.join(RULE_TYPES)}")
+            try:
+                if kind == "swap":
+                    a, b = rule["values"]
+                    variants = _compile_map(rule, [(a, b), (b, a)])
+                elif kind == "map":
+                    variants = _compile_map(rule, [tuple(pair) for pair in rule["mapping"]])
+                elif kind == "categorical":
+                    variants = _compile_categorical(rule)
+                elif kind == "threshold":
+                    variants = _compile_threshold(rule)
+                elif kind == "sweep":
+                    variants = _compile_sweep(rule)
+                else:
+                    variants = _compile_combined(rule, compiled)
+            except KeyError as e:
+                raise ValueError(f"Twin rule '{rule['name']}' is missing {e}")
+
+            compiled[rule["name"]] = variants
+            if rule.get("enabled", True):
+                self.variants.extend(variants)
+
+    @property
+    def attributes(self):
+        return sorted({a for variant in self.variants for a in variant.attributes})
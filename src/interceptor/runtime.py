@@ -0,0 +1,80 @@
+import asyncio
+
+from src.instrumentation import STAGE_SECONDS, TWINS_SKIPPED, record_twins, record_verification
+
+
+async def verify_candidate(adapter, twin_gen, bias_detector, data: dict, max_twins=None, sampler=None, pressure=1.0,
+                           text=True, original_result=None):
+    """
+    Runs the runtime interception for one candidate.
+    The original and all of its shadow twins are sent to the model concurrently,
+    so end-to-end latency is close to a single model round trip.
+
+    With an AdaptiveTwinSampler the original is scored first, and only the
+    twins the sampler picks for its probability and margin are sent to the
+    model (one extra round trip, far fewer model calls).
+
+    Args:
+        adapter (ModelAdapter): Async model adapter.
+        twin_gen (ShadowTwinGenerator): Twin generator.
+        bias_detector (BiasDetector): Detector comparing original vs twins.
+        data (dict): Candidate profile.
+        max_twins (int): Twin budget for this request (None = generator default).
+        sampler (AdaptiveTwinSampler): Optional adaptive twin selection.
+        pressure (float): Load factor passed to the sampler (>= 1 under load).
+        text (bool): Build the human-readable 'reasons' (structured 'flags' are always included).
+        original_result (dict): Prediction for `data` if it was already made (shadow mode);
+            then only the twins are scored.
+
+    Returns:
+        tuple: (original_result, bias_report)
+    """
+    with STAGE_SECONDS.time(stage="twin_generation"):
+        twins = twin_gen.generate_twins(data, max_twins=max_twins)
+    record_twins(twins)
+
+    if sampler is None:
+        with STAGE_SECONDS.time(stage="model_fanout"):
+            if original_result is None:
+                predictions = await asyncio.gather(
+                    adapter.predict(data),
+                    *(adapter.predict(twin) for twin in twins)
+                )
+                original_result = predictions[0]
+                twin_predictions = predictions[1:]
+            else:
+                twin_predictions = await asyncio.gather(*(adapter.predict(twin) for twin in twins))
+        evaluated = twins
+    else:
+        with STAGE_SECONDS.time(stage="model_fanout"):
+            if original_result is None:
+                original_result = await adapter.predict(data)
+            selection = sampler.select(original_result, twins, pressure)
+            evaluated = [twin for twin, keep in zip(twins, selection["evaluate"]) if keep]
+            twin_predictions = await asyncio.gather(*(adapter.predict(twin) for twin in evaluated))
+        for twin, keep in zip(twins, selection["evaluate"]):
+            if not keep:
+                TWINS_SKIPPED.inc(twin_type=twin.get("twin_type", "unknown"))
+
+    twins_results = [
+        {"twin_data": twin, "prediction": res}
+        for twin, res in zip(evaluated, twin_predictions)
+    ]
+
+    with STAGE_SECONDS.time(stage="bias_check"):
+        check = bias_detector.check_results([original_result], twins_results, [0] * len(twins_results))
+        bias_report = check.report(0, twins_results, text=text)
+    record_verification(check)
+
+    if sampler is not None:
+        sampler.observe(original_result, twins, selection, check.flags)
+        bias_report["sampling"] = {
+            "audit": selection["audit"],
+            "twins_generated": len(twins),
+            "twins_evaluated": len(evaluated),
+            "skipped_twin_types": [
+                twin.get("twin_type", "unknown")
+                for twin, keep in zip(twins, selection["evaluate"]) if not keep
+            ],
+        }
+    return original_result, bias_report
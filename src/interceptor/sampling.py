@@ -0,0 +1,171 @@
+import bisect
+from collections import defaultdict
+
+import numpy as np
+
+
+class AdaptiveTwinSampler:
+    """
+    Decides which shadow twins are worth a model call.
+
+    Each twin is evaluated with an inclusion probability derived from how
+    often the BiasDetector flagged twins of its type (decision flip or
+    probability divergence, at the detector's per-type thresholds) for
+    candidates at a similar margin from the decision threshold. Probabilities never drop below `min_probability`, and a random
+    `audit_fraction` of requests evaluates every twin regardless.
+
+    Flag rates are Horvitz-Thompson estimates: every evaluated twin counts
+    with weight 1 / inclusion probability, so skipping twins does not bias
+    them. On audit requests the sampler also records whether its own
+    selection would have caught the bias, which gives an unbiased estimate
+    of detection recall.
+    """
+    MARGIN_BUCKETS = (0.02, 0.05, 0.1, 0.15, 0.2, 0.3, 0.4)
+
+    def __init__(self, decision_threshold=0.5, audit_fraction=0.05,
+                 min_probability=0.02, safety_factor=4.0, min_observations=30, always_evaluate_margin=0.02,
+                 random_state=None):
+        """
+        Args:
+            decision_threshold (float): Model probability above which the decision is positive.
+            audit_fraction (float): Share of requests whose twins are all evaluated.
+            min_probability (float): Floor on any twin's inclusion probability.
+            safety_factor (float): Inclusion probability = safety_factor x estimated flag rate.
+            min_observations (int): Weighted observations a (twin_type, margin) cell needs
+                before it may be sampled; until then its twins are always evaluated.
+            always_evaluate_margin (float): Candidates this close to the threshold are fully evaluated.
+            random_state (int): Seed for the sampling decisions.
+        """
+        if not 0 < audit_fraction <= 1:
+            raise ValueError("audit_fraction must be in (0, 1]")
+        if not 0 < min_probability <= 1:
+            raise ValueError("min_probability must be in (0, 1]")
+        self.decision_threshold = decision_threshold
+        self.audit_fraction = audit_fraction
+        self.min_probability = min_probability
+        self.safety_factor = safety_factor
+        self.min_observations = min_observations
+        self.always_evaluate_margin = always_evaluate_margin
+        self._rng = np.random.default_rng(random_state)
+
+        # (twin_type, margin bucket) -> [weighted twins, weighted flags]
+        self._cells = defaultdict(lambda: [0.0, 0.0])
+        self.requests = 0
+        self.audits = 0
+        self.twins_total = 0
+        self.twins_evaluated = 0
+        # Audit requests only: detected with every twin vs. with the sampled subset
+        self.audit_detected = 0
+        self.audit_detected_by_sample = 0
+
+    def _bucket(self, margin):
+        return bisect.bisect_right(self.MARGIN_BUCKETS, margin)
+
+    def flag_rate(self, twin_type, margin):
+        """Estimated flag rate for a twin type at this margin, or None while there is too little data."""
+        # .get: looking up an unseen cell must not create it
+        weighted, flags = self._cells.get((twin_type, self._bucket(margin)), (0.0, 0.0))
+        if weighted < self.min_observations:
+            return None
+        return flags / weighted
+
+    def inclusion_probabilities(self, original_result, twins, pressure=1.0):
+        """
+        Inclusion probability per twin.
+
+        Args:
+            original_result (dict): The original prediction.
+            twins (list): Twin dicts with a 'twin_type'.
+            pressure (float): >= 1 under load; scales probabilities down (never below the floor).
+        """
+        margin = abs(original_result["hiring_probability"] - self.decision_threshold)
+        if margin <= self.always_evaluate_margin:
+            return np.ones(len(twins))
+
+        probabilities = np.empty(len(twins))
+        for i, twin in enumerate(twins):
+            rate = self.flag_rate(twin.get("twin_type", "unknown"), margin)
+            probabilities[i] = 1.0 if rate is None else self.safety_factor * rate / max(pressure, 1.0)
+        return np.clip(probabilities, self.min_probability, 1.0)
+
+    def select(self, original_result, twins, pressure=1.0):
+        """
+        Picks the twins to evaluate for one request.
+
+        Returns:
+            dict: 'evaluate' (bool mask of twins to score), 'sampled' (the adaptive
+                selection, which equals 'evaluate' except on audits), 'probabilities'
+                (inclusion probability per twin) and 'audit' (bool).
+        """
+        probabilities = self.inclusion_probabilities(original_result, twins, pressure)
+        sampled = self._rng.random(len(twins)) < probabilities
+        audit = bool(self._rng.random() < self.audit_fraction)
+
+        if audit:
+            # Every twin is scored; weights are relative to the audit-inclusive probability
+            evaluate = np.ones(len(twins), dtype=bool)
+            effective = np.ones(len(twins))
+        else:
+            evaluate = sampled
+            effective = probabilities
+        return {"evaluate": evaluate, "sampled": sampled, "probabilities": effective, "audit": audit}
+
+    def observe(self, original_result, twins, selection, twin_flags):
+        """
+        Folds the evaluated twins back into the flag-rate estimates.
+
+        Args:
+            original_result (dict): The original prediction.
+            twins (list): All twins offered to `select`.
+            selection (dict): What `select` returned.
+            twin_flags (array): BiasDetector flag bits of the evaluated twins, in order
+                (BiasCheckResult.flags); any non-zero value counts as flagged.
+        """
+        margin = abs(original_result["hiring_probability"] - self.decision_threshold)
+        bucket = self._bucket(margin)
+        evaluated = np.flatnonzero(selection["evaluate"])
+        if len(twin_flags) != len(evaluated):
+            raise ValueError(f"Got flags for {len(twin_flags)} twins but {len(evaluated)} were evaluated")
+
+        flagged = np.zeros(len(twins), dtype=bool)
+        flagged[evaluated] = np.asarray(twin_flags) != 0
+        for i in evaluated:
+            cell = self._cells[(twins[i].get("twin_type", "unknown"), bucket)]
+            weight = 1.0 / selection["probabilities"][i]
+            cell[0] += weight
+            cell[1] += weight * bool(flagged[i])
+
+        self.requests += 1
+        self.twins_total += len(twins)
+        self.twins_evaluated += len(evaluated)
+        if selection["audit"]:
+            self.audits += 1
+            if flagged.any():
+                self.audit_detected += 1
+                self.audit_detected_by_sample += bool((flagged & selection["sampled"]).any())
+
+    def stats(self):
+        """Model-call savings, the recall estimate from audits and the per-cell flag rates."""
+        flag_rates = defaultdict(dict)
+        for (twin_type, bucket), (weighted, flags) in sorted(self._cells.items()):
+            lower = self.MARGIN_BUCKETS[bucket - 1] if bucket else 0.0
+            upper = self.MARGIN_BUCKETS[bucket] if bucket < len(self.MARGIN_BUCKETS) else None
+            label = f"{lower}-{upper}" if upper is not None else f">{lower}"
+            flag_rates[twin_type][label] = {
+                "weighted_twins": float(weighted),
+                "flag_rate": float(flags / weighted) if weighted else None,
+            }
+
+        recall = None
+        if self.audit_detected:
+            recall = self.audit_detected_by_sample / self.audit_detected
+        return {
+            "requests": self.requests,
+            "audit_requests": self.audits,
+            "twins_total": self.twins_total,
+            "twins_evaluated": self.twins_evaluated,
+            "twin_call_savings": 1 - self.twins_evaluated / self.twins_total if self.twins_total else 0.0,
+            "estimated_recall": recall,
+            "recall_sample_size": self.audit_detected,
+            "flag_rates": dict(flag_rates),
+        }
@@ -0,0 +1,212 @@
+import asyncio
+import inspect
+import logging
+import time
+from collections import OrderedDict
+
+from src.instrumentation import SHADOW_EVENTS, SHADOW_QUEUE_SECONDS
+
+try:
+    import httpx
+except ImportError:
+    logging.warning("httpx not found. Shadow verification webhooks will be unavailable.")
+    httpx = None
+
+logger = logging.getLogger("shadow")
+
+# What to do with a new verification when the queue is full
+SHED_POLICIES = ("drop_newest", "drop_oldest")
+
+
+class ShadowVerifier:
+    """
+    Runs bias verification off the decision path.
+
+    /predict only scores the original and hands (request_id, profile, decision)
+    to `submit`, which never blocks. A fixed pool of worker tasks on the event
+    loop pulls from a bounded queue, generates and scores the twins, checks for
+    bias and publishes the result. Under overload the queue sheds work instead
+    of growing: `drop_newest` rejects new verifications, `drop_oldest` evicts
+    the longest-waiting one. How full the queue is, is also handed to `verify`
+    as a pressure factor so adaptive twin sampling can spend fewer model calls
+    while a backlog builds.
+
+    Status per request id is kept in a bounded in-memory map
+    (queued -> running -> done | failed, or shed).
+    """
+    def __init__(self, verify, max_queue=1000, workers=4, shed_policy="drop_newest", publishers=(),
+                 webhook_url=None, webhook_timeout=2.0, max_status_entries=100_000, shutdown_timeout=10.0):
+        """
+        Args:
+            verify (callable): async verify(profile, original_result, pressure, **options) -> bias_report.
+            max_queue (int): Verifications waiting at most; beyond that, work is shed.
+            workers (int): Concurrent verifications.
+            shed_policy (str): 'drop_newest' or 'drop_oldest'.
+            publishers (list): Callables (sync or async) receiving each finished record
+                as publish(record, bias_report).
+            webhook_url (str): Optional URL every finished record is POSTed to as JSON.
+            webhook_timeout (float): Seconds per webhook call.
+            max_status_entries (int): Request statuses kept in memory (oldest evicted first).
+            shutdown_timeout (float): Seconds `close` waits for the queue to drain.
+        """
+        if shed_policy not in SHED_POLICIES:
+            raise ValueError(f"Unknown shed policy '{shed_policy}'. Use one of: {', '.join(SHED_POLICIES)}")
+        if webhook_url and httpx is None:
+            raise RuntimeError("httpx is required for shadow verification webhooks")
+        self.verify = verify
+        self.max_queue = max_queue
+        self.workers = workers
+        self.shed_policy = shed_policy
+        self.publishers = list(publishers)
+        self.webhook_url = webhook_url
+        self.webhook_timeout = webhook_timeout
+        self.max_status_entries = max_status_entries
+        self.shutdown_timeout = shutdown_timeout
+
+        self._queue = None
+        self._tasks = []
+        self._client = None
+        self._status = OrderedDict()
+        self.counts = {"submitted": 0, "shed": 0, "done": 0, "failed": 0, "publish_errors": 0}
+
+    async def start(self):
+        # The queue belongs to the running loop, so it is created here rather than in __init__
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        if self.webhook_url:
+            self._client = httpx.AsyncClient(timeout=self.webhook_timeout)
+        self._tasks = [asyncio.create_task(self._worker(), name=f"shadow-verifier-{i}") for i in range(self.workers)]
+
+    @property
+    def running(self):
+        return bool(self._tasks)
+
+    def pressure(self):
+        """1.0 while the queue is empty, rising steeply as it fills."""
+        fill = self._queue.qsize() / self.max_queue if self._queue is not None else 0.0
+        return 1.0 / max(1.0 - fill, 0.05)
+
+    def _set_status(self, request_id, status, **fields):
+        entry = self._status.get(request_id)
+        if entry is None:
+            entry = self._status[request_id] = {"request_id": request_id}
+            while len(self._status) > self.max_status_entries:
+                self._status.popitem(last=False)
+        entry["status"] = status
+        entry.update(fields)
+        return entry
+
+    def submit(self, request_id, profile, original_result, **options):
+        """
+        Queues one verification without waiting.
+        `options` are passed through to `verify` (e.g. max_twins).
+
+        Returns:
+            bool: False if the verification was shed (queue full, or the
+                verifier has not been started).
+        """
+        self.counts["submitted"] += 1
+        if not self.running:
+            # E.g. an app used without its lifespan: shed rather than fail the request
+            logger.warning(f"Shadow verifier is not running; shedding verification {request_id}")
+            self._shed(request_id)
+            return False
+        item = (request_id, profile, original_result, options, time.time())
+
+        if self._queue.full():
+            if self.shed_policy == "drop_newest":
+                self._shed(request_id)
+                return False
+            evicted = self._queue.get_nowait()
+            self._queue.task_done()
+            self._shed(evicted[0])
+
+        self._queue.put_nowait(item)
+        self._set_status(request_id, "queued", queued_at=item[4])
+        SHADOW_EVENTS.inc(outcome="queued")
+        return True
+
+    def _shed(self, request_id):
+        self.counts["shed"] += 1
+        self._set_status(request_id, "shed", completed_at=time.time())
+        SHADOW_EVENTS.inc(outcome="shed")
+
+    async def _worker(self):
+        while True:
+            request_id, profile, original_result, options, queued_at = await self._queue.get()
+            try:
+                SHADOW_QUEUE_SECONDS.observe(time.time() - queued_at)
+                self._set_status(request_id, "running", started_at=time.time())
+                try:
+                    bias_report = await self.verify(profile, original_result, self.pressure(), **options)
+                except asyncio.CancelledError:
+                    # Shutdown gave up on this one
+                    self._shed(request_id)
+                    raise
+                except Exception as e:
+                    logger.error(f"Shadow verification {request_id} failed: {e}")
+                    self.counts["failed"] += 1
+                    SHADOW_EVENTS.inc(outcome="failed")
+                    self._set_status(request_id, "failed", error=str(e), completed_at=time.time())
+                    continue
+
+                # Twin details stay with the publishers; the status map keeps the compact report
+                report = {key: value for key, value in bias_report.items() if key != "twin_details"}
+                record = self._set_status(request_id, "done", completed_at=time.time(),
+                                          model_decision=original_result, verification_report=report)
+                self.counts["done"] += 1
+                SHADOW_EVENTS.inc(outcome="done")
+                await self._publish(dict(record, profile=profile), bias_report)
+            finally:
+                self._queue.task_done()
+
+    async def _publish(self, record, bias_report):
+        for publish in self.publishers:
+            try:
+                result = publish(record, bias_report)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                self.counts["publish_errors"] += 1
+                logger.error(f"Shadow publisher failed for {record['request_id']}: {e}")
+        if self._client is not None:
+            try:
+                response = await self._client.post(self.webhook_url, json=record)
+                response.raise_for_status()
+            except Exception as e:
+                self.counts["publish_errors"] += 1
+                logger.error(f"Shadow webhook failed for {record['request_id']}: {e}")
+
+    def status(self, request_id):
+        """Status of a recent verification, or None if it is unknown (or was evicted)."""
+        entry = self._status.get(request_id)
+        return dict(entry) if entry is not None else None
+
+    def stats(self):
+        return {
+            **self.counts,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "workers": self.workers,
+            "shed_policy": self.shed_policy,
+            "pressure": self.pressure(),
+        }
+
+    async def close(self):
+        """Lets queued verifications finish (up to shutdown_timeout), then stops the workers."""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), self.shutdown_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Shadow verification queue not drained after {self.shutdown_timeout}s; "
+                           f"shedding {self._queue.qsize()} pending verifications")
+            while not self._queue.empty():
+                self._shed(self._queue.get_nowait()[0])
+                self._queue.task_done()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
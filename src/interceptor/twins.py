@@ -1,37 +1,134 @@
-import copy
+import numpy as np
+import pandas as pd
+
+from src.interceptor.policy import TwinPolicy
+
+
+class TwinMatrix:
+    """
+    Columnar collection of shadow twins.
+
+    Attributes:
+        candidate_index (np.ndarray): Row of the source candidate for each twin.
+        twin_type (np.ndarray): Twin label per row (e.g. 'gender_flip').
+        columns (dict): Column name -> np.ndarray of (perturbed) values.
+    """
+    def __init__(self, candidate_index, twin_type, columns):
+        self.candidate_index = candidate_index
+        self.twin_type = twin_type
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.candidate_index)
+
+    def to_frame(self):
+        """Returns the twins as a DataFrame with a 'twin_type' column."""
+        df = pd.DataFrame(self.columns, copy=False)
+        df['twin_type'] = self.twin_type
+        return df
+
+    def to_records(self):
+        """Returns the twins as a list of dicts (same shape as `generate_twins`)."""
+        names = list(self.columns) + ['twin_type']
+        values = [self.columns[name].tolist() for name in self.columns]
+        values.append(self.twin_type.tolist())
+        return [dict(zip(names, row)) for row in zip(*values)]
+
 
 class ShadowTwinGenerator:
-    def __init__(self):
+    def __init__(self, policy=None, max_twins_per_request=None):
+        """
+        Args:
+            policy (dict | str | TwinPolicy): Twin policy (dict, JSON/YAML path or
+                compiled policy). Defaults to the built-in gender-flip / age policy.
+            max_twins_per_request (int): Twin budget per candidate; overrides the
+                policy's `max_twins_per_request`. None means no cap.
+        """
+        self.policy = policy if isinstance(policy, TwinPolicy) else TwinPolicy(policy)
+        self.max_twins_per_request = (max_twins_per_request if max_twins_per_request is not None
+                                      else self.policy.max_twins_per_request)
         # Define sensitive ranges or categories to flip
-        self.sensitive_attributes = ['gender', 'age']
+        self.sensitive_attributes = self.policy.attributes
+
+    @staticmethod
+    def _as_columns(candidates):
+        """Normalizes a DataFrame, structured array or dict of lists to column arrays."""
+        if isinstance(candidates, pd.DataFrame):
+            return {name: candidates[name].to_numpy() for name in candidates.columns}
+        if isinstance(candidates, np.ndarray) and candidates.dtype.names:
+            return {name: candidates[name] for name in candidates.dtype.names}
+        return {name: np.asarray(values) for name, values in candidates.items()}
+
+    def generate_twin_matrix(self, candidates, max_twins=None):
+        """
+        Generates counterfactuals for a whole batch of candidates at once.
+
+        Args:
+            candidates (pd.DataFrame | np.ndarray | dict): Candidates in columnar form.
+                Structured arrays and dicts of equal-length lists are accepted too.
+            max_twins (int): Per-candidate twin budget for this call (e.g. tightened
+                under load). Defaults to the generator's budget.
+
+        Returns:
+            TwinMatrix: Twins ordered by candidate, then by policy rule order.
+        """
+        columns = self._as_columns(candidates)
+        n = len(next(iter(columns.values()))) if columns else 0
+
+        # Each compiled variant is evaluated on whole columns; rules whose
+        # attributes are missing from the input are skipped
+        perturbations = []  # (mask, {column: new_values}, twin_types)
+        if n:
+            for variant in self.policy.variants:
+                if variant.applicable(columns):
+                    perturbations.append(variant.apply(columns, n))
+
+        k = len(perturbations)
+        if k == 0 or n == 0:
+            return TwinMatrix(
+                np.empty(0, dtype=np.intp),
+                np.empty(0, dtype=object),
+                {name: values[:0] for name, values in columns.items()},
+            )
+
+        # (k, n) mask of twins to emit; the budget keeps each candidate's first twins in rule order
+        emit = np.stack([p[0] for p in perturbations])
+        budget = max_twins if max_twins is not None else self.max_twins_per_request
+        if budget is not None:
+            emit &= np.cumsum(emit, axis=0) <= budget
+
+        # Candidate-major order: (candidate, variant) pairs sorted by candidate
+        if emit.all():
+            candidate_index, variant_index = np.repeat(np.arange(n), k), np.tile(np.arange(k), n)
+        else:
+            candidate_index, variant_index = np.nonzero(emit.T)
+
+        # Untouched columns are a plain gather; perturbed ones are laid out as
+        # (k, n) blocks (one row per variant) and gathered at the emitted cells
+        twin_columns = {}
+        for name, values in columns.items():
+            perturbed_rows = [j for j, p in enumerate(perturbations) if name in p[1]]
+            if not perturbed_rows:
+                twin_columns[name] = values[candidate_index]
+                continue
+            # Wide enough for every variant's values (e.g. float targets on an int column)
+            block = np.empty((k, n), dtype=np.result_type(values, *(perturbations[j][1][name] for j in perturbed_rows)))
+            block[:] = values
+            for j in perturbed_rows:
+                block[j] = perturbations[j][1][name]
+            twin_columns[name] = block[variant_index, candidate_index]
+
+        twin_type = np.empty((k, n), dtype=object)
+        for j, p in enumerate(perturbations):
+            twin_type[j] = p[2]
+        twin_type = twin_type[variant_index, candidate_index]
+
+        return TwinMatrix(candidate_index, twin_type, twin_columns)
 
-    def generate_twins(self, input_data: dict):
+    def generate_twins(self, input_data: dict, max_twins=None):
         """
         Generates counterfactuals for the input data.
         Returns a list of dictionaries (twins).
         """
-        twins = []
-        original = input_data
-
-        # Twin 1: Flip Gender (Assuming binary 0/1 for MVP)
-        # If input has 'gender', create a twin with the opposite gender
-        if 'gender' in original:
-            gender_twin = copy.deepcopy(original)
-            gender_twin['gender'] = 1 - original['gender'] # Flip 0->1, 1->0
-            gender_twin['twin_type'] = 'gender_flip'
-            twins.append(gender_twin)
-
-        # Twin 2: Age Counterfactuals
-        # If age > 50, try a younger age (e.g., 35)
-        # If age < 50, try an older age (e.g., 55)
-        if 'age' in original:
-            age_twin = copy.deepcopy(original)
-            if original['age'] > 50:
-                age_twin['age'] = 35
-                age_twin['twin_type'] = 'age_younger'
-            else:
-                age_twin['age'] = 55
-                age_twin['twin_type'] = 'age_older'
-            twins.append(age_twin)
-            
-        return twins
+        matrix = self.generate_twin_matrix({key: [value] for key, value in input_data.items()}, max_twins)
+        return matrix.to_records()
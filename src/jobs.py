@@ -0,0 +1,340 @@
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from src.report_store import _json_default
+
+logger = logging.getLogger("jobs")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    tenant TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    owner_pid INTEGER,
+    owner_started TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    progress TEXT,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_tenant ON jobs(tenant, created);
+"""
+
+# Terminal states; a job never leaves one of these
+FINISHED_STATES = ("succeeded", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job when its cancellation has been requested."""
+    pass
+
+
+class JobContext:
+    """
+    Handed to a running job function.
+
+    `report(**progress)` publishes progress (throttled to the store) and raises
+    `JobCancelled` once the job has been cancelled, so long-running loops stop
+    at their next checkpoint.
+    """
+    def __init__(self, manager, job_id, input_path=None):
+        self.manager = manager
+        self.job_id = job_id
+        self.input_path = input_path
+        self.cancelled = threading.Event()
+        self._progress = {}
+        self._last_write = 0.0
+
+    def report(self, force=False, **progress):
+        self._progress.update(progress)
+        now = time.monotonic()
+        if force or now - self._last_write >= self.manager.progress_interval:
+            self._last_write = now
+            # The write also picks up cancel requests made by other worker processes
+            if self.manager._write_progress(self.job_id, self._progress):
+                self.cancelled.set()
+        self.check_cancelled()
+
+    def check_cancelled(self):
+        if self.cancelled.is_set():
+            raise JobCancelled(self.job_id)
+
+
+class JobManager:
+    """
+    Background job queue for long-running work such as audits of large uploads.
+
+    Jobs run on a local thread pool; their state lives in a SQLite (WAL) table
+    so status, progress and results can be read from any worker process and
+    survive restarts. Uploaded inputs are spooled to `work_dir` and removed
+    when the job finishes.
+    """
+    def __init__(self, path, work_dir="jobs", max_workers=2, progress_interval=0.5,
+                 max_result_bytes=20_000_000, retention_seconds=86400):
+        """
+        Args:
+            path (str): SQLite database file.
+            work_dir (str): Directory for spooled job inputs.
+            max_workers (int): Jobs running concurrently in this process.
+            progress_interval (float): Minimum seconds between progress writes per job.
+            max_result_bytes (int): Largest stored result.
+            retention_seconds (float): Finished jobs older than this are purged.
+        """
+        self.path = path
+        self.work_dir = work_dir
+        self.progress_interval = progress_interval
+        self.max_result_bytes = max_result_bytes
+        self.retention_seconds = retention_seconds
+        self._contexts = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="audit-job")
+
+        os.makedirs(work_dir, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            # Stores created before owner_started existed
+            if "owner_started" not in {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}:
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner_started TEXT")
+        finally:
+            conn.close()
+        self._recover()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    def _execute(self, sql, params=()):
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).rowcount
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _pid_alive(pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except (PermissionError, OSError):
+            return True
+        return True
+
+    @staticmethod
+    def _process_started(pid):
+        """Start time of a process (clock ticks since boot, from /proc), or None where unavailable."""
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                # The command name may contain spaces; fields after it are space-separated
+                return f.read().rsplit(")", 1)[1].split()[19]
+        except (OSError, IndexError):
+            return None
+
+    def _owner_alive(self, pid, started):
+        """
+        Whether the process that owned a job is still running. Pids are reused
+        (a containerized server is pid 1 after every restart), so the process
+        start time must match too, and our own pid never counts: this manager
+        has not submitted anything yet when it recovers.
+        """
+        if pid is None or pid == os.getpid() or not self._pid_alive(pid):
+            return False
+        current = self._process_started(pid)
+        return started is None or current is None or current == started
+
+    def _recover(self):
+        """Fails jobs whose owning process died before they finished."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT id, owner_pid, owner_started FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchall()
+        finally:
+            conn.close()
+        for job_id, pid, started in rows:
+            if not self._owner_alive(pid, started):
+                self._finish(job_id, "failed", error="Interrupted by a server restart")
+                logger.warning(f"Job {job_id} was interrupted by a restart")
+
+    def submit(self, tenant, kind, fn, upload=None, suffix=""):
+        """
+        Queues a job.
+
+        Args:
+            tenant (str): Tenant that owns the job.
+            kind (str): Job type, e.g. 'audit'.
+            fn (callable): Called as fn(context) on a worker thread; returns the result dict.
+            upload: Optional binary file object copied to disk as the job input
+                (available as `context.input_path`).
+            suffix (str): File name suffix for the spooled input.
+
+        Returns:
+            str: The job id.
+        """
+        job_id = uuid.uuid4().hex
+        input_path = None
+        if upload is not None:
+            input_path = os.path.join(self.work_dir, job_id + suffix)
+            upload.seek(0)
+            with open(input_path, "wb") as out:
+                # Copied in blocks; the upload is never read into memory at once
+                shutil.copyfileobj(upload, out, length=1024 * 1024)
+
+        self._purge()
+        self._execute(
+            "INSERT INTO jobs (id, tenant, kind, status, created, owner_pid, owner_started, progress) "
+            "VALUES (?, ?, ?, 'queued', ?, ?, ?, '{}')",
+            (job_id, tenant, kind, time.time(), os.getpid(), self._process_started(os.getpid())),
+        )
+
+        context = JobContext(self, job_id, input_path)
+        with self._lock:
+            self._contexts[job_id] = context
+        self._pool.submit(self._run, context, fn)
+        logger.info(f"Queued {kind} job {job_id} for tenant {tenant}")
+        return job_id
+
+    def _run(self, context, fn):
+        job_id = context.job_id
+        outcome = ("failed", {"error": "Job did not complete"})
+        try:
+            started = self._execute(
+                "UPDATE jobs SET status = 'running', started = ? WHERE id = ? AND status = 'queued' "
+                "AND cancel_requested = 0",
+                (time.time(), job_id),
+            )
+            if not started:
+                outcome = ("cancelled", {})
+                return
+
+            result = fn(context)
+            body = json.dumps(result, default=_json_default)
+            if len(body) > self.max_result_bytes:
+                raise ValueError(f"Job result exceeds {self.max_result_bytes} bytes")
+            context.report(force=True, stage="done")
+            outcome = ("succeeded", {"result": body})
+        except JobCancelled:
+            outcome = ("cancelled", {})
+            logger.info(f"Job {job_id} cancelled")
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            outcome = ("failed", {"error": str(e)})
+        finally:
+            # Clean up before the final status is visible, so a finished job never leaves its input behind
+            with self._lock:
+                self._contexts.pop(job_id, None)
+            if context.input_path and os.path.exists(context.input_path):
+                try:
+                    os.remove(context.input_path)
+                except OSError as e:
+                    logger.warning(f"Could not remove input of job {job_id}: {e}")
+            status, fields = outcome
+            self._finish(job_id, status, **fields)
+
+    def _finish(self, job_id, status, result=None, error=None):
+        self._execute(
+            "UPDATE jobs SET status = ?, finished = ?, result = ?, error = ? WHERE id = ?",
+            (status, time.time(), result, error, job_id),
+        )
+
+    def _write_progress(self, job_id, progress):
+        """Stores progress; returns True if cancellation was requested meanwhile."""
+        conn = self._connect()
+        try:
+            conn.execute("UPDATE jobs SET progress = ? WHERE id = ?",
+                         (json.dumps(progress, default=_json_default), job_id))
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return bool(row and row[0])
+
+    def _purge(self):
+        self._execute(
+            "DELETE FROM jobs WHERE finished IS NOT NULL AND finished < ?",
+            (time.time() - self.retention_seconds,),
+        )
+
+    def status(self, job_id, tenant=None):
+        """Returns the job's status and progress (no result), or None if unknown."""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT id, tenant, kind, status, created, started, finished, progress, error, cancel_requested "
+                "FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None or (tenant is not None and row[1] != tenant):
+            return None
+        return {
+            "job_id": row[0],
+            "tenant": row[1],
+            "kind": row[2],
+            "status": row[3],
+            "created": row[4],
+            "started": row[5],
+            "finished": row[6],
+            "progress": json.loads(row[7]) if row[7] else {},
+            "error": row[8],
+            "cancel_requested": bool(row[9]),
+        }
+
+    def result(self, job_id, tenant=None):
+        """Returns (status, result) for a job; result is None until it has succeeded."""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT tenant, status, result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        if row is None or (tenant is not None and row[0] != tenant):
+            return None, None
+        return row[1], json.loads(row[2]) if row[2] else None
+
+    def list_jobs(self, tenant, limit=50):
+        """Most recent jobs of a tenant, newest first."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE tenant = ? ORDER BY created DESC LIMIT ?", (tenant, limit)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [self.status(job_id) for (job_id,) in rows]
+
+    def cancel(self, job_id, tenant=None):
+        """
+        Requests cancellation. Queued jobs never start; running jobs stop at
+        their next progress checkpoint. Returns the job status, or None if unknown.
+        """
+        job = self.status(job_id, tenant)
+        if job is None or job["status"] in FINISHED_STATES:
+            return job
+        self._execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+        with self._lock:
+            context = self._contexts.get(job_id)
+        if context is not None:
+            context.cancelled.set()
+        return self.status(job_id)
+
+    def close(self, wait=True):
+        """Cancels outstanding jobs of this process and shuts the pool down."""
+        with self._lock:
+            contexts = list(self._contexts.values())
+        for context in contexts:
+            context.cancelled.set()
+        self._pool.shutdown(wait=wait, cancel_futures=True)
@@ -1,11 +1,173 @@
+import json
+import os
+import uuid
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from src.model.blackbox import hr_model
+from typing import List, Optional
+import pandas as pd
+from src.model.adapters import ConcurrencyLimitedAdapter, build_model_adapter
+from src.model.batcher import MicroBatcher
+from src.model.cache import CachedModelAdapter, PredictionCache
 from src.interceptor.twins import ShadowTwinGenerator
+from src.interceptor.sampling import AdaptiveTwinSampler
 from src.interceptor.detector import BiasDetector
+from src.interceptor.runtime import verify_candidate
+from src.interceptor.decision_log import DecisionLog
+from src.interceptor.shadow import ShadowVerifier
+from src.instrumentation import (
+    REGISTRY, STAGE_SECONDS, TWINS_SKIPPED, InstrumentedModelAdapter, record_twins, record_verification,
+    router as instrumentation_router,
+)
+
+# Components
+# Twin policy (JSON/YAML) is compiled once at startup; the budget caps twins per candidate
+twin_budget = os.environ.get("TWIN_MAX_PER_REQUEST")
+twin_gen = ShadowTwinGenerator(
+    policy=os.environ.get("TWIN_POLICY_PATH") or None,
+    max_twins_per_request=int(twin_budget) if twin_budget else None,
+)
+# Per twin_type divergence thresholds, e.g. BIAS_TWIN_THRESHOLDS='{"gender_flip": 0.05}'
+bias_detector = BiasDetector(
+    probability_threshold=float(os.environ.get("BIAS_PROBABILITY_THRESHOLD", 0.1)),
+    twin_type_thresholds=json.loads(os.environ.get("BIAS_TWIN_THRESHOLDS") or "{}"),
+)
+
+# Optional adaptive twin sampling: score the original first and only spend
+# model calls on the twins likely to reveal bias (plus a random audit share)
+twin_sampler = None
+if os.environ.get("ADAPTIVE_TWINS", "0") == "1":
+    twin_sampler = AdaptiveTwinSampler(
+        audit_fraction=float(os.environ.get("ADAPTIVE_TWINS_AUDIT_FRACTION", 0.05)),
+        min_probability=float(os.environ.get("ADAPTIVE_TWINS_MIN_PROBABILITY", 0.02)),
+        safety_factor=float(os.environ.get("ADAPTIVE_TWINS_SAFETY_FACTOR", 4.0)),
+    )
+# Requests in flight above this count scale the sampling probabilities down
+adaptive_target_inflight = int(os.environ.get("ADAPTIVE_TWINS_TARGET_INFLIGHT", 32))
+inflight_requests = 0
+
+# Innermost wrapper, so only calls that really reach the model are counted
+model_adapter = InstrumentedModelAdapter(build_model_adapter())
+
+# Optional micro-batching: coalesce rows from concurrent requests into one model call
+batcher = None
+if os.environ.get("MICRO_BATCH", "0") == "1":
+    batcher = MicroBatcher(
+        model_adapter,
+        max_batch_size=int(os.environ.get("MICRO_BATCH_MAX_SIZE", 64)),
+        max_wait_us=int(os.environ.get("MICRO_BATCH_MAX_WAIT_US", 2000)),
+    )
+    model_adapter = batcher
+
+# Optional prediction cache in front of everything, so hits skip the batch queue too
+prediction_cache = None
+if os.environ.get("PREDICTION_CACHE_SIZE"):
+    ttl = os.environ.get("PREDICTION_CACHE_TTL")
+    forced = os.environ.get("HR_MODEL_DETERMINISTIC")
+    prediction_cache = CachedModelAdapter(
+        model_adapter,
+        PredictionCache(
+            max_size=int(os.environ["PREDICTION_CACHE_SIZE"]),
+            ttl_seconds=float(ttl) if ttl else None,
+        ),
+        deterministic=None if forced is None else forced == "1",
+    )
+    model_adapter = prediction_cache
+
+# Persistent decision log (set DECISION_LOG_PATH="" to disable); opened by
+# `lifespan`, so importing the app creates no file and starts no writer thread
+decision_log_path = os.environ.get("DECISION_LOG_PATH", "decision_log.db")
+decision_log = None
+
+# Shadow twins are scored through their own adapter (own thread pool / HTTP
+# connection pool, no shared micro-batcher) with a cap on calls in flight, so
+# background verification cannot queue ahead of decision-path model calls
+shadow_model_adapter = ConcurrencyLimitedAdapter(
+    InstrumentedModelAdapter(build_model_adapter()),
+    max_concurrency=int(os.environ.get("SHADOW_MODEL_CONCURRENCY", 4)),
+)
+
+async def _shadow_verify(profile, original_result, pressure, max_twins=None):
+    # Queue pressure and in-flight load both slow down adaptive sampling
+    _, bias_report = await verify_candidate(
+        shadow_model_adapter, twin_gen, bias_detector, profile, max_twins,
+        sampler=twin_sampler, pressure=max(pressure, inflight_requests / adaptive_target_inflight),
+        text=False, original_result=original_result,
+    )
+    return bias_report
 
-app = FastAPI(title="Runtime Verification Layer", version="1.0")
+def _log_shadow_result(record, bias_report):
+    decision_log.record(record["profile"], record["model_decision"], bias_report["twin_details"],
+                        bias_report, record["request_id"])
+
+# Shadow mode: /predict returns the model decision at once and verification
+# runs on a bounded background queue (SHADOW_MODE=1 makes it the default)
+shadow_default = os.environ.get("SHADOW_MODE", "0") == "1"
+shadow_verifier = ShadowVerifier(
+    _shadow_verify,
+    max_queue=int(os.environ.get("SHADOW_MAX_QUEUE", 1000)),
+    workers=int(os.environ.get("SHADOW_WORKERS", 4)),
+    shed_policy=os.environ.get("SHADOW_SHED_POLICY", "drop_newest"),
+    webhook_url=os.environ.get("SHADOW_WEBHOOK_URL") or None,
+)
+
+def _collect_component_stats():
+    """Exports the batcher and cache counters at scrape time (no hot-path cost)."""
+    families = []
+    if prediction_cache is not None:
+        stats = prediction_cache.stats()
+        families.append(("bias_prediction_cache_lookups_total", "counter", "Prediction cache lookups.",
+                         [({"result": "hit"}, stats["hits"]), ({"result": "miss"}, stats["misses"])]))
+        families.append(("bias_prediction_cache_entries", "gauge", "Entries in the prediction cache.",
+                         [({}, stats["size"])]))
+    if batcher is not None:
+        stats = batcher.metrics.snapshot()
+        families.append(("bias_batcher_batches_total", "counter", "Micro-batches flushed.",
+                         [({"reason": reason}, count) for reason, count in stats["flush_reasons"].items()]))
+        families.append(("bias_batcher_rows_total", "counter", "Rows sent through the micro-batcher.",
+                         [({}, stats["rows"])]))
+    if decision_log is not None:
+        families.append(("bias_decision_log_dropped_total", "counter", "Decision log records dropped.",
+                         [({}, decision_log.dropped)]))
+    if shadow_verifier.running:
+        families.append(("bias_shadow_queue_depth", "gauge", "Shadow verifications waiting in the queue.",
+                         [({}, shadow_verifier.stats()["queued"])]))
+    if twin_sampler is not None:
+        stats = twin_sampler.stats()
+        families.append(("bias_adaptive_audit_requests_total", "counter",
+                         "Requests whose twins were all evaluated as a random audit.",
+                         [({}, stats["audit_requests"])]))
+        if stats["estimated_recall"] is not None:
+            families.append(("bias_adaptive_estimated_recall", "gauge",
+                             "Share of audited biased requests the adaptive selection alone would have caught.",
+                             [({}, stats["estimated_recall"])]))
+    return families
+
+REGISTRY.register_collector(_collect_component_stats)
+
+@asynccontextmanager
+async def lifespan(app):
+    global decision_log
+    if decision_log_path:
+        decision_log = DecisionLog(
+            decision_log_path,
+            bucket_seconds=int(os.environ.get("DECISION_LOG_BUCKET_SECONDS", 60)),
+            divergence_threshold=bias_detector.probability_threshold,
+        )
+        shadow_verifier.publishers.append(_log_shadow_result)
+    await shadow_verifier.start()
+    yield
+    # Drain pending verifications while the model and the log are still open
+    await shadow_verifier.close()
+    await shadow_model_adapter.close()
+    await model_adapter.close()
+    if decision_log is not None:
+        shadow_verifier.publishers.remove(_log_shadow_result)
+        decision_log.close()
+        decision_log = None
+
+app = FastAPI(title="Runtime Verification Layer", version="1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,6 +177,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# /metrics (Prometheus) and the runtime sampling profiler
+app.include_router(instrumentation_router)
+
 # Data Model
 class CandidateProfile(BaseModel):
     age: int
@@ -22,45 +187,228 @@ class CandidateProfile(BaseModel):
     education: int # 1=BS, 2=MS, 3=PhD
     gender: int # 0=Male, 1=Female
 
-# Components
-twin_gen = ShadowTwinGenerator()
-bias_detector = BiasDetector()
-
 @app.get("/")
 def read_root():
     return {"status": "Active", "message": "Runtime Verification Layer is running."}
 
 @app.post("/predict")
-def predict_and_verify(profile: CandidateProfile):
+async def predict_and_verify(profile: CandidateProfile, max_twins: Optional[int] = None, compact: bool = True,
+                             shadow: Optional[bool] = None):
+    # Structured flags only by default; compact=false adds the reason strings and twin details
     data = profile.dict()
+
+    if shadow if shadow is not None else shadow_default:
+        # Only the original is on the decision path; twins are verified in the background
+        with STAGE_SECONDS.time(stage="request"):
+            try:
+                original_result = await model_adapter.predict(data)
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=str(e))
+            request_id = uuid.uuid4().hex
+            accepted = shadow_verifier.submit(request_id, data, original_result, max_twins=max_twins)
+        return {
+            "request_id": request_id,
+            "model_decision": original_result,
+            "verification": {
+                "mode": "shadow",
+                "status": "queued" if accepted else "shed",
+                "status_url": f"/verifications/{request_id}",
+            }
+        }
     
     # 1. Get the "Real" Model Decision
-    try:
-        original_result = hr_model.predict(data)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-        
     # 2. Generate Shadow Twins (Runtime Interception)
-    twins = twin_gen.generate_twins(data)
-    
-    # 3. Probe Model with Twins
-    twins_results = []
-    for twin in twins:
-        res = hr_model.predict(twin)
-        twins_results.append({
-            "twin_data": twin,
-            "prediction": res
-        })
-        
+    # 3. Probe Model with Twins (concurrently with the original call)
     # 4. Check for Bias
-    bias_report = bias_detector.check_bias(original_result, twins_results)
-    
+    global inflight_requests
+    with STAGE_SECONDS.time(stage="request"):
+        inflight_requests += 1
+        try:
+            original_result, bias_report = await verify_candidate(
+                model_adapter, twin_gen, bias_detector, data, max_twins,
+                sampler=twin_sampler, pressure=inflight_requests / adaptive_target_inflight, text=not compact,
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            inflight_requests -= 1
+
+        request_id = uuid.uuid4().hex
+        if decision_log is not None:
+            with STAGE_SECONDS.time(stage="decision_log"):
+                decision_log.record(data, original_result, bias_report['twin_details'], bias_report, request_id)
+        if compact:
+            bias_report.pop('twin_details')
+
     # 5. Return Augmented Response
     return {
+        "request_id": request_id,
         "model_decision": original_result,
         "verification_report": bias_report
     }
 
+@app.post("/predict/batch")
+async def predict_and_verify_batch(profiles: List[CandidateProfile], max_twins: Optional[int] = None,
+                                   compact: bool = True):
+    """
+    Verifies many candidates at once.
+    The originals and every shadow twin are scored in a single vectorized
+    model call and checked for bias in one array pass, then split back into
+    one verification report per candidate.
+    """
+    originals = [profile.dict() for profile in profiles]
+
+    if not originals:
+        return {"results": []}
+
+    # 1. Generate all twins up front in columnar form
+    with STAGE_SECONDS.time(stage="twin_generation"):
+        twins = twin_gen.generate_twin_matrix(pd.DataFrame(originals), max_twins)
+        twin_rows = twins.to_records()
+    record_twins(twin_rows)
+    owners = twins.candidate_index.tolist()
+    n = len(originals)
+
+    candidate_twins = [[] for _ in range(n)]
+    for owner, twin in zip(owners, twin_rows):
+        candidate_twins[owner].append(twin)
+
+    # 2. Score originals + twins in one pass (two with adaptive sampling:
+    #    originals first, then only the selected twins)
+    global inflight_requests
+    inflight_requests += n
+    try:
+        with STAGE_SECONDS.time(stage="model_fanout"):
+            if twin_sampler is None:
+                predictions = await model_adapter.predict_batch(originals + twin_rows)
+                original_results = predictions[:n]
+                evaluated = candidate_twins
+                evaluated_predictions = [[] for _ in range(n)]
+                for owner, res in zip(owners, predictions[n:]):
+                    evaluated_predictions[owner].append(res)
+            else:
+                original_results = await model_adapter.predict_batch(originals)
+                pressure = inflight_requests / adaptive_target_inflight
+                selections = [
+                    twin_sampler.select(original_results[idx], candidate_twins[idx], pressure)
+                    for idx in range(n)
+                ]
+                evaluated = [
+                    [twin for twin, keep in zip(candidate_twins[idx], selections[idx]["evaluate"]) if keep]
+                    for idx in range(n)
+                ]
+                selected_rows = [twin for group in evaluated for twin in group]
+                selected_predictions = await model_adapter.predict_batch(selected_rows) if selected_rows else []
+                evaluated_predictions = []
+                offset = 0
+                for group in evaluated:
+                    evaluated_predictions.append(selected_predictions[offset:offset + len(group)])
+                    offset += len(group)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        inflight_requests -= n
+
+    # 3. Check for Bias: every (original, twin) pair at once
+    twins_results = [
+        [{"twin_data": twin, "prediction": res} for twin, res in zip(evaluated[idx], evaluated_predictions[idx])]
+        for idx in range(n)
+    ]
+    with STAGE_SECONDS.time(stage="bias_check"):
+        check = bias_detector.check_results(
+            original_results,
+            [item for group in twins_results for item in group],
+            [idx for idx in range(n) for _ in twins_results[idx]],
+        )
+    record_verification(check)
+
+    results = []
+    for idx in range(n):
+        original_result = original_results[idx]
+        bias_report = check.report(idx, twins_results[idx], text=not compact)
+        if twin_sampler is not None:
+            twin_sampler.observe(original_result, candidate_twins[idx], selections[idx], check.flags[check.twins_of(idx)])
+            skipped = [
+                twin.get("twin_type", "unknown")
+                for twin, keep in zip(candidate_twins[idx], selections[idx]["evaluate"]) if not keep
+            ]
+            for twin_type in skipped:
+                TWINS_SKIPPED.inc(twin_type=twin_type)
+            bias_report["sampling"] = {
+                "audit": selections[idx]["audit"],
+                "twins_generated": len(candidate_twins[idx]),
+                "twins_evaluated": len(evaluated[idx]),
+                "skipped_twin_types": skipped,
+            }
+        request_id = uuid.uuid4().hex
+        if decision_log is not None:
+            decision_log.record(originals[idx], original_result, twins_results[idx], bias_report, request_id)
+        if compact:
+            bias_report.pop("twin_details")
+        results.append({
+            "request_id": request_id,
+            "model_decision": original_result,
+            "verification_report": bias_report
+        })
+
+    return {"results": results}
+
+@app.get("/stats/batcher")
+def get_batcher_stats():
+    """Batch-size histogram and queue-wait statistics for the micro-batcher."""
+    if batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **batcher.metrics.snapshot()}
+
+@app.get("/stats/cache")
+def get_cache_stats():
+    """Hit/miss counters for the prediction cache."""
+    if prediction_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **prediction_cache.stats()}
+
+@app.get("/stats/sampling")
+def get_sampling_stats():
+    """Adaptive twin sampling: model calls saved, estimated recall and flag rates per twin type."""
+    if twin_sampler is None:
+        return {"enabled": False}
+    return {"enabled": True, **twin_sampler.stats()}
+
+@app.get("/stats/shadow")
+def get_shadow_stats():
+    """Shadow verification queue depth, shed and completion counters."""
+    return {"default": shadow_default, **shadow_verifier.stats()}
+
+@app.get("/verifications/{request_id}")
+def get_verification(request_id: str):
+    """
+    Verification status by request id.
+    Recent shadow verifications are answered from memory (queued, running,
+    done, failed or shed); older ones, and synchronous ones, from the decision log.
+    """
+    status = shadow_verifier.status(request_id)
+    if status is not None:
+        return status
+    if decision_log is not None:
+        logged = decision_log.lookup(request_id)
+        if logged is not None:
+            return {"status": "done", "source": "decision_log", **logged}
+    raise HTTPException(status_code=404, detail="Unknown request id.")
+
+@app.get("/decisions/flip_rate")
+def get_flip_rate(window_seconds: int = 3600):
+    """Flip and divergence rates by twin_type over a recent time window."""
+    if decision_log is None:
+        raise HTTPException(status_code=404, detail="Decision log is disabled.")
+    return decision_log.flip_rate_by_twin_type(window_seconds)
+
+@app.get("/decisions/summary")
+def get_decision_summary(window_seconds: int = 3600):
+    """Request volume, positive rate and bias-detected rate over a recent time window."""
+    if decision_log is None:
+        raise HTTPException(status_code=404, detail="Decision log is disabled.")
+    return decision_log.summary(window_seconds)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
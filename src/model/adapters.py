@@ -0,0 +1,170 @@
+import abc
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from src.model.blackbox import hr_model, predict_many
+
+try:
+    import httpx
+except ImportError:
+    logging.warning("httpx not found. HTTPModelAdapter will be unavailable.")
+    httpx = None
+
+logger = logging.getLogger("adapters")
+
+
+class ModelAdapter(abc.ABC):
+    """
+    Async interface the runtime interceptor uses to talk to the HR model.
+
+    Implementations only need `predict`; `predict_batch` defaults to a
+    concurrent fan-out of single predictions.
+    """
+    # Whether identical inputs always produce identical outputs
+    deterministic = False
+
+    @abc.abstractmethod
+    async def predict(self, data: dict):
+        """Returns {'hiring_probability': float, 'decision': int} for one profile."""
+
+    async def predict_batch(self, rows: list):
+        """Returns one prediction dict per row, in order."""
+        return list(await asyncio.gather(*(self.predict(row) for row in rows)))
+
+    async def close(self):
+        """Releases any pooled resources."""
+        pass
+
+
+class ConcurrencyLimitedAdapter(ModelAdapter):
+    """Caps the calls in flight through an adapter; further calls wait for a free slot."""
+    def __init__(self, adapter, max_concurrency):
+        self.adapter = adapter
+        self.deterministic = getattr(adapter, 'deterministic', False)
+        self.max_concurrency = max_concurrency
+        # Created lazily so it binds to the running event loop
+        self._semaphore = None
+
+    def _slot(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def predict(self, data: dict):
+        async with self._slot():
+            return await self.adapter.predict(data)
+
+    async def predict_batch(self, rows: list):
+        async with self._slot():
+            return await self.adapter.predict_batch(rows)
+
+    async def close(self):
+        await self.adapter.close()
+
+
+class LocalModelAdapter(ModelAdapter):
+    """Calls an in-process model directly on the event loop (for cheap models)."""
+    def __init__(self, model):
+        self.model = model
+        self.deterministic = getattr(model, 'deterministic', False)
+
+    async def predict(self, data: dict):
+        return self.model.predict(data)
+
+    async def predict_batch(self, rows: list):
+        return predict_many(self.model, rows)
+
+
+class ThreadPoolModelAdapter(ModelAdapter):
+    """Runs a blocking in-process model on a thread pool so calls can overlap."""
+    def __init__(self, model, max_workers=8):
+        self.model = model
+        self.deterministic = getattr(model, 'deterministic', False)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model")
+
+    async def predict(self, data: dict):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.model.predict, data)
+
+    async def predict_batch(self, rows: list):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, predict_many, self.model, rows)
+
+    async def close(self):
+        self.executor.shutdown(wait=False)
+
+
+class HTTPModelAdapter(ModelAdapter):
+    """
+    Calls a remotely served model over HTTP with a pooled keep-alive client.
+
+    Expects the server to expose `POST /predict` (one profile) and
+    `POST /predict_batch` ({'rows': [...]} -> list of predictions),
+    as implemented by `src.model.stub_server`.
+    """
+    def __init__(self, base_url, max_connections=100, max_keepalive_connections=20, timeout=5.0,
+                 deterministic=False, transport=None):
+        """
+        Args:
+            base_url (str): Root URL of the model server.
+            max_connections (int): Pool size.
+            max_keepalive_connections (int): Idle connections kept open.
+            timeout (float): Per-request timeout in seconds.
+            deterministic (bool): Whether the served model is deterministic.
+            transport (httpx.AsyncBaseTransport): Custom transport, e.g. an
+                httpx.ASGITransport to serve the model in-process.
+        """
+        if httpx is None:
+            raise RuntimeError("httpx is required for HTTPModelAdapter")
+        self.base_url = base_url.rstrip('/')
+        self.deterministic = deterministic
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            transport=transport,
+        )
+
+    async def predict(self, data: dict):
+        response = await self.client.post("/predict", json=data)
+        response.raise_for_status()
+        return response.json()
+
+    async def predict_batch(self, rows: list):
+        if not rows:
+            return []
+        response = await self.client.post("/predict_batch", json={"rows": rows})
+        response.raise_for_status()
+        return response.json()
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def build_model_adapter():
+    """
+    Builds the adapter configured through the environment.
+
+    HR_MODEL_URL      -> HTTPModelAdapter against a remote model server
+    HR_MODEL_THREADS  -> ThreadPoolModelAdapter with that many workers
+    otherwise         -> LocalModelAdapter around the in-process mock model
+    """
+    url = os.environ.get("HR_MODEL_URL")
+    if url:
+        logger.info(f"Using remote HR model at {url}")
+        return HTTPModelAdapter(
+            url,
+            max_connections=int(os.environ.get("HR_MODEL_MAX_CONNECTIONS", 100)),
+            timeout=float(os.environ.get("HR_MODEL_TIMEOUT", 5.0)),
+        )
+
+    threads = os.environ.get("HR_MODEL_THREADS")
+    if threads:
+        return ThreadPoolModelAdapter(hr_model, max_workers=int(threads))
+
+    return LocalModelAdapter(hr_model)
@@ -0,0 +1,141 @@
+import asyncio
+import bisect
+import time
+
+from src.model.adapters import ModelAdapter
+
+
+class BatchMetrics:
+    """
+    Counters for the micro-batcher: a batch-size histogram and queue-wait stats.
+    Histograms use fixed upper-bound buckets; the last bucket is +Inf.
+    """
+    SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+    WAIT_BUCKETS_US = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000)
+
+    def __init__(self):
+        self.batches = 0
+        self.rows = 0
+        self.batch_size_counts = [0] * (len(self.SIZE_BUCKETS) + 1)
+        self.queue_wait_counts = [0] * (len(self.WAIT_BUCKETS_US) + 1)
+        self.queue_wait_sum_us = 0.0
+        self.queue_wait_max_us = 0.0
+        self.flush_reasons = {"size": 0, "deadline": 0, "close": 0}
+
+    def observe_batch(self, size, waits_us, reason):
+        self.batches += 1
+        self.rows += size
+        self.flush_reasons[reason] += 1
+        self.batch_size_counts[bisect.bisect_left(self.SIZE_BUCKETS, size)] += 1
+        for wait in waits_us:
+            self.queue_wait_counts[bisect.bisect_left(self.WAIT_BUCKETS_US, wait)] += 1
+            self.queue_wait_sum_us += wait
+            if wait > self.queue_wait_max_us:
+                self.queue_wait_max_us = wait
+
+    def snapshot(self):
+        """Returns a JSON-friendly view of the metrics."""
+        def histogram(bounds, counts):
+            labels = [str(b) for b in bounds] + ["+Inf"]
+            return dict(zip(labels, counts))
+
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_size": self.rows / self.batches if self.batches else 0.0,
+            "batch_size_histogram": histogram(self.SIZE_BUCKETS, self.batch_size_counts),
+            "queue_wait_us_histogram": histogram(self.WAIT_BUCKETS_US, self.queue_wait_counts),
+            "mean_queue_wait_us": self.queue_wait_sum_us / self.rows if self.rows else 0.0,
+            "max_queue_wait_us": self.queue_wait_max_us,
+            "flush_reasons": dict(self.flush_reasons),
+        }
+
+
+class MicroBatcher(ModelAdapter):
+    """
+    Coalesces predictions from concurrent requests into batched model calls.
+
+    Rows submitted within the same window (originals and twins alike) are
+    queued and flushed as one `predict_batch` call on the wrapped adapter
+    when either `max_batch_size` rows are waiting or the oldest row has
+    waited `max_wait_us` microseconds. Results are routed back to each caller.
+    """
+    def __init__(self, adapter, max_batch_size=64, max_wait_us=2000):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.adapter = adapter
+        self.deterministic = getattr(adapter, 'deterministic', False)
+        self.max_batch_size = max_batch_size
+        self.max_wait_us = max_wait_us
+        self.metrics = BatchMetrics()
+        self._pending = []  # (row, future, enqueued_at)
+        self._timer = None
+        self._inflight = set()
+
+    async def predict(self, data: dict):
+        return (await self.predict_batch([data]))[0]
+
+    async def predict_batch(self, rows: list):
+        if not rows:
+            return []
+
+        loop = asyncio.get_running_loop()
+        now = time.perf_counter()
+        futures = []
+        for row in rows:
+            future = loop.create_future()
+            self._pending.append((row, future, now))
+            futures.append(future)
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush("size")
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_us / 1e6, self._flush, "deadline")
+
+        return list(await asyncio.gather(*futures))
+
+    def _flush(self, reason):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        # Dispatch full batches; a partial remainder only goes out on deadline/close
+        while self._pending and (len(self._pending) >= self.max_batch_size or reason != "size"):
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            task = asyncio.ensure_future(self._run_batch(batch, reason))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+        if self._pending:
+            # Keep the deadline anchored to the oldest row still waiting
+            oldest = self._pending[0][2]
+            delay = max(0.0, oldest + self.max_wait_us / 1e6 - time.perf_counter())
+            self._timer = asyncio.get_running_loop().call_later(delay, self._flush, "deadline")
+
+    async def _run_batch(self, batch, reason):
+        started = time.perf_counter()
+        self.metrics.observe_batch(
+            len(batch),
+            [(started - enqueued_at) * 1e6 for _, _, enqueued_at in batch],
+            reason,
+        )
+
+        try:
+            results = await self.adapter.predict_batch([row for row, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self):
+        if self._pending:
+            self._flush("close")
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        await self.adapter.close()
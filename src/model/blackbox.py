@@ -1,6 +1,11 @@
 import random
+import numpy as np
+import pandas as pd
 
 class MockHRModel:
+    # predict() adds random noise, so identical inputs may score differently
+    deterministic = False
+
     def __init__(self):
         pass
 
@@ -51,5 +56,64 @@ class MockHRModel:
             "decision": int(decision)
         }
 
+    def predict_batch(self, rows):
+        """
+        Vectorized version of `predict` for many candidates at once.
+
+        Args:
+            rows (list[dict] | pd.DataFrame): Candidate profiles, one per row.
+
+        Returns:
+            dict: {'hiring_probability': np.ndarray, 'decision': np.ndarray},
+                  aligned with the input rows.
+        """
+        df = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(list(rows))
+        n = len(df)
+
+        def column(name, default):
+            if name not in df.columns:
+                return np.full(n, default, dtype=float)
+            return df[name].fillna(default).to_numpy(dtype=float)
+
+        age = column('age', 30)
+        experience = column('experience', 5)
+        education = column('education', 1)
+        gender = column('gender', 0)
+
+        # Same scoring rules as `predict`, applied column-wise
+        score = education * 10 + experience * 2
+        score -= np.where(age > 50, 20, 0)
+        score -= np.where(gender == 1, 10, 0)
+
+        noise = np.random.uniform(-5, 5, n)
+        probability = np.clip((score + noise) / 80.0, 0.0, 1.0)
+        decision = (probability > 0.5).astype(int)
+
+        return {
+            "hiring_probability": probability,
+            "decision": decision
+        }
+
 # Global instance
 hr_model = MockHRModel()
+
+def predict_many(model, rows):
+    """
+    Scores a list of profiles with any model.
+    Uses the model's vectorized `predict_batch` when available, otherwise
+    falls back to one `predict` call per row.
+
+    Returns:
+        list[dict]: One {'hiring_probability', 'decision'} dict per row.
+    """
+    if not rows:
+        return []
+
+    if hasattr(model, 'predict_batch'):
+        batch = model.predict_batch(rows)
+        return [
+            {"hiring_probability": float(p), "decision": int(d)}
+            for p, d in zip(batch['hiring_probability'], batch['decision'])
+        ]
+
+    return [model.predict(row) for row in rows]
@@ -0,0 +1,120 @@
+import time
+from collections import OrderedDict
+
+from src.model.adapters import ModelAdapter
+
+_MISSING = object()
+
+
+class PredictionCache:
+    """
+    Bounded prediction cache with LRU eviction and an optional TTL.
+
+    Args:
+        max_size (int): Maximum number of entries; least recently used are evicted first.
+        ttl_seconds (float): Entry lifetime. None means entries never expire.
+    """
+    def __init__(self, max_size=10000, ttl_seconds=None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (value, stored_at)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+
+        value, stored_at = entry
+        if self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class CachedModelAdapter(ModelAdapter):
+    """
+    Memoizes model predictions keyed on the profile's feature values.
+
+    Caching only applies when the model is deterministic: non-deterministic
+    models (like MockHRModel, which adds random noise) bypass the cache
+    unless `deterministic=True` is forced explicitly.
+    """
+    def __init__(self, adapter, cache=None, key_fields=('age', 'experience', 'education', 'gender'),
+                 deterministic=None):
+        self.adapter = adapter
+        self.cache = cache if cache is not None else PredictionCache()
+        self.key_fields = tuple(key_fields)
+        self.deterministic = getattr(adapter, 'deterministic', False) if deterministic is None else deterministic
+        self.bypassed = 0
+
+    def _key(self, row):
+        return tuple(row.get(field) for field in self.key_fields)
+
+    async def predict(self, data: dict):
+        return (await self.predict_batch([data]))[0]
+
+    async def predict_batch(self, rows: list):
+        if not self.deterministic:
+            self.bypassed += len(rows)
+            return await self.adapter.predict_batch(rows)
+
+        keys = [self._key(row) for row in rows]
+        results = [self.cache.get(key, _MISSING) for key in keys]
+
+        # Only send each distinct missing profile to the model once
+        missing = {}
+        for row, key, result in zip(rows, keys, results):
+            if result is _MISSING and key not in missing:
+                missing[key] = row
+
+        if missing:
+            fresh = await self.adapter.predict_batch(list(missing.values()))
+            fresh = dict(zip(missing.keys(), fresh))
+            for key, value in fresh.items():
+                self.cache.put(key, value)
+            results = [fresh[key] if result is _MISSING else result for key, result in zip(keys, results)]
+
+        # Hand out copies so callers cannot mutate cached entries
+        return [dict(result) for result in results]
+
+    def stats(self):
+        return {"deterministic": self.deterministic, "bypassed": self.bypassed, **self.cache.stats()}
+
+    async def close(self):
+        await self.adapter.close()
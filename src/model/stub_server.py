@@ -0,0 +1,38 @@
+"""
+Minimal HTTP server exposing the mock HR model, used to exercise
+HTTPModelAdapter locally.
+
+    STUB_LATENCY_MS=50 uvicorn src.model.stub_server:app --port 8001
+    HR_MODEL_URL=http://localhost:8001 uvicorn src.main:app
+"""
+import asyncio
+import os
+from typing import Any, Dict, List
+
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from src.model.blackbox import hr_model, predict_many
+
+app = FastAPI(title="HR Model Stub", version="1.0")
+
+# Simulated network/model latency per call
+LATENCY_SECONDS = float(os.environ.get("STUB_LATENCY_MS", 0)) / 1000.0
+
+
+class BatchInput(BaseModel):
+    rows: List[Dict[str, Any]]
+
+
+@app.post("/predict")
+async def predict(data: Dict[str, Any]):
+    if LATENCY_SECONDS:
+        await asyncio.sleep(LATENCY_SECONDS)
+    return hr_model.predict(data)
+
+
+@app.post("/predict_batch")
+async def predict_batch(batch: BatchInput):
+    if LATENCY_SECONDS:
+        await asyncio.sleep(LATENCY_SECONDS)
+    return predict_many(hr_model, batch.rows)
@@ -0,0 +1,334 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+
+def _column_positions(df, columns):
+    """Integer positions of `columns` in `df`; raises ValueError naming any that are missing."""
+    positions = df.columns.get_indexer(columns)
+    missing = [column for column, position in zip(columns, positions) if position < 0]
+    if missing:
+        raise ValueError(f"Columns not found in data: {', '.join(map(str, missing))}")
+    return positions
+
+
+class PerturbationEngine:
+    """
+    Counterfactual perturbation testing for a (possibly multi-valued) protected attribute.
+
+    Every selected row is paired with each alternative value of the attribute,
+    and all counterfactuals are scored as one stacked batch. Only the columns
+    the model needs are gathered, and only the protected column is rewritten.
+    """
+    def __init__(self, model_predict_fn, protected_attribute, feature_columns=None):
+        """
+        Args:
+            model_predict_fn (callable): Takes a DataFrame and returns predictions.
+            protected_attribute (str): Column to perturb.
+            feature_columns (list): Columns the model reads. None passes every column.
+        """
+        self.model_predict_fn = model_predict_fn
+        self.protected_attribute = protected_attribute
+        self.feature_columns = feature_columns
+
+    def _columns(self, df):
+        if self.feature_columns is None:
+            return list(df.columns)
+        columns = list(self.feature_columns)
+        if self.protected_attribute not in columns:
+            columns.append(self.protected_attribute)
+        return columns
+
+    def build_counterfactuals(self, df, positions, target_values):
+        """
+        Stacks one counterfactual per (row, alternative value) pair
+        (see `CounterfactualBuilder.pairs`).
+
+        Args:
+            df (pd.DataFrame): Source data.
+            positions (np.ndarray): Integer row positions to perturb.
+            target_values (list): Values to try; a row is skipped for its own value.
+
+        Returns:
+            tuple: (stacked DataFrame, row number within `positions` for each counterfactual,
+                    index into `target_values` for each counterfactual)
+        """
+        builder = CounterfactualBuilder(self.protected_attribute, kind="categorical", values=target_values)
+        return builder.pairs(df, positions, self._columns(df))
+
+    def _sample(self, df, candidates, sample_size, stratify, rng):
+        """Returns (positions, stratum label per position, population size per stratum)."""
+        strata = df[self.protected_attribute].to_numpy()[candidates] if stratify else np.zeros(len(candidates))
+        codes, labels = pd.factorize(strata)
+        population = np.bincount(codes, minlength=len(labels))
+
+        if sample_size is None or sample_size >= len(candidates):
+            return candidates, codes, population
+
+        # Proportional allocation, at least one row per stratum
+        allocation = np.maximum(1, np.round(sample_size * population / population.sum()).astype(int))
+        allocation = np.minimum(allocation, population)
+
+        chosen = []
+        for code, take in enumerate(allocation):
+            members = np.flatnonzero(codes == code)
+            chosen.append(rng.choice(members, size=take, replace=False))
+        chosen = np.sort(np.concatenate(chosen))
+        return candidates[chosen], codes[chosen], population
+
+    def run(self, df, source_values=None, target_values=None, sample_size=None, stratify=True,
+            confidence=0.95, random_state=None):
+        """
+        Runs the perturbation test.
+
+        Args:
+            df (pd.DataFrame): Data to test.
+            source_values (list): Only perturb rows with these attribute values (None = all rows).
+            target_values (list): Values to substitute (None = every observed value).
+            sample_size (int): Test a stratified sample of this many rows instead of all rows.
+            stratify (bool): Stratify the sample by the current attribute value.
+            confidence (float): Confidence level of the flip-rate interval.
+            random_state (int): Seed for sampling.
+
+        Returns:
+            dict: Flip rate with confidence interval, flipped row labels and per-target flip rates.
+        """
+        column = df[self.protected_attribute]
+        if source_values is None:
+            candidates = np.flatnonzero(column.notna().to_numpy())
+        else:
+            candidates = np.flatnonzero(column.isin(source_values).to_numpy())
+
+        if target_values is None:
+            target_values = column.dropna().unique().tolist()
+        target_values = list(dict.fromkeys(target_values))
+
+        if len(candidates) == 0:
+            return {"flip_rate": 0.0, "flipped_indices": []}
+
+        rng = np.random.default_rng(random_state)
+        positions, strata, population = self._sample(df, candidates, sample_size, stratify, rng)
+
+        originals = np.asarray(self.model_predict_fn(
+            df.iloc[positions, _column_positions(df, self._columns(df))]
+        ))
+        stacked, row_ids, target_ids = self.build_counterfactuals(df, positions, target_values)
+        if len(stacked):
+            counterfactual = np.asarray(self.model_predict_fn(stacked))
+        else:
+            counterfactual = originals[:0]
+
+        pair_flipped = originals[row_ids] != counterfactual
+        row_flipped = np.bincount(row_ids[pair_flipped], minlength=len(positions)) > 0
+
+        flip_rate, interval = self._stratified_estimate(row_flipped, strata, population, confidence)
+
+        pairs = np.bincount(target_ids, minlength=len(target_values))
+        pair_flips = np.bincount(target_ids, weights=pair_flipped, minlength=len(target_values))
+        per_target = {
+            str(value): {
+                "analyzed_count": int(pairs[i]),
+                "flip_rate": float(pair_flips[i] / pairs[i])
+            }
+            for i, value in enumerate(target_values) if pairs[i]
+        }
+
+        return {
+            "flip_rate": flip_rate,
+            "flipped_indices": df.index[positions[row_flipped]].tolist(),
+            "analyzed_count": int(len(positions)),
+            "population_count": int(len(candidates)),
+            "sampled": bool(len(positions) < len(candidates)),
+            "confidence_interval": interval,
+            "per_target": per_target
+        }
+
+    @staticmethod
+    def _stratified_estimate(row_flipped, strata, population, confidence):
+        """Stratified flip-rate estimate with a normal-approximation interval (with FPC)."""
+        sampled = np.bincount(strata, minlength=len(population)).astype(float)
+        flips = np.bincount(strata, weights=row_flipped, minlength=len(population))
+
+        present = sampled > 0
+        weights = population[present] / population[present].sum()
+        rates = flips[present] / sampled[present]
+        n = sampled[present]
+        fpc = 1 - n / population[present]
+
+        estimate = float(np.sum(weights * rates))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance = np.sum(np.where(n > 1, weights ** 2 * rates * (1 - rates) / np.maximum(n - 1, 1) * fpc, 0.0))
+        z = stats.norm.ppf(0.5 + confidence / 2)
+        margin = float(z * np.sqrt(variance))
+        return estimate, [max(0.0, estimate - margin), min(1.0, estimate + margin)]
+
+
+class CounterfactualBuilder:
+    """
+    Builds counterfactual datasets by rewriting only the protected column.
+
+    Values are mapped through integer codes (no per-row Python calls), and each
+    counterfactual is a shallow copy of the input with just that column
+    replaced, so the other columns are shared rather than copied.
+
+    Kinds:
+        binary       swap the two values (one variant, 'flip')
+        categorical  set every row to each value in turn (one variant per value, 'to_<value>')
+        ordinal      move each row by the given steps along the ordered values, clipped
+                     at the ends (one variant per step, 'shift_+1', 'shift_-1', ...)
+
+    Values outside the domain (and missing values) are left unchanged.
+    """
+    KINDS = ("binary", "categorical", "ordinal")
+
+    def __init__(self, protected_attribute, kind="binary", values=None, steps=(-1, 1)):
+        """
+        Args:
+            protected_attribute (str): Column to rewrite.
+            kind (str): 'binary', 'categorical' or 'ordinal'.
+            values (list): The attribute's domain, in order for 'ordinal'.
+                None uses the sorted distinct values of the data.
+            steps (tuple): Level shifts tried for 'ordinal'.
+        """
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown kind '{kind}'. Use one of: {', '.join(self.KINDS)}")
+        self.protected_attribute = protected_attribute
+        self.kind = kind
+        self.values = list(dict.fromkeys(values)) if values is not None else None
+        self.steps = tuple(steps)
+
+    def _domain(self, column):
+        values = self.values if self.values is not None else sorted(column.dropna().unique().tolist())
+        if self.kind == "binary" and len(values) != 2:
+            raise ValueError(f"Binary attribute '{self.protected_attribute}' needs exactly 2 values, got {values}")
+        return pd.array(values, dtype=column.dtype)
+
+    def variants(self, column):
+        """
+        Returns [(variant name, lookup table)], where the table maps each domain
+        code to its counterfactual code.
+        """
+        domain = self._domain(column)
+        k = len(domain)
+        if self.kind == "binary":
+            return [("flip", np.array([1, 0]))]
+        if self.kind == "categorical":
+            return [(f"to_{domain[t]}", np.full(k, t)) for t in range(k)]
+        return [(f"shift_{step:+d}", np.clip(np.arange(k) + step, 0, k - 1)) for step in self.steps]
+
+    def _codes(self, column):
+        domain = self._domain(column)
+        return domain, pd.Index(domain).get_indexer(column.to_numpy())
+
+    @staticmethod
+    def _apply(codes, lut):
+        """New codes under `lut` and the mask of rows whose value actually changes."""
+        valid = codes >= 0
+        new_codes = np.where(valid, lut[np.maximum(codes, 0)], codes)
+        return new_codes, valid & (new_codes != codes)
+
+    def _take(self, df, positions, columns, values):
+        """One take of `columns` at row `positions`, with only the protected column rewritten."""
+        if columns is None:
+            columns = list(df.columns)
+        elif self.protected_attribute not in columns:
+            columns = list(columns) + [self.protected_attribute]
+        stacked = df.iloc[positions, _column_positions(df, columns)]
+        stacked[self.protected_attribute] = values
+        return stacked
+
+    def pairs(self, df, positions, columns=None):
+        """
+        Pairs each row at `positions` with every domain value other than its own
+        (rows outside the domain get all of them), stacked for one model call.
+
+        Args:
+            df (pd.DataFrame): Source data.
+            positions (np.ndarray): Integer row positions to perturb.
+            columns (list): Columns to keep (the protected column is always kept).
+
+        Returns:
+            tuple: (stacked DataFrame, row number within `positions` for each counterfactual,
+                    index into the domain for each counterfactual)
+        """
+        column = df[self.protected_attribute]
+        domain = self._domain(column)
+
+        # (rows x values) grid on integer codes, keeping only pairs that change the value
+        current = pd.Index(domain).get_indexer(column.to_numpy()[positions])
+        mask = current[:, None] != np.arange(len(domain))[None, :]
+        row_ids, target_ids = np.nonzero(mask)
+
+        stacked = self._take(df, positions[row_ids], columns, domain.take(target_ids))
+        return stacked, row_ids, target_ids
+
+    def flipped(self, df, variant=0):
+        """
+        One counterfactual view of `df`.
+
+        Args:
+            df (pd.DataFrame): Source data (never modified).
+            variant (int | str): Position or name of the variant.
+
+        Returns:
+            pd.DataFrame: Shallow copy with the protected column replaced.
+        """
+        column = df[self.protected_attribute]
+        variants = self.variants(column)
+        if isinstance(variant, str):
+            names = [name for name, _ in variants]
+            if variant not in names:
+                raise ValueError(f"Unknown variant '{variant}'. Available: {', '.join(names)}")
+            variant = names.index(variant)
+
+        domain, codes = self._codes(column)
+        new_codes, changed = self._apply(codes, variants[variant][1])
+
+        values = column.array.copy()
+        values[changed] = domain.take(new_codes[changed])
+
+        out = df.copy(deep=False)
+        out[self.protected_attribute] = values
+        return out
+
+    def views(self, df):
+        """Every counterfactual variant as {variant name: DataFrame}."""
+        names = [name for name, _ in self.variants(df[self.protected_attribute])]
+        return {name: self.flipped(df, i) for i, name in enumerate(names)}
+
+    def stacked(self, df, columns=None, drop_unchanged=True):
+        """
+        All variants stacked into one frame for a single batched model call.
+
+        Args:
+            df (pd.DataFrame): Source data.
+            columns (list): Columns to keep (the protected column is always kept).
+            drop_unchanged (bool): Skip rows a variant leaves as they are
+                (e.g. rows already at the target value).
+
+        Returns:
+            pd.DataFrame: Indexed by (variant, original row label).
+        """
+        column = df[self.protected_attribute]
+        domain, codes = self._codes(column)
+
+        positions, targets, labels = [], [], []
+        for name, lut in self.variants(column):
+            new_codes, changed = self._apply(codes, lut)
+            rows = np.flatnonzero(changed) if drop_unchanged else np.arange(len(df))
+            positions.append(rows)
+            targets.append(new_codes[rows])
+            labels.append(np.full(len(rows), name, dtype=object))
+
+        positions = np.concatenate(positions)
+        targets = np.concatenate(targets)
+
+        # One take for all variants; only the protected column is rewritten
+        values = column.array.take(positions)
+        valid = targets >= 0
+        values[valid] = domain.take(targets[valid])
+        stacked = self._take(df, positions, columns, values)
+        stacked.index = pd.MultiIndex.from_arrays(
+            [np.concatenate(labels), df.index[positions]], names=["variant", df.index.name]
+        )
+        return stacked
@@ -0,0 +1,197 @@
+import logging
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.screen import CorrelationAccumulator, ReferenceSketch
+from src.utils import generate_synthetic_data
+
+logger = logging.getLogger("reference")
+
+SORTED_DIR = "_sorted"
+# Name of the file in an export directory that points at the current version
+MANIFEST = "CURRENT"
+# Versions kept in an export directory (older ones are removed on export)
+KEEP_VERSIONS = 2
+
+
+def export_memmap(df, directory):
+    """
+    Writes a reference DataFrame as one .npy file per column, plus pre-sorted
+    copies of the numeric columns, for zero-copy loading with `mmap_mode='r'`.
+
+    Every export goes to a new version subdirectory and is published by
+    atomically replacing the `CURRENT` manifest, so files that running
+    workers have memory-mapped are never rewritten in place.
+
+    Returns:
+        str: The version subdirectory that was written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    version = f"v{time.time_ns()}"
+    staging = os.path.join(directory, f".{version}.tmp")
+    os.makedirs(os.path.join(staging, SORTED_DIR))
+    for column in df.columns:
+        values = df[column].to_numpy()
+        np.save(os.path.join(staging, f"{column}.npy"), values)
+        if np.issubdtype(values.dtype, np.number):
+            sorted_values = np.sort(values[~np.isnan(values.astype(float))].astype(float))
+            np.save(os.path.join(staging, SORTED_DIR, f"{column}.npy"), sorted_values)
+    os.rename(staging, os.path.join(directory, version))
+
+    manifest = os.path.join(directory, MANIFEST)
+    with open(manifest + ".tmp", "w") as f:
+        f.write(version)
+    os.replace(manifest + ".tmp", manifest)
+
+    # Unlinking is safe for readers that still map the old files; their pages stay valid
+    versions = sorted(name for name in os.listdir(directory) if name.startswith("v"))
+    for old in versions[:-KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+    return os.path.join(directory, version)
+
+
+def _current_version_dir(directory):
+    """The directory holding the current columns: the manifest's version, or `directory` itself (flat layout)."""
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            return os.path.join(directory, f.read().strip())
+    except FileNotFoundError:
+        return directory
+
+
+class ReferenceDataset:
+    """
+    One immutable version of the reference data with everything screening
+    needs precomputed: per-feature sorted arrays, summary statistics and the
+    proxy-correlation moments against the protected attribute.
+    """
+    def __init__(self, data, protected_attribute, version, source, presorted=None):
+        self.data = data
+        self.version = version
+        self.source = source
+        self.loaded_at = time.time()
+
+        # Memory-mapped sorted columns (if exported) replace the in-memory sort
+        self.sketch = ReferenceSketch(data, presorted=presorted)
+
+        features = [f for f in self.sketch.features if f != protected_attribute]
+        self.proxy_moments = CorrelationAccumulator.from_batch(data, features, protected_attribute)
+        self.summary = {
+            feature: {
+                "count": int(len(values)),
+                "mean": float(values.mean()) if len(values) else None,
+                "std": float(values.std(ddof=1)) if len(values) > 1 else None,
+                "min": float(values[0]) if len(values) else None,
+                "median": float(np.median(values)) if len(values) else None,
+                "max": float(values[-1]) if len(values) else None,
+            }
+            for feature, values in self.sketch.sorted_values.items()
+        }
+
+    def __len__(self):
+        return len(self.data)
+
+
+class ReferenceDataManager:
+    """
+    Lazily loads the reference dataset and hot-swaps new versions.
+
+    Sources:
+        *.parquet            read with memory mapping
+        directory of *.npy   opened with mmap_mode='r' (shared page cache across workers)
+        None                 synthetic data (demo default)
+
+    The source is checked for changes at most every `check_interval` seconds
+    (the `CURRENT` manifest of an export directory, otherwise the newest file
+    modification time); a changed source is reloaded on the next access, so
+    every worker picks up a new version without a restart.
+    """
+    def __init__(self, path=None, protected_attribute='gender', check_interval=5.0):
+        self.path = path
+        self.protected_attribute = protected_attribute
+        self.check_interval = check_interval
+        self._dataset = None
+        self._version = 0
+        self._mtime = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Returns the current ReferenceDataset, loading it on first use."""
+        dataset = self._dataset
+        if dataset is None:
+            with self._lock:
+                if self._dataset is None:
+                    self._swap(self.path)
+                dataset = self._dataset
+        elif self.path and time.monotonic() - self._last_check >= self.check_interval:
+            self._last_check = time.monotonic()
+            if self._source_mtime(self.path) != self._mtime:
+                with self._lock:
+                    # Another thread may have reloaded this version while we waited
+                    if self._source_mtime(self.path) != self._mtime:
+                        self._swap(self.path)
+                    dataset = self._dataset
+        return dataset
+
+    def reload(self, path=None):
+        """Loads a new reference version and swaps it in atomically."""
+        with self._lock:
+            self._swap(path if path is not None else self.path)
+            return self._dataset
+
+    def _swap(self, path):
+        data, presorted = self._load(path)
+        self._version += 1
+        dataset = ReferenceDataset(data, self.protected_attribute, self._version, path or "synthetic", presorted)
+        self.path = path
+        self._mtime = self._source_mtime(path) if path else None
+        self._last_check = time.monotonic()
+        # Single reference assignment: readers see either the old or the new version
+        self._dataset = dataset
+        logger.info(f"Reference data v{dataset.version} loaded from {dataset.source} ({len(dataset)} rows)")
+
+    @staticmethod
+    def _source_mtime(path):
+        """Change token of a source; for directories the newest mtime of the manifest and column files."""
+        try:
+            if not os.path.isdir(path):
+                return os.stat(path).st_mtime_ns
+            # A directory's own mtime does not change when a file in it is rewritten in place
+            with os.scandir(path) as entries:
+                return max([os.stat(path).st_mtime_ns] + [
+                    entry.stat().st_mtime_ns for entry in entries
+                    if entry.name == MANIFEST or entry.name.endswith(".npy")
+                ])
+        except OSError:
+            return None
+
+    @staticmethod
+    def _load(path):
+        if path is None:
+            return generate_synthetic_data(n_samples=2000, bias_level=0.5), None
+
+        if os.path.isdir(path):
+            path = _current_version_dir(path)
+            columns = {
+                name[:-4]: np.load(os.path.join(path, name), mmap_mode='r')
+                for name in sorted(os.listdir(path)) if name.endswith(".npy")
+            }
+            presorted = {}
+            sorted_dir = os.path.join(path, SORTED_DIR)
+            if os.path.isdir(sorted_dir):
+                presorted = {
+                    name[:-4]: np.load(os.path.join(sorted_dir, name), mmap_mode='r')
+                    for name in os.listdir(sorted_dir) if name.endswith(".npy")
+                }
+            return pd.DataFrame(columns, copy=False), presorted
+
+        if path.endswith((".parquet", ".pq")):
+            return pd.read_parquet(path, memory_map=True), None
+
+        raise ValueError(f"Unsupported reference source '{path}'. Use Parquet or a directory of .npy files.")
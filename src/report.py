@@ -11,8 +11,8 @@ except ImportError:
     lime = None
 
 class BiasReporter:
-    def __init__(self):
-        self.report_data = {}
+    def __init__(self, report_data=None):
+        self.report_data = dict(report_data) if report_data else {}
 
     def add_audit_results(self, audit_results):
         """
@@ -0,0 +1,168 @@
+import json
+import sqlite3
+import time
+
+import numpy as np
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tenants (
+    tenant TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS report_sections (
+    tenant TEXT NOT NULL,
+    section TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    created REAL NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (tenant, section, version)
+);
+"""
+
+
+class ReportVersionConflict(Exception):
+    """Raised when a write expected an older tenant version than the stored one."""
+    pass
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class ReportStore:
+    """
+    Tenant-scoped, versioned store for scorecard sections.
+
+    Backed by SQLite in WAL mode, so several uvicorn worker processes can share
+    one file: writes take an IMMEDIATE transaction (serialized across processes)
+    and bump the tenant's version, reads see a consistent snapshot. Retention is
+    bounded per section, per payload and by number of tenants.
+    """
+    def __init__(self, path, max_versions=5, max_tenants=1000, max_payload_bytes=5_000_000):
+        """
+        Args:
+            path (str): SQLite database file.
+            max_versions (int): Versions kept per (tenant, section).
+            max_tenants (int): Least recently updated tenants beyond this are evicted.
+            max_payload_bytes (int): Largest accepted serialized section.
+        """
+        self.path = path
+        self.max_versions = max_versions
+        self.max_tenants = max_tenants
+        self.max_payload_bytes = max_payload_bytes
+
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        # Autocommit mode; transactions are opened explicitly below
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    def put_section(self, tenant, section, payload, expected_version=None):
+        """
+        Stores a new version of one scorecard section.
+
+        Args:
+            tenant (str): Tenant or session id.
+            section (str): e.g. 'historical_audit', 'screening_checks'.
+            payload (dict): JSON-serializable results.
+            expected_version (int): Optional optimistic-concurrency check against the tenant version.
+
+        Returns:
+            int: The tenant's new version.
+        """
+        body = json.dumps(payload, default=_json_default)
+        if len(body) > self.max_payload_bytes:
+            raise ValueError(f"Report section '{section}' exceeds {self.max_payload_bytes} bytes")
+
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT version FROM tenants WHERE tenant = ?", (tenant,)).fetchone()
+                current = row[0] if row else 0
+                if expected_version is not None and expected_version != current:
+                    raise ReportVersionConflict(
+                        f"Tenant '{tenant}' is at version {current}, expected {expected_version}"
+                    )
+
+                version = current + 1
+                conn.execute(
+                    "INSERT INTO tenants VALUES (?, ?, ?) ON CONFLICT(tenant) DO UPDATE SET "
+                    "version = excluded.version, updated = excluded.updated",
+                    (tenant, version, now),
+                )
+                conn.execute(
+                    "INSERT INTO report_sections VALUES (?, ?, ?, ?, ?)",
+                    (tenant, section, version, now, body),
+                )
+
+                # Retention: keep the newest versions of this section only
+                conn.execute(
+                    "DELETE FROM report_sections WHERE tenant = ? AND section = ? AND version NOT IN "
+                    "(SELECT version FROM report_sections WHERE tenant = ? AND section = ? "
+                    "ORDER BY version DESC LIMIT ?)",
+                    (tenant, section, tenant, section, self.max_versions),
+                )
+                self._evict_tenants(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+        return version
+
+    def _evict_tenants(self, conn):
+        stale = conn.execute(
+            "SELECT tenant FROM tenants ORDER BY updated DESC LIMIT -1 OFFSET ?",
+            (self.max_tenants,),
+        ).fetchall()
+        for (tenant,) in stale:
+            conn.execute("DELETE FROM report_sections WHERE tenant = ?", (tenant,))
+            conn.execute("DELETE FROM tenants WHERE tenant = ?", (tenant,))
+
+    def get_report(self, tenant):
+        """
+        Returns (version, {section: latest payload}) from one consistent snapshot.
+        Unknown tenants return (0, {}).
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN")
+            row = conn.execute("SELECT version FROM tenants WHERE tenant = ?", (tenant,)).fetchone()
+            rows = conn.execute(
+                "SELECT section, payload FROM report_sections s WHERE tenant = ? AND version = "
+                "(SELECT MAX(version) FROM report_sections WHERE tenant = s.tenant AND section = s.section)",
+                (tenant,),
+            ).fetchall()
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+        return (row[0] if row else 0), {section: json.loads(payload) for section, payload in rows}
+
+    def history(self, tenant, section):
+        """Lists the retained versions of a section, newest first."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT version, created FROM report_sections WHERE tenant = ? AND section = ? "
+                "ORDER BY version DESC",
+                (tenant, section),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [{"version": version, "created": created} for version, created in rows]
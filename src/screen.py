@@ -1,3 +1,6 @@
+import threading
+from collections import deque
+
 import pandas as pd
 import numpy as np
 from scipy import stats
@@ -96,3 +99,306 @@ class DataScreener:
         
         # Placeholder logic
         return flags
+
+
+class ReferenceSketch:
+    """
+    Per-feature sorted reference values, computed once.
+
+    With `max_points` set, each feature is compressed to that many evenly spaced
+    quantiles, bounding memory and lookup cost for very large reference sets.
+    """
+    def __init__(self, reference_data, features=None, max_points=None, presorted=None):
+        """
+        Args:
+            reference_data (pd.DataFrame): Reference rows.
+            features (list): Features to sketch. Defaults to all numerical columns.
+            max_points (int): Compress each feature to this many quantiles.
+            presorted (dict): Feature -> already sorted float array (e.g. memory-mapped), reused as-is.
+        """
+        if features is None:
+            features = reference_data.select_dtypes(include=[np.number]).columns.tolist()
+        presorted = presorted or {}
+
+        self.sorted_values = {}
+        self.sizes = {}
+        for feature in features:
+            if feature in presorted:
+                values = presorted[feature]
+            else:
+                values = np.sort(reference_data[feature].dropna().to_numpy(dtype=float))
+            self.sizes[feature] = len(values)
+            if max_points is not None and len(values) > max_points:
+                values = np.quantile(values, np.linspace(0, 1, max_points))
+            self.sorted_values[feature] = values
+
+    @property
+    def features(self):
+        return list(self.sorted_values)
+
+    def ks_test(self, feature, live_sorted):
+        """
+        Two-sample KS statistic between the reference and a sorted live sample.
+
+        The reference ECDF only needs to be evaluated just before and at each
+        live point, so the cost is O(m log n) for m live rows instead of a
+        full sort of both samples. P-values use the asymptotic distribution.
+        """
+        ref = self.sorted_values[feature]
+        m = len(live_sorted)
+        if m == 0 or len(ref) == 0:
+            return 0.0, 1.0
+
+        ref_at = np.searchsorted(ref, live_sorted, side='right') / len(ref)
+        ref_before = np.searchsorted(ref, live_sorted, side='left') / len(ref)
+        live_at = np.searchsorted(live_sorted, live_sorted, side='right') / m
+        live_before = np.searchsorted(live_sorted, live_sorted, side='left') / m
+
+        stat = float(max(np.abs(ref_at - live_at).max(), np.abs(ref_before - live_before).max()))
+
+        n = self.sizes[feature]
+        en = n * m / (n + m)
+        p_value = float(np.clip(stats.kstwo.sf(stat, np.round(en)), 0.0, 1.0))
+        return stat, p_value
+
+
+class CorrelationAccumulator:
+    """
+    Mergeable running covariance of several features against one target column.
+
+    Keeps Welford/Chan-style moments per feature (pairwise-complete, like
+    `DataFrame.corr`), so a batch is folded in with O(batch x features) work
+    and two accumulators can be merged exactly.
+    """
+    def __init__(self, features):
+        self.features = list(features)
+        size = len(self.features)
+        self.n = np.zeros(size)
+        self.mean_x = np.zeros(size)
+        self.mean_y = np.zeros(size)
+        self.m2_x = np.zeros(size)
+        self.m2_y = np.zeros(size)
+        self.c_xy = np.zeros(size)
+
+    @classmethod
+    def from_batch(cls, batch, features, target):
+        acc = cls(features)
+        if target not in batch.columns or len(batch) == 0:
+            return acc
+
+        y = batch[target].to_numpy(dtype=float)
+        x = np.column_stack([
+            batch[f].to_numpy(dtype=float) if f in batch.columns else np.full(len(batch), np.nan)
+            for f in acc.features
+        ])
+        y = np.broadcast_to(y[:, None], x.shape)
+        mask = ~(np.isnan(x) | np.isnan(y))
+
+        n = mask.sum(axis=0).astype(float)
+        safe_n = np.where(n > 0, n, 1)
+        x0 = np.where(mask, x, 0.0)
+        y0 = np.where(mask, y, 0.0)
+        mean_x = x0.sum(axis=0) / safe_n
+        mean_y = y0.sum(axis=0) / safe_n
+        dx = np.where(mask, x - mean_x, 0.0)
+        dy = np.where(mask, y - mean_y, 0.0)
+
+        acc.n = n
+        acc.mean_x = mean_x
+        acc.mean_y = mean_y
+        acc.m2_x = (dx * dx).sum(axis=0)
+        acc.m2_y = (dy * dy).sum(axis=0)
+        acc.c_xy = (dx * dy).sum(axis=0)
+        return acc
+
+    def merge(self, other):
+        """Returns a new accumulator equivalent to having seen both inputs."""
+        out = CorrelationAccumulator(self.features)
+        n = self.n + other.n
+        safe_n = np.where(n > 0, n, 1)
+        dx = other.mean_x - self.mean_x
+        dy = other.mean_y - self.mean_y
+        weight = self.n * other.n / safe_n
+
+        out.n = n
+        out.mean_x = self.mean_x + dx * other.n / safe_n
+        out.mean_y = self.mean_y + dy * other.n / safe_n
+        out.m2_x = self.m2_x + other.m2_x + dx * dx * weight
+        out.m2_y = self.m2_y + other.m2_y + dy * dy * weight
+        out.c_xy = self.c_xy + other.c_xy + dx * dy * weight
+        return out
+
+    def decayed(self, factor):
+        """Returns a copy whose history is down-weighted by `factor` (means are unchanged)."""
+        out = CorrelationAccumulator(self.features)
+        out.mean_x = self.mean_x.copy()
+        out.mean_y = self.mean_y.copy()
+        out.n = self.n * factor
+        out.m2_x = self.m2_x * factor
+        out.m2_y = self.m2_y * factor
+        out.c_xy = self.c_xy * factor
+        return out
+
+    def correlations(self):
+        """Pearson correlation per feature (NaN where undefined)."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = self.c_xy / np.sqrt(self.m2_x * self.m2_y)
+        return dict(zip(self.features, np.where(self.n > 1, corr, np.nan).tolist()))
+
+
+class StreamingDataScreener(DataScreener):
+    """
+    Stateful screener for live streams.
+
+    The reference set is summarized once into a `ReferenceSketch`; each batch is
+    appended to a rolling window and drift is tested for the window, so the
+    per-batch cost does not grow with the reference size.
+
+    Window modes:
+        'sliding':  the window always holds the most recent `window_size` rows.
+        'tumbling': rows accumulate until `window_size` is reached; the next
+                    batch then starts a fresh window.
+    """
+    WINDOW_MODES = ("sliding", "tumbling")
+    PROXY_MODES = ("cumulative", "decay", "window")
+
+    def __init__(self, reference_data, protected_attribute, features=None, window_size=500,
+                 window_mode="sliding", max_reference_points=None,
+                 proxy_mode="cumulative", proxy_decay=0.99, proxy_window_batches=50,
+                 sketch=None, proxy_reference=None):
+        """
+        Args:
+            reference_data (pd.DataFrame): The "fair" or original training data.
+            protected_attribute (str): The column name of the protected attribute.
+            features (list): Features to monitor. Defaults to all numerical columns.
+            window_size (int): Rows in the drift window.
+            window_mode (str): 'sliding' or 'tumbling'.
+            max_reference_points (int): Compress each reference feature to this many quantiles.
+            proxy_mode (str): How live batches count toward proxy correlations:
+                'cumulative' (all history), 'decay' (exponential forgetting by
+                `proxy_decay` per batch) or 'window' (last `proxy_window_batches` batches).
+                The reference data always contributes in full.
+            sketch (ReferenceSketch): Precomputed reference sketch to reuse.
+            proxy_reference (CorrelationAccumulator): Precomputed reference moments to reuse.
+        """
+        super().__init__(reference_data, protected_attribute)
+        if window_mode not in self.WINDOW_MODES:
+            raise ValueError(f"window_mode must be one of {self.WINDOW_MODES}")
+        if proxy_mode not in self.PROXY_MODES:
+            raise ValueError(f"proxy_mode must be one of {self.PROXY_MODES}")
+
+        if sketch is None:
+            sketch = ReferenceSketch(reference_data, features=features, max_points=max_reference_points)
+        self.sketch = sketch
+        self.window_size = window_size
+        self.window_mode = window_mode
+        self._lock = threading.Lock()
+        self.windows_completed = 0
+        self._reset_window()
+
+        # Proxy detection: fixed reference moments + live moments
+        self.proxy_mode = proxy_mode
+        self.proxy_decay = proxy_decay
+        self._proxy_features = [f for f in self.sketch.features if f != protected_attribute]
+        if proxy_reference is None:
+            proxy_reference = CorrelationAccumulator.from_batch(
+                reference_data, self._proxy_features, protected_attribute
+            )
+        self._proxy_reference = proxy_reference
+        self._proxy_live = CorrelationAccumulator(self._proxy_features)
+        self._proxy_batches = deque(maxlen=proxy_window_batches)
+
+    def _reset_window(self):
+        self._window = {feature: deque() for feature in self.sketch.features}
+        self._window_rows = {feature: 0 for feature in self.sketch.features}
+
+    def _append(self, feature, values):
+        window = self._window[feature]
+        window.append(values)
+        self._window_rows[feature] += len(values)
+
+        if self.window_mode == "sliding":
+            # Drop whole batches, then trim the oldest one, down to window_size rows
+            excess = self._window_rows[feature] - self.window_size
+            while excess > 0 and window:
+                oldest = window[0]
+                if len(oldest) <= excess:
+                    window.popleft()
+                    excess -= len(oldest)
+                    self._window_rows[feature] -= len(oldest)
+                else:
+                    window[0] = oldest[excess:]
+                    self._window_rows[feature] -= excess
+                    excess = 0
+
+    def check_drift_incremental(self, new_batch, threshold=0.05):
+        """
+        Adds a batch to the live window and tests the window for drift.
+
+        Args:
+            new_batch (pd.DataFrame): Incoming data stream.
+            threshold (float): P-value threshold. If p < threshold, distributions are different.
+
+        Returns:
+            dict: Same per-feature shape as `check_distributional_drift`, plus the window size used.
+        """
+        with self._lock:
+            if self.window_mode == "tumbling" and any(
+                rows >= self.window_size for rows in self._window_rows.values()
+            ):
+                self.windows_completed += 1
+                self._reset_window()
+
+            drift_report = {}
+            for feature in self.sketch.features:
+                if feature not in new_batch.columns:
+                    continue
+                values = new_batch[feature].dropna().to_numpy(dtype=float)
+                if len(values):
+                    self._append(feature, values)
+
+                window = self._window[feature]
+                live = np.sort(np.concatenate(window)) if window else np.empty(0)
+                stat, p_value = self.sketch.ks_test(feature, live)
+
+                drift_report[feature] = {
+                    "drift_detected": bool(p_value < threshold),
+                    "p_value": p_value,
+                    "statistic": stat,
+                    "window_rows": int(len(live))
+                }
+
+        return drift_report
+
+    def update_proxy_stats(self, new_batch):
+        """Folds a labeled batch into the running proxy correlations."""
+        batch_acc = CorrelationAccumulator.from_batch(new_batch, self._proxy_features, self.protected_attribute)
+        with self._lock:
+            if self.proxy_mode == "window":
+                self._proxy_batches.append(batch_acc)
+            elif self.proxy_mode == "decay":
+                self._proxy_live = self._proxy_live.decayed(self.proxy_decay).merge(batch_acc)
+            else:
+                self._proxy_live = self._proxy_live.merge(batch_acc)
+
+    def check_for_proxies_online(self, threshold=0.7):
+        """
+        Flags proxies from the running correlations (reference + live history).
+        Same output shape as `check_for_proxies`, at a cost independent of history size.
+        """
+        with self._lock:
+            acc = self._proxy_reference.merge(self._proxy_live)
+            for batch_acc in self._proxy_batches:
+                acc = acc.merge(batch_acc)
+
+        proxies = {}
+        for feature, corr_value in acc.correlations().items():
+            if np.isnan(corr_value):
+                continue
+            if abs(corr_value) >= threshold:
+                proxies[feature] = {
+                    "correlation": float(corr_value),
+                    "risk": "High"
+                }
+
+        return proxies
@@ -0,0 +1,262 @@
+import argparse
+import copy
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("synthetic")
+
+# Same population as `generate_synthetic_data`: one protected attribute, two features
+DEFAULT_SCHEMA = {
+    "features": {
+        "experience": {"type": "normal", "mean": 5, "std": 2},
+        "education": {"type": "categorical", "values": [0, 1, 2], "p": [0.3, 0.5, 0.2]},  # HS, Bachelor, Master
+    },
+    "protected": {
+        # 1=Privileged, 0=Unprivileged
+        "gender": {"values": [0, 1], "p": [0.5, 0.5], "privileged": 1, "bias": 1.0},
+    },
+    "proxies": {},
+    "target": {"name": "hired", "intercept": 0.3, "weights": {"experience": 0.05, "education": 0.1}},
+}
+
+# Wider schema for load tests: several protected attributes and proxies of them
+LOAD_TEST_SCHEMA = {
+    "features": {
+        "experience": {"type": "normal", "mean": 5, "std": 2},
+        "education": {"type": "categorical", "values": [0, 1, 2], "p": [0.3, 0.5, 0.2]},
+        "test_score": {"type": "uniform", "low": 0, "high": 100},
+        "referrals": {"type": "poisson", "lam": 1.5},
+    },
+    "protected": {
+        "gender": {"values": [0, 1], "p": [0.5, 0.5], "privileged": 1, "bias": 1.0},
+        "age_band": {"values": [0, 1, 2], "p": [0.3, 0.5, 0.2], "privileged": 1, "bias": 0.5},
+        "ethnicity": {"values": [0, 1, 2, 3], "p": [0.6, 0.2, 0.15, 0.05], "privileged": 0, "bias": 0.7},
+    },
+    "proxies": {
+        "zip_region": {"source": "ethnicity", "strength": 0.7},
+        "hobby_score": {"source": "gender", "strength": 0.4},
+    },
+    "target": {
+        "name": "hired",
+        "intercept": 0.2,
+        "weights": {"experience": 0.05, "education": 0.1, "test_score": 0.002, "referrals": 0.02},
+    },
+}
+
+
+class SyntheticDataGenerator:
+    """
+    Scalable, reproducible synthetic hiring data for load tests.
+
+    Rows are produced in chunks, each drawn from its own `numpy.random.Generator`
+    seeded by child `i` of one `SeedSequence`. A chunk therefore depends only on
+    (seed, chunk index, chunk size), so shards can be generated in any order,
+    by any number of processes, and always come out identical.
+
+    Schema (dict, see DEFAULT_SCHEMA / LOAD_TEST_SCHEMA):
+        features:  name -> {'type': 'normal'|'uniform'|'categorical'|'poisson', ...params, 'dtype'}
+        protected: name -> {'values', 'p', 'privileged', 'bias'}; non-privileged values have
+                   their hiring probability scaled by (1 - bias_level * bias * 0.5)
+        proxies:   name -> {'source': protected column, 'strength': target correlation (0-1)}
+        target:    {'name', 'intercept', 'weights': {feature: weight}}
+    """
+    def __init__(self, schema=None, bias_level=0.8, seed=None):
+        """
+        Args:
+            schema (dict): Column specification. Defaults to DEFAULT_SCHEMA.
+            bias_level (float): Degree of bias (0.0 to 1.0) against unprivileged groups.
+            seed (int): Root seed. None draws fresh entropy (recorded in `self.seed`).
+        """
+        self.schema = copy.deepcopy(schema if schema is not None else DEFAULT_SCHEMA)
+        self.bias_level = bias_level
+        # Fix the entropy now so every worker process derives the same chunk streams
+        self.seed = np.random.SeedSequence(seed).entropy
+        self._validate()
+
+    def _validate(self):
+        protected = self.schema.get("protected", {})
+        for name, spec in self.schema.get("features", {}).items():
+            if spec.get("type", "normal") not in ("normal", "uniform", "categorical", "poisson"):
+                raise ValueError(f"Unsupported feature type '{spec.get('type')}' for '{name}'")
+        for name, spec in self.schema.get("proxies", {}).items():
+            if spec.get("source") not in protected:
+                raise ValueError(f"Proxy '{name}' refers to unknown protected attribute '{spec.get('source')}'")
+            if not 0 <= spec.get("strength", 0.5) <= 1:
+                raise ValueError(f"Proxy '{name}' strength must be between 0 and 1")
+        for name in self.schema.get("target", {}).get("weights", {}):
+            if name not in self.schema.get("features", {}):
+                raise ValueError(f"Target weight refers to unknown feature '{name}'")
+
+    @property
+    def columns(self):
+        target = self.schema.get("target", {}).get("name", "hired")
+        return (list(self.schema.get("features", {})) + list(self.schema.get("protected", {}))
+                + list(self.schema.get("proxies", {})) + [target])
+
+    def chunk_rng(self, index):
+        """Generator for chunk `index` (equal to SeedSequence(seed).spawn(n)[index])."""
+        return np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=(index,)))
+
+    @staticmethod
+    def _draw_feature(rng, spec, n_rows):
+        kind = spec.get("type", "normal")
+        if kind == "normal":
+            values = rng.normal(spec.get("mean", 0.0), spec.get("std", 1.0), n_rows)
+        elif kind == "uniform":
+            values = rng.uniform(spec.get("low", 0.0), spec.get("high", 1.0), n_rows)
+        elif kind == "poisson":
+            values = rng.poisson(spec.get("lam", 1.0), n_rows)
+        else:
+            levels = np.asarray(spec["values"])
+            values = levels[rng.choice(len(levels), n_rows, p=spec.get("p"))]
+            if "dtype" not in spec and levels.dtype.kind in "iu" and np.abs(levels).max() < 128:
+                # Small integer codes are stored as int8
+                values = values.astype(np.int8)
+        return values.astype(spec["dtype"]) if "dtype" in spec else values
+
+    def generate_chunk(self, index, n_rows):
+        """
+        Generates chunk number `index` with `n_rows` rows.
+
+        Returns:
+            pd.DataFrame: Features, protected attributes, proxies and the target.
+        """
+        rng = self.chunk_rng(index)
+        columns = {}
+
+        for name, spec in self.schema.get("features", {}).items():
+            columns[name] = self._draw_feature(rng, spec, n_rows)
+
+        # Hiring probability from qualifications, then scaled down for unprivileged groups
+        target = self.schema.get("target", {})
+        prob = np.full(n_rows, float(target.get("intercept", 0.3)))
+        for name, weight in target.get("weights", {}).items():
+            prob += weight * columns[name]
+
+        codes = {}
+        for name, spec in self.schema.get("protected", {}).items():
+            values = np.asarray(spec["values"])
+            code = rng.choice(len(values), n_rows, p=spec.get("p"))
+            codes[name] = code
+            columns[name] = values[code].astype(spec.get("dtype", np.int8 if values.dtype.kind in "iub" else values.dtype))
+            penalty = 1 - self.bias_level * spec.get("bias", 1.0) * 0.5
+            prob *= np.where(values[code] == spec.get("privileged", values[-1]), 1.0, penalty)
+
+        for name, spec in self.schema.get("proxies", {}).items():
+            # Standardized group code plus noise: Pearson correlation with the code ~= strength
+            source = self.schema["protected"][spec["source"]]
+            code = codes[spec["source"]].astype(float)
+            p = np.asarray(source.get("p") or np.full(len(source["values"]), 1 / len(source["values"])))
+            levels = np.arange(len(p))
+            mean = float(levels @ p)
+            std = float(np.sqrt(((levels - mean) ** 2) @ p)) or 1.0
+            strength = spec.get("strength", 0.5)
+            noise = rng.standard_normal(n_rows)
+            columns[name] = (strength * (code - mean) / std + np.sqrt(1 - strength ** 2) * noise).astype(
+                spec.get("dtype", np.float64)
+            )
+
+        prob = np.clip(prob, 0, 1)
+        columns[target.get("name", "hired")] = (rng.random(n_rows) < prob).astype(np.int8)
+        return pd.DataFrame(columns)
+
+    def _chunk_sizes(self, n_rows, chunk_size):
+        sizes = [chunk_size] * (n_rows // chunk_size)
+        if n_rows % chunk_size:
+            sizes.append(n_rows % chunk_size)
+        return sizes
+
+    def iter_chunks(self, n_rows, chunk_size=1_000_000):
+        """Yields `n_rows` rows as consecutive DataFrame chunks (continuous row index)."""
+        offset = 0
+        for index, size in enumerate(self._chunk_sizes(n_rows, chunk_size)):
+            chunk = self.generate_chunk(index, size)
+            chunk.index = pd.RangeIndex(offset, offset + size)
+            offset += size
+            yield chunk
+
+    def generate(self, n_rows, chunk_size=1_000_000):
+        """Generates `n_rows` rows as one DataFrame."""
+        return pd.concat(list(self.iter_chunks(n_rows, chunk_size)))
+
+    def write_shards(self, n_rows, directory, fmt="parquet", chunk_size=1_000_000, n_jobs=None):
+        """
+        Writes `n_rows` rows as one file per chunk, generated in parallel.
+
+        Args:
+            n_rows (int): Total rows.
+            directory (str): Output directory (created if missing).
+            fmt (str): 'parquet' or 'csv'.
+            chunk_size (int): Rows per shard.
+            n_jobs (int): Worker processes (None = CPU count, 1 = in-process).
+
+        Returns:
+            list: Shard paths in chunk order.
+        """
+        if fmt not in ("parquet", "csv"):
+            raise ValueError(f"Unsupported shard format '{fmt}'. Use 'parquet' or 'csv'.")
+        os.makedirs(directory, exist_ok=True)
+
+        sizes = self._chunk_sizes(n_rows, chunk_size)
+        tasks = [
+            (self, index, size, os.path.join(directory, f"part-{index:05d}.{fmt}"), fmt)
+            for index, size in enumerate(sizes)
+        ]
+
+        started = time.perf_counter()
+        if n_jobs == 1:
+            paths = [_write_shard(*task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                paths = list(pool.map(_write_shard, *zip(*tasks))) if tasks else []
+        elapsed = time.perf_counter() - started
+        logger.info(f"Wrote {n_rows:,} rows in {len(paths)} {fmt} shards to {directory} "
+                    f"({n_rows / elapsed if elapsed > 0 else 0:,.0f} rows/s)")
+        return paths
+
+
+def _write_shard(generator, index, n_rows, path, fmt):
+    """Worker: generates one chunk and writes it to `path`."""
+    chunk = generator.generate_chunk(index, n_rows)
+    if fmt == "parquet":
+        chunk.to_parquet(path, index=False)
+    else:
+        chunk.to_csv(path, index=False)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate sharded synthetic hiring data for load tests.")
+    parser.add_argument("--rows", type=int, required=True, help="Total number of rows")
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000, help="Rows per shard")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: all CPUs)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--bias-level", type=float, default=0.8)
+    parser.add_argument("--schema", default="default",
+                        help="'default', 'load_test' or the path of a JSON schema file")
+    args = parser.parse_args(argv)
+
+    if args.schema == "default":
+        schema = DEFAULT_SCHEMA
+    elif args.schema == "load_test":
+        schema = LOAD_TEST_SCHEMA
+    else:
+        with open(args.schema) as f:
+            schema = json.load(f)
+
+    logging.basicConfig(level=logging.INFO)
+    generator = SyntheticDataGenerator(schema, bias_level=args.bias_level, seed=args.seed)
+    generator.write_shards(args.rows, args.out, fmt=args.format, chunk_size=args.chunk_size, n_jobs=args.jobs)
+    logger.info(f"Seed entropy: {generator.seed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 import pandas as pd
 import numpy as np
 
-def generate_synthetic_data(n_samples=1000, bias_level=0.8):
+def generate_synthetic_data(n_samples=1000, bias_level=0.8, random_state=42):
     """
     Generates a synthetic dataset with controlled bias.
     
@@ -9,18 +9,22 @@ def generate_synthetic_data(n_samples=1000, bias_level=0.8):
         n_samples (int): Number of samples.
         bias_level (float): Degree of bias (0.0 to 1.0) against unprivileged group.
                             Higher value means more bias.
+        random_state (int): Seed for a private random stream (the global numpy
+                            state is left untouched). None gives fresh data each call.
+                            For large or sharded datasets use `src.synthetic.SyntheticDataGenerator`.
     
     Returns:
         pd.DataFrame: DataFrame with features, protected attribute, and target.
     """
-    np.random.seed(42)
+    # Legacy RandomState keeps the seeded output identical to earlier versions
+    rng = np.random.RandomState(random_state)
     
     # Features
-    experience = np.random.normal(5, 2, n_samples)
-    education = np.random.choice([0, 1, 2], n_samples, p=[0.3, 0.5, 0.2]) # HS, Bachelor, Master
+    experience = rng.normal(5, 2, n_samples)
+    education = rng.choice([0, 1, 2], n_samples, p=[0.3, 0.5, 0.2]) # HS, Bachelor, Master
     
     # Protected Attribute (e.g., Gender: 1=Privileged, 0=Unprivileged)
-    gender = np.random.choice([0, 1], n_samples, p=[0.5, 0.5])
+    gender = rng.choice([0, 1], n_samples, p=[0.5, 0.5])
     
     # Target (e.g., Hired: 1=Yes, 0=No)
     # Base probability based on qualifications
@@ -33,7 +37,7 @@ def generate_synthetic_data(n_samples=1000, bias_level=0.8):
     prob = prob * bias_factor
     prob = np.clip(prob, 0, 1)
     
-    hired = np.random.binomial(1, prob)
+    hired = rng.binomial(1, prob)
     
     df = pd.DataFrame({
         'experience': experience,
@@ -47,10 +51,15 @@ def generate_synthetic_data(n_samples=1000, bias_level=0.8):
 def perturbation_test_data(df, protected_attribute, sensitive_value):
     """
     Creates a perturbed version of the dataset where the protected attribute is flipped.
+
+    Only the protected column is rebuilt (vectorized); the other columns are
+    shared with `df`. See `src.perturbation.CounterfactualBuilder` for
+    categorical / ordinal attributes and stacked variants.
     """
-    df_perturbed = df.copy()
-    # Flip the protected attribute
-    df_perturbed[protected_attribute] = df_perturbed[protected_attribute].apply(
-        lambda x: sensitive_value if x != sensitive_value else (1 - sensitive_value) # Assuming binary 0/1
+    column = df[protected_attribute]
+    df_perturbed = df.copy(deep=False)
+    # Flip the protected attribute (assuming binary 0/1)
+    df_perturbed[protected_attribute] = pd.Series(
+        np.where(column == sensitive_value, 1 - sensitive_value, sensitive_value), index=df.index
     )
     return df_perturbed
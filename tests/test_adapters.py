@@ -0,0 +1,77 @@
+import sys
+import os
+import asyncio
+import random
+
+import httpx
+import numpy as np
+import pytest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from src.model import stub_server
+from src.model.adapters import HTTPModelAdapter, ModelAdapter
+from src.model.blackbox import hr_model, predict_many
+
+PROFILES = [
+    {"age": 30, "experience": 5, "education": 2, "gender": 1},
+    {"age": 52, "experience": 20, "education": 3, "gender": 0},
+    {"age": 24, "experience": 1, "education": 1, "gender": 1},
+]
+
+
+def _served_adapter():
+    transport = httpx.ASGITransport(app=stub_server.app)
+    return HTTPModelAdapter("http://stub", transport=transport)
+
+
+def test_model_adapter_requires_predict():
+    class Incomplete(ModelAdapter):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def _seed():
+    # The mock model adds noise; the stub scores in-process, so seeding makes both sides comparable
+    random.seed(7)
+    np.random.seed(7)
+
+
+def test_http_adapter_against_the_stub_server():
+    async def scenario():
+        adapter = _served_adapter()
+        try:
+            _seed()
+            single = [await adapter.predict(profile) for profile in PROFILES]
+            _seed()
+            batch = await adapter.predict_batch(PROFILES)
+            empty = await adapter.predict_batch([])
+        finally:
+            await adapter.close()
+        return single, batch, empty
+
+    single, batch, empty = asyncio.run(scenario())
+
+    _seed()
+    assert single == [hr_model.predict(profile) for profile in PROFILES]
+    _seed()
+    assert batch == predict_many(hr_model, PROFILES)
+    assert empty == []
+
+
+def test_http_adapter_raises_on_server_errors():
+    async def scenario():
+        adapter = _served_adapter()
+        try:
+            # The batch endpoint rejects a body without 'rows'
+            response = await adapter.client.post("/predict_batch", json={})
+            assert response.status_code == 422
+            with pytest.raises(httpx.HTTPStatusError):
+                await adapter.predict_batch("not a list of rows")
+        finally:
+            await adapter.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,76 @@
+import sys
+import os
+
+import numpy as np
+import pytest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from src.confidence import analytic_intervals, bootstrap_intervals, metric_intervals
+from src.contingency import ContingencyTable
+
+
+def _table(priv_positive, priv_total, unpriv_positive, unpriv_total):
+    groups = [1] * priv_total + [0] * unpriv_total
+    predicted = ([1] * priv_positive + [0] * (priv_total - priv_positive) +
+                 [1] * unpriv_positive + [0] * (unpriv_total - unpriv_positive))
+    return ContingencyTable.from_arrays(groups, predicted, 1, true_labels=predicted)
+
+
+def test_analytic_spd_matches_wald_interval():
+    table = _table(300, 1000, 200, 1000)
+
+    result = analytic_intervals(table, 1, 0)["statistical_parity_difference"]
+
+    se = np.sqrt(0.2 * 0.8 / 1000 + 0.3 * 0.7 / 1000)
+    assert np.isclose(result["estimate"], -0.1)
+    assert np.isclose(result["ci_lower"], -0.1 - 1.959964 * se, atol=1e-6)
+    assert np.isclose(result["ci_upper"], -0.1 + 1.959964 * se, atol=1e-6)
+    assert result["p_value"] < 1e-5
+
+
+def test_analytic_di_is_undefined_without_privileged_positives():
+    table = _table(0, 100, 20, 100)
+
+    assert analytic_intervals(table, 1, 0)["disparate_impact"] is None
+
+
+def test_bootstrap_is_seeded_and_brackets_the_estimate():
+    table = _table(300, 1000, 200, 1000)
+
+    first = bootstrap_intervals(table, 1, 0, n_resamples=500, random_state=7, chunk_size=128)
+    second = bootstrap_intervals(table, 1, 0, n_resamples=500, random_state=7, chunk_size=128)
+
+    assert first == second
+    di = first["disparate_impact"]
+    assert di["ci_lower"] < 2 / 3 < di["ci_upper"]
+    spd = first["statistical_parity_difference"]
+    assert spd["ci_lower"] < -0.1 < spd["ci_upper"]
+
+
+def test_bootstrap_agrees_with_analytic_on_large_samples():
+    table = _table(3000, 10000, 2000, 10000)
+
+    intervals = metric_intervals(table, 1, 0, n_resamples=2000, random_state=0)
+
+    analytic = intervals["analytic"]["statistical_parity_difference"]
+    bootstrap = intervals["bootstrap"]["statistical_parity_difference"]
+    assert abs(bootstrap["ci_lower"] - analytic["ci_lower"]) < 0.005
+    assert abs(bootstrap["ci_upper"] - analytic["ci_upper"]) < 0.005
+
+
+def test_bootstrap_drops_di_draws_without_privileged_positives():
+    # One privileged positive in 200: many resamples have none, where DI is undefined
+    table = _table(1, 200, 20, 200)
+
+    di = bootstrap_intervals(table, 1, 0, n_resamples=1000, random_state=0)["disparate_impact"]
+
+    # Counting those draws as DI = 0 would pull the lower bound down to 0
+    assert di["ci_lower"] > 0
+
+
+@pytest.mark.parametrize("n_resamples", [0, -5])
+def test_bootstrap_rejects_non_positive_resamples(n_resamples):
+    with pytest.raises(ValueError, match="n_resamples"):
+        bootstrap_intervals(_table(30, 100, 20, 100), 1, 0, n_resamples=n_resamples)
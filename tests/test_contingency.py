@@ -0,0 +1,67 @@
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from src.audit import BiasAuditor
+from src.contingency import ContingencyTable
+
+
+def _frame(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "gender": rng.integers(0, 2, n),
+        "pred": rng.integers(0, 2, n),
+        "truth": rng.integers(0, 2, n),
+    })
+
+
+def test_merge_of_chunks_equals_single_pass():
+    df = _frame()
+    full = ContingencyTable.from_frame(df, "gender", "pred", 1, "truth")
+
+    merged = ContingencyTable.empty(has_truth=True)
+    for start in range(0, len(df), 300):
+        merged = merged + ContingencyTable.from_frame(df.iloc[start:start + 300], "gender", "pred", 1, "truth")
+
+    for group in full.groups:
+        np.testing.assert_array_equal(merged.group_counts(group), full.group_counts(group))
+    assert merged.metrics(1, 0) == full.metrics(1, 0)
+
+
+def test_merge_aligns_groups_by_value_not_position():
+    a = ContingencyTable.from_arrays([0, 0, 1], [1, 0, 1], 1)
+    b = ContingencyTable.from_arrays([2, 1, 1], [1, 1, 0], 1)
+
+    merged = a.merge(b)
+
+    assert merged.groups == [0, 1, 2]
+    assert merged.group_counts(0)[1].sum() == 1 and merged.group_counts(0).sum() == 2
+    assert merged.group_counts(1)[1].sum() == 2 and merged.group_counts(1).sum() == 3
+    assert merged.group_counts(2).sum() == 1
+    # Truth is only available if both sides had it
+    assert not merged.has_truth
+
+
+def test_missing_groups_are_dropped_and_unknown_groups_are_empty():
+    table = ContingencyTable.from_arrays(np.array([0, np.nan, 1], dtype=object), [1, 1, 0], 1)
+
+    assert table.counts.sum() == 2
+    np.testing.assert_array_equal(table.group_counts("other"), np.zeros((2, 2)))
+
+
+def test_table_metrics_match_bias_auditor():
+    df = _frame(seed=1)
+    auditor = BiasAuditor(df, "gender", 1, 0, "pred", 1)
+    table = ContingencyTable.from_frame(df, "gender", "pred", 1, "truth")
+
+    priv = df[df.gender == 1]
+    unpriv = df[df.gender == 0]
+    expected_di = (unpriv.pred == 1).mean() / (priv.pred == 1).mean()
+
+    assert np.isclose(table.metrics(1, 0)["disparate_impact"], expected_di)
+    assert np.isclose(auditor.calculate_disparate_impact(), expected_di)
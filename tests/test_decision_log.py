@@ -0,0 +1,60 @@
+import sys
+import os
+
+import pytest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from src.interceptor.decision_log import DecisionLog
+from src.interceptor.detector import BiasDetector
+
+PROFILE = {"age": 30, "experience": 5, "education": 2, "gender": 0}
+
+
+@pytest.fixture
+def log(tmp_path):
+    log = DecisionLog(str(tmp_path / "decisions.db"), divergence_threshold=0.1, flush_interval=0.05)
+    yield log
+    log.close()
+
+
+def _twins(probability):
+    return [
+        {"twin_data": dict(PROFILE, gender=1, twin_type="gender_flip"),
+         "prediction": {"hiring_probability": probability, "decision": 0}},
+        {"twin_data": dict(PROFILE, age=55, twin_type="age_older"),
+         "prediction": {"hiring_probability": probability, "decision": 0}},
+    ]
+
+
+def test_logged_flags_follow_the_detectors_per_type_thresholds(log):
+    # A 0.07 gap is divergent for gender_flip (threshold 0.05) but not for age_older (0.1)
+    detector = BiasDetector(probability_threshold=0.1, twin_type_thresholds={"gender_flip": 0.05})
+    original = {"hiring_probability": 0.4, "decision": 0}
+    twins_results = _twins(0.33)
+    report = detector.check_bias(original, twins_results)
+
+    log.record(PROFILE, original, twins_results, report, request_id="r1")
+    log.flush()
+
+    rates = log.flip_rate_by_twin_type()
+    assert rates["gender_flip"]["divergence_rate"] == 1.0
+    assert rates["age_older"]["divergence_rate"] == 0.0
+    logged = log.lookup("r1")
+    assert [(t["twin_type"], t["divergent"], t["flipped"]) for t in logged["twins"]] == [
+        ("gender_flip", True, False), ("age_older", False, False),
+    ]
+    assert logged["bias_detected"] == report["bias_detected"]
+
+
+def test_reports_without_flags_use_the_divergence_threshold(log):
+    original = {"hiring_probability": 0.4, "decision": 1}
+
+    log.record(PROFILE, original, _twins(0.25), {"bias_detected": True}, request_id="r2")
+    log.flush()
+
+    logged = log.lookup("r2")
+    assert [(t["divergent"], t["flipped"]) for t in logged["twins"]] == [(True, True), (True, True)]
+    assert log.summary()["requests"] == 1
+    assert log.lookup("unknown") is None
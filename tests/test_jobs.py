@@ -0,0 +1,167 @@
+import io
+import sys
+import os
+import threading
+import time
+
+import pytest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from src.jobs import JobManager
+
+
+def _wait_for(manager, job_id, statuses, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.status(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} still {manager.status(job_id)['status']}")
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = JobManager(str(tmp_path / "jobs.db"), work_dir=str(tmp_path / "work"), max_workers=1,
+                         progress_interval=0.0)
+    yield manager
+    manager.close()
+
+
+def test_job_result_and_progress_are_stored(manager):
+    def work(context):
+        for step in range(3):
+            context.report(step=step)
+        return {"answer": 42}
+
+    job_id = manager.submit("t1", "audit", work)
+
+    job = _wait_for(manager, job_id, ("succeeded",))
+    assert job["progress"] == {"step": 2, "stage": "done"}
+    assert manager.result(job_id) == ("succeeded", {"answer": 42})
+    # Jobs are only visible to their tenant
+    assert manager.status(job_id, tenant="t2") is None
+    assert manager.result(job_id, tenant="t2") == (None, None)
+
+
+def test_running_job_stops_at_its_next_checkpoint(manager):
+    started = threading.Event()
+    steps = []
+
+    def work(context):
+        started.set()
+        while True:
+            steps.append(len(steps))
+            context.report(step=len(steps))
+            time.sleep(0.01)
+
+    job_id = manager.submit("t1", "audit", work)
+    assert started.wait(5)
+
+    job = manager.cancel(job_id, tenant="t1")
+    assert job["cancel_requested"]
+
+    job = _wait_for(manager, job_id, ("cancelled", "failed", "succeeded"))
+    assert job["status"] == "cancelled"
+    assert manager.result(job_id) == ("cancelled", None)
+    stopped_at = len(steps)
+    time.sleep(0.05)
+    assert len(steps) == stopped_at
+
+
+def test_queued_job_cancelled_before_it_starts_never_runs(manager):
+    release = threading.Event()
+    ran = []
+
+    blocker = manager.submit("t1", "audit", lambda context: release.wait(5) and {})
+    queued = manager.submit("t1", "audit", lambda context: ran.append(True) or {})
+
+    assert manager.cancel(queued)["cancel_requested"]
+    release.set()
+
+    assert _wait_for(manager, blocker, ("succeeded",))
+    assert _wait_for(manager, queued, ("cancelled",))
+    assert not ran
+
+
+def test_cancelling_a_finished_job_is_a_no_op(manager):
+    job_id = manager.submit("t1", "audit", lambda context: {})
+    _wait_for(manager, job_id, ("succeeded",))
+
+    job = manager.cancel(job_id)
+
+    assert job["status"] == "succeeded"
+    assert not job["cancel_requested"]
+    assert manager.cancel("unknown") is None
+
+
+def test_failed_job_records_the_error_and_removes_its_input(manager):
+    seen = []
+
+    def work(context):
+        seen.append(context.input_path)
+        assert os.path.exists(context.input_path)
+        raise RuntimeError("bad upload")
+
+    job_id = manager.submit("t1", "audit", work, upload=io.BytesIO(b"a,b\n1,2\n"), suffix=".csv")
+
+    job = _wait_for(manager, job_id, ("failed",))
+    assert job["error"] == "bad upload"
+    assert seen and not os.path.exists(seen[0])
+
+
+def test_jobs_of_a_dead_process_are_failed_on_startup(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    first = JobManager(path, work_dir=str(tmp_path / "work"))
+    first._execute(
+        "INSERT INTO jobs (id, tenant, kind, status, created, owner_pid) VALUES ('orphan', 't1', 'audit', "
+        "'running', ?, NULL)",
+        (time.time(),),
+    )
+    first.close()
+
+    second = JobManager(path, work_dir=str(tmp_path / "work"))
+    try:
+        job = second.status("orphan")
+        assert job["status"] == "failed"
+        assert "restart" in job["error"]
+    finally:
+        second.close()
+
+
+def _orphan(path, tmp_path, pid, started):
+    first = JobManager(path, work_dir=str(tmp_path / "work"))
+    first._execute(
+        "INSERT INTO jobs (id, tenant, kind, status, created, owner_pid, owner_started) "
+        "VALUES ('orphan', 't1', 'audit', 'queued', ?, ?, ?)",
+        (time.time(), pid, started),
+    )
+    first.close()
+    return JobManager(path, work_dir=str(tmp_path / "work"))
+
+
+def test_jobs_of_a_previous_process_with_our_pid_are_failed(tmp_path):
+    # In a container the restarted server usually gets the same pid (1) as before
+    manager = _orphan(str(tmp_path / "jobs.db"), tmp_path, os.getpid(), None)
+    try:
+        assert manager.status("orphan")["status"] == "failed"
+    finally:
+        manager.close()
+
+
+@pytest.mark.skipif(JobManager._process_started(os.getpid()) is None, reason="needs /proc")
+def test_reused_pid_is_told_apart_by_its_start_time(tmp_path):
+    parent = os.getppid()
+    manager = _orphan(str(tmp_path / "jobs.db"), tmp_path, parent, "0")
+    try:
+        assert manager.status("orphan")["status"] == "failed"
+    finally:
+        manager.close()
+
+    live = _orphan(str(tmp_path / "live.db"), tmp_path, parent, JobManager._process_started(parent))
+    try:
+        assert live.status("orphan")["status"] == "queued"
+    finally:
+        live.close()
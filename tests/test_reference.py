@@ -0,0 +1,64 @@
+import sys
+import os
+import threading
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from src.reference import ReferenceDataManager, export_memmap
+from src.utils import generate_synthetic_data
+
+
+def test_re_export_is_hot_swapped_without_touching_the_live_version(tmp_path):
+    df = generate_synthetic_data(n_samples=500, bias_level=0.5)
+    export_memmap(df, str(tmp_path))
+    manager = ReferenceDataManager(str(tmp_path), check_interval=0)
+    first = manager.get()
+    mean = float(first.data["experience"].mean())
+
+    shifted = df.copy()
+    shifted["experience"] += 10
+    export_memmap(shifted, str(tmp_path))
+    second = manager.get()
+
+    assert second.version == first.version + 1
+    assert np.isclose(second.summary["experience"]["mean"], mean + 10)
+    # The old version's mapped columns still hold the data it was summarized from
+    assert np.isclose(first.data["experience"].mean(), mean)
+
+    # A shorter export (and pruning of old versions) leaves earlier mappings readable too
+    export_memmap(df.head(10), str(tmp_path))
+    assert len(manager.get()) == 10
+    assert np.isclose(first.data["experience"].mean(), mean)
+
+
+def test_in_place_rewrite_of_a_flat_directory_is_detected(tmp_path):
+    df = generate_synthetic_data(n_samples=200, bias_level=0.5)
+    for column in df.columns:
+        np.save(os.path.join(tmp_path, f"{column}.npy"), df[column].to_numpy())
+    manager = ReferenceDataManager(str(tmp_path), check_interval=0)
+    assert manager.get().version == 1
+
+    path = os.path.join(tmp_path, "experience.npy")
+    np.save(path, df["experience"].to_numpy() + 10)
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 1_000_000))
+
+    assert manager.get().version == 2
+
+
+def test_concurrent_readers_reload_a_changed_source_once(tmp_path):
+    df = generate_synthetic_data(n_samples=200, bias_level=0.5)
+    export_memmap(df, str(tmp_path))
+    manager = ReferenceDataManager(str(tmp_path), check_interval=0)
+    manager.get()
+    export_memmap(df, str(tmp_path))
+
+    threads = [threading.Thread(target=manager.get) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert manager.get().version == 2
@@ -0,0 +1,105 @@
+import sys
+import os
+
+import numpy as np
+import pytest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from src.interceptor.detector import BiasDetector, DECISION_FLIP
+from src.interceptor.sampling import AdaptiveTwinSampler
+
+TWINS = [{"gender": 1, "twin_type": "gender_flip"}, {"age": 55, "twin_type": "age_older"}]
+
+
+def _original(probability=0.8):
+    return {"hiring_probability": probability, "decision": int(probability > 0.5)}
+
+
+def _run(sampler, flags_by_type, requests, probability=0.8):
+    for _ in range(requests):
+        selection = sampler.select(_original(probability), TWINS)
+        evaluated = [twin for twin, keep in zip(TWINS, selection["evaluate"]) if keep]
+        sampler.observe(_original(probability), TWINS, selection,
+                        [flags_by_type[twin["twin_type"]] for twin in evaluated])
+
+
+def test_unseen_cells_are_always_evaluated():
+    sampler = AdaptiveTwinSampler(audit_fraction=0.01, random_state=0)
+
+    selection = sampler.select(_original(), TWINS)
+
+    assert selection["evaluate"].all()
+    np.testing.assert_array_equal(selection["probabilities"], [1.0, 1.0])
+
+
+def test_flag_rate_lookup_does_not_create_cells():
+    sampler = AdaptiveTwinSampler()
+
+    assert sampler.flag_rate("gender_flip", 0.3) is None
+    assert sampler.stats()["flag_rates"] == {}
+
+
+def test_rarely_flagged_twins_are_sampled_down():
+    sampler = AdaptiveTwinSampler(audit_fraction=0.05, min_probability=0.05, min_observations=30, random_state=0)
+
+    _run(sampler, {"gender_flip": DECISION_FLIP, "age_older": 0}, requests=400)
+
+    assert sampler.flag_rate("gender_flip", 0.3) == 1.0
+    assert sampler.flag_rate("age_older", 0.3) == 0.0
+    probabilities = sampler.inclusion_probabilities(_original(), TWINS)
+    np.testing.assert_array_equal(probabilities, [1.0, 0.05])
+    stats = sampler.stats()
+    assert stats["twin_call_savings"] > 0.3
+    # Every flagged twin is always sampled, so audits never miss one
+    assert stats["estimated_recall"] == 1.0
+
+
+def test_weighted_flag_rate_is_unbiased_under_sampling():
+    sampler = AdaptiveTwinSampler(audit_fraction=0.05, min_probability=0.2, min_observations=30, random_state=1)
+    rng = np.random.default_rng(1)
+
+    for _ in range(3000):
+        selection = sampler.select(_original(), TWINS)
+        evaluated = [twin for twin, keep in zip(TWINS, selection["evaluate"]) if keep]
+        # age_older is flagged 5% of the time
+        flags = [int(twin["twin_type"] == "age_older" and rng.random() < 0.05) for twin in evaluated]
+        sampler.observe(_original(), TWINS, selection, flags)
+
+    assert sampler.flag_rate("age_older", 0.3) == pytest.approx(0.05, abs=0.02)
+
+
+def test_candidates_near_the_threshold_are_fully_evaluated():
+    sampler = AdaptiveTwinSampler(audit_fraction=0.01, min_probability=0.02, random_state=0)
+    _run(sampler, {"gender_flip": 0, "age_older": 0}, requests=300, probability=0.51)
+
+    assert sampler.inclusion_probabilities(_original(0.51), TWINS).tolist() == [1.0, 1.0]
+
+
+def test_flags_follow_the_detectors_per_type_thresholds():
+    # A 0.07 divergence is only flagged for gender_flip (threshold 0.05), not age_older (0.1)
+    detector = BiasDetector(probability_threshold=0.1, twin_type_thresholds={"gender_flip": 0.05})
+    original = _original(0.8)
+    twins_results = [{"twin_data": twin, "prediction": _original(0.73)} for twin in TWINS]
+    check = detector.check_results([original], twins_results, [0, 0])
+
+    sampler = AdaptiveTwinSampler(audit_fraction=1.0, min_observations=1, random_state=0)
+    sampler.observe(original, TWINS, sampler.select(original, TWINS), check.flags)
+
+    assert sampler.flag_rate("gender_flip", 0.3) == 1.0
+    assert sampler.flag_rate("age_older", 0.3) == 0.0
+
+
+def test_observe_rejects_mismatched_flags():
+    sampler = AdaptiveTwinSampler(audit_fraction=1.0, random_state=0)
+    selection = sampler.select(_original(), TWINS)
+
+    with pytest.raises(ValueError):
+        sampler.observe(_original(), TWINS, selection, [0])
+
+
+@pytest.mark.parametrize("kwargs", [{"audit_fraction": 0}, {"audit_fraction": 1.5}, {"min_probability": 0}])
+def test_invalid_parameters_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        AdaptiveTwinSampler(**kwargs)
@@ -0,0 +1,152 @@
+import sys
+import os
+import asyncio
+
+import pytest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from src.interceptor.shadow import ShadowVerifier
+from src.model.adapters import ConcurrencyLimitedAdapter, ModelAdapter
+
+ORIGINAL = {"hiring_probability": 0.7, "decision": 1}
+
+
+class GatedVerify:
+    """verify() that waits for `release` and records which requests it ran."""
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.started = []
+
+    async def __call__(self, profile, original_result, pressure, **options):
+        self.started.append(profile["id"])
+        await self.release.wait()
+        if profile.get("fail"):
+            raise RuntimeError("model unavailable")
+        return {"bias_detected": False, "flags": [], "twin_details": [{"twin": 1}], "options": options}
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.mark.parametrize("policy, shed, kept", [("drop_newest", "c", "b"), ("drop_oldest", "b", "c")])
+def test_full_queue_sheds_by_policy(policy, shed, kept):
+    async def scenario():
+        verify = GatedVerify()
+        verifier = ShadowVerifier(verify, max_queue=1, workers=1, shed_policy=policy)
+        await verifier.start()
+        assert verifier.submit("a", {"id": "a"}, ORIGINAL)
+        await asyncio.sleep(0)  # the worker takes "a"
+        assert verifier.submit("b", {"id": "b"}, ORIGINAL)
+        accepted = verifier.submit("c", {"id": "c"}, ORIGINAL)
+
+        assert accepted == (policy == "drop_oldest")
+        assert verifier.status("a")["status"] == "running"
+        assert verifier.status(shed)["status"] == "shed"
+        assert verifier.status(kept)["status"] == "queued"
+
+        verify.release.set()
+        await verifier.close()
+        assert verify.started == ["a", kept]
+        assert verifier.status(kept)["status"] == "done"
+        assert verifier.stats()["shed"] == 1
+
+    _run(scenario())
+
+
+def test_status_moves_from_queued_to_done_or_failed():
+    async def scenario():
+        verify = GatedVerify()
+        published = []
+        verifier = ShadowVerifier(verify, workers=2, publishers=[lambda record, report: published.append(record)])
+        await verifier.start()
+        verifier.submit("ok", {"id": "ok"}, ORIGINAL, max_twins=3)
+        verifier.submit("bad", {"id": "bad", "fail": True}, ORIGINAL)
+        assert verifier.status("ok")["status"] == "queued"
+        await asyncio.sleep(0)
+        assert verifier.status("ok")["status"] == "running"
+
+        verify.release.set()
+        await verifier.close()
+
+        done = verifier.status("ok")
+        assert done["status"] == "done"
+        assert done["model_decision"] == ORIGINAL
+        # The status map keeps the compact report; twin details only go to publishers
+        assert "twin_details" not in done["verification_report"]
+        assert done["verification_report"]["options"] == {"max_twins": 3}
+        assert [record["request_id"] for record in published] == ["ok"]
+        failed = verifier.status("bad")
+        assert failed["status"] == "failed" and failed["error"] == "model unavailable"
+        assert verifier.status("unknown") is None
+
+    _run(scenario())
+
+
+def test_close_drains_the_queue_then_sheds_what_is_left():
+    async def scenario():
+        verify = GatedVerify()
+        verify.release.set()
+        verifier = ShadowVerifier(verify, workers=1)
+        await verifier.start()
+        for i in range(5):
+            verifier.submit(str(i), {"id": str(i)}, ORIGINAL)
+        await verifier.close()
+        assert [verifier.status(str(i))["status"] for i in range(5)] == ["done"] * 5
+        assert not verifier.running
+
+        stuck = GatedVerify()
+        verifier = ShadowVerifier(stuck, workers=1, shutdown_timeout=0.05)
+        await verifier.start()
+        for i in range(3):
+            verifier.submit(str(i), {"id": str(i)}, ORIGINAL)
+        await verifier.close()
+        assert [verifier.status(str(i))["status"] for i in range(3)] == ["shed"] * 3
+
+    _run(scenario())
+
+
+def test_submit_before_start_sheds_instead_of_raising():
+    verifier = ShadowVerifier(GatedVerify())
+
+    assert verifier.submit("early", {"id": "early"}, ORIGINAL) is False
+    assert verifier.status("early")["status"] == "shed"
+    assert verifier.stats()["shed"] == 1
+
+
+def test_pressure_rises_as_the_queue_fills():
+    async def scenario():
+        verifier = ShadowVerifier(GatedVerify(), max_queue=4, workers=1)
+        await verifier.start()
+        assert verifier.pressure() == 1.0
+        for i in range(4):
+            verifier.submit(str(i), {"id": str(i)}, ORIGINAL)
+        await asyncio.sleep(0)
+        assert verifier.pressure() > 1.0
+        await verifier.close()
+
+    _run(scenario())
+
+
+def test_concurrency_limited_adapter_caps_calls_in_flight():
+    class SlowAdapter(ModelAdapter):
+        def __init__(self):
+            self.active = self.peak = 0
+
+        async def predict(self, data):
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            await asyncio.sleep(0.001)
+            self.active -= 1
+            return ORIGINAL
+
+    async def scenario():
+        inner = SlowAdapter()
+        adapter = ConcurrencyLimitedAdapter(inner, max_concurrency=3)
+        results = await asyncio.gather(*(adapter.predict({}) for _ in range(20)))
+        assert results == [ORIGINAL] * 20
+        assert inner.peak == 3
+
+    _run(scenario())
@@ -0,0 +1,125 @@
+import io
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from src.audit import BiasAuditor, StreamingAuditor
+from src.ingest import detect_format, iter_upload_chunks
+
+
+def _predict(df):
+    return ((df['experience'] > 4) & (df['gender'] == 1)).astype(int)
+
+
+@pytest.fixture
+def decisions():
+    rng = np.random.default_rng(0)
+    n = 5000
+    df = pd.DataFrame({
+        "age": rng.integers(22, 65, n),
+        "experience": rng.integers(0, 20, n),
+        "gender": rng.integers(0, 2, n),
+        "hired": rng.integers(0, 2, n),
+    })
+    df["hired_pred"] = _predict(df)
+    return df
+
+
+def _streaming(**kwargs):
+    return StreamingAuditor("gender", 1, 0, "hired_pred", 1, **kwargs)
+
+
+def _chunks(df, size):
+    return (df.iloc[start:start + size] for start in range(0, len(df), size))
+
+
+def test_streamed_audit_matches_in_memory_audit(decisions):
+    expected = BiasAuditor(decisions, "gender", 1, 0, "hired_pred", 1).run_complete_audit(true_label_column="hired")
+
+    auditor = _streaming(true_label_column="hired")
+    results = auditor.audit_chunks(_chunks(decisions, 700))
+
+    assert results == expected
+    assert auditor.rows_processed == len(decisions)
+    assert auditor.chunks_processed == 8
+
+
+def test_audit_file_reads_only_the_needed_columns(decisions, tmp_path):
+    path = tmp_path / "decisions.csv"
+    decisions.to_csv(path, index=False)
+    seen = []
+
+    auditor = _streaming(progress_callback=seen.append)
+    results = auditor.audit_file(str(path), chunksize=1000)
+
+    expected = BiasAuditor(decisions, "gender", 1, 0, "hired_pred", 1).run_complete_audit()
+    assert results == expected
+    assert [p["rows_processed"] for p in seen] == [1000, 2000, 3000, 4000, 5000]
+
+
+def test_streamed_perturbation_matches_in_memory_flips(decisions):
+    expected = BiasAuditor(decisions, "gender", 1, 0, "hired_pred", 1).run_perturbation_test(
+        _predict, feature_columns=["experience", "gender"]
+    )
+
+    auditor = _streaming(model_predict_fn=_predict, feature_columns=["experience", "gender"],
+                         max_flipped_indices=len(decisions))
+    auditor.audit_chunks(_chunks(decisions, 600))
+    results = auditor.perturbation_results()
+
+    assert results["flipped_count"] == len(expected["flipped_indices"])
+    assert np.isclose(results["flip_rate"], expected["flip_rate"])
+    assert results["analyzed_count"] == expected["analyzed_count"]
+    assert sorted(results["flipped_indices"]) == sorted(expected["flipped_indices"])
+    assert not results["flipped_indices_truncated"]
+
+
+def test_flipped_indices_are_bounded_but_fully_counted(decisions):
+    expected = BiasAuditor(decisions, "gender", 1, 0, "hired_pred", 1).run_perturbation_test(
+        _predict, feature_columns=["experience", "gender"]
+    )
+    auditor = _streaming(model_predict_fn=_predict, feature_columns=["experience", "gender"],
+                         max_flipped_indices=10)
+    auditor.audit_chunks(_chunks(decisions, 600))
+    results = auditor.perturbation_results()
+
+    # The first flips seen are kept; the rest are only counted
+    assert list(results["flipped_indices"]) == sorted(expected["flipped_indices"])[:10]
+    assert results["flipped_count"] == len(expected["flipped_indices"])
+    assert results["flipped_indices_truncated"]
+    assert np.isclose(results["flip_rate"], results["flipped_count"] / results["analyzed_count"])
+
+
+def test_perturbation_results_need_a_model():
+    with pytest.raises(ValueError):
+        _streaming().perturbation_results()
+
+
+def test_single_line_column_oriented_json_is_not_jsonl(decisions):
+    # pandas' default to_json() is one line of {column: {index: value}}
+    small = decisions.head(5)
+    body = small.to_json().encode()
+    assert b"\n" not in body
+
+    fmt, chunks = iter_upload_chunks(io.BytesIO(body), columns=["gender", "hired_pred"])
+    results = _streaming().audit_chunks(chunks)
+
+    assert fmt == "json"
+    assert results == BiasAuditor(small, "gender", 1, 0, "hired_pred", 1).run_complete_audit()
+
+
+@pytest.mark.parametrize("head, expected", [
+    (b'{"gender": 1, "hired_pred": 0}', "jsonl"),
+    (b'{"gender": 1, "hired_pred": 0}\n{"gender": 0, "hired_pred": 1}\n', "jsonl"),
+    (b'{"gender": {"0": 1}, "hired_pred": {"0": 0}}', "json"),
+    (b'[{"gender": 1, "hired_pred": 0}]', "json"),
+    (b"gender,hired_pred\n1,0\n", "csv"),
+])
+def test_detect_format(head, expected):
+    assert detect_format(head) == expected
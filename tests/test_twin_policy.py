@@ -0,0 +1,156 @@
+import sys
+import os
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from src.interceptor.policy import TwinPolicy
+from src.interceptor.twins import ShadowTwinGenerator
+
+
+def _legacy_twins(candidate):
+    # The hardcoded twins the default policy reproduces
+    twins = []
+    if 'gender' in candidate:
+        twins.append(dict(candidate, gender=1 - candidate['gender'], twin_type='gender_flip'))
+    if 'age' in candidate:
+        if candidate['age'] > 50:
+            twins.append(dict(candidate, age=35, twin_type='age_younger'))
+        else:
+            twins.append(dict(candidate, age=55, twin_type='age_older'))
+    return twins
+
+
+@pytest.mark.parametrize("candidate", [
+    {"age": 55, "experience": 20, "education": 2, "gender": 1},
+    {"age": 30, "experience": 3, "education": 1, "gender": 0},
+    {"age": 50, "experience": 10, "education": 3, "gender": 1},
+    {"age": 40, "experience": 5, "education": 2},
+])
+def test_default_policy_reproduces_legacy_twins(candidate):
+    assert ShadowTwinGenerator().generate_twins(candidate) == _legacy_twins(candidate)
+
+
+def test_twin_matrix_matches_per_candidate_twins():
+    rng = np.random.default_rng(0)
+    candidates = pd.DataFrame({
+        "age": rng.integers(22, 65, 50),
+        "experience": rng.integers(0, 20, 50),
+        "gender": rng.integers(0, 2, 50),
+    })
+    generator = ShadowTwinGenerator()
+
+    matrix = generator.generate_twin_matrix(candidates).to_records()
+
+    expected = [twin for candidate in candidates.to_dict("records") for twin in generator.generate_twins(candidate)]
+    assert matrix == expected
+
+
+def test_out_of_domain_gender_falls_back_to_default_value():
+    twins = ShadowTwinGenerator().generate_twins({"age": 30, "gender": 2})
+
+    assert twins[0] == {"age": 30, "gender": 0, "twin_type": "gender_flip"}
+
+
+def test_swap_without_fallback_skips_out_of_domain_values():
+    policy = {"rules": [{"name": "g", "type": "swap", "attribute": "gender", "values": [0, 1]}]}
+
+    assert ShadowTwinGenerator(policy).generate_twins({"gender": 2}) == []
+
+
+def test_budget_keeps_rules_in_priority_order():
+    policy = {
+        "max_twins_per_request": 2,
+        "rules": [
+            {"name": "gender_flip", "type": "swap", "attribute": "gender", "values": [0, 1]},
+            {"name": "age_band", "type": "sweep", "attribute": "age", "values": [25, 35, 45, 55], "min_distance": 5},
+        ],
+    }
+    generator = ShadowTwinGenerator(policy)
+    candidate = {"age": 45, "gender": 1}
+
+    assert [t["twin_type"] for t in generator.generate_twins(candidate)] == ["gender_flip", "age_band_25"]
+    # A per-call budget tightens the policy's
+    assert [t["twin_type"] for t in generator.generate_twins(candidate, max_twins=1)] == ["gender_flip"]
+    # The sweep skips targets within min_distance of the candidate's age
+    unlimited = ShadowTwinGenerator(dict(policy, max_twins_per_request=None)).generate_twins(candidate)
+    assert [t["twin_type"] for t in unlimited] == ["gender_flip", "age_band_25", "age_band_35", "age_band_55"]
+
+
+def test_categorical_and_combined_rules():
+    policy = {
+        "rules": [
+            {"name": "edu", "type": "categorical", "attribute": "education", "values": [1, 2, 3]},
+            {"name": "gender_flip", "type": "swap", "attribute": "gender", "values": [0, 1], "enabled": False},
+            {"name": "age_flip", "type": "threshold", "attribute": "age", "threshold": 50, "enabled": False,
+             "above": {"value": 35, "twin_type": "age_younger"}, "below": {"value": 55, "twin_type": "age_older"}},
+            {"name": "gender_x_age", "type": "combined", "rules": ["gender_flip", "age_flip"]},
+        ],
+    }
+
+    twins = ShadowTwinGenerator(policy).generate_twins({"age": 60, "education": 2, "gender": 0})
+
+    assert [(t["twin_type"], t["education"]) for t in twins[:2]] == [("edu_1", 1), ("edu_3", 3)]
+    assert twins[2] == {"age": 35, "education": 2, "gender": 1, "twin_type": "gender_flip+age_younger"}
+
+
+def test_policy_loads_from_json_file(tmp_path):
+    path = tmp_path / "policy.json"
+    path.write_text(json.dumps({"rules": [{"name": "flip", "type": "map", "attribute": "gender",
+                                           "mapping": [[0, 1]]}]}))
+
+    generator = ShadowTwinGenerator(str(path))
+
+    assert generator.generate_twins({"gender": 0}) == [{"gender": 1, "twin_type": "flip"}]
+    assert generator.generate_twins({"gender": 1}) == []
+
+
+@pytest.mark.parametrize("rules, message", [
+    ([{"type": "swap", "attribute": "gender", "values": [0, 1]}], "without a name"),
+    ([{"name": "a", "type": "flip"}], "unknown type"),
+    ([{"name": "a", "type": "swap", "values": [0, 1]}], "missing"),
+    ([{"name": "a", "type": "swap", "attribute": "gender", "values": [0, 1]},
+      {"name": "a", "type": "swap", "attribute": "gender", "values": [0, 1]}], "Duplicate"),
+    ([{"name": "c", "type": "combined", "rules": ["later"]}], "unknown rule"),
+    ([{"name": "a", "type": "swap", "attribute": "gender", "values": [0, 1]},
+      {"name": "b", "type": "swap", "attribute": "gender", "values": [1, 2]},
+      {"name": "c", "type": "combined", "rules": ["a", "b"]}], "same attribute twice"),
+])
+def test_invalid_policies_are_rejected(rules, message):
+    with pytest.raises(ValueError, match=message):
+        TwinPolicy({"rules": rules})
+
+
+def test_string_targets_are_not_truncated():
+    policy = {"rules": [
+        {"name": "sex_flip", "type": "swap", "attribute": "sex", "values": ["M", "Female"]},
+        {"name": "race", "type": "categorical", "attribute": "race", "values": ["A", "Black", "White"]},
+    ]}
+
+    twins = ShadowTwinGenerator(policy).generate_twins({"sex": "M", "race": "A"})
+
+    assert [(t["twin_type"], t["sex"], t["race"]) for t in twins] == [
+        ("sex_flip", "Female", "A"), ("race_Black", "M", "Black"), ("race_White", "M", "White"),
+    ]
+
+
+def test_float_targets_on_integer_columns_are_kept():
+    policy = {"rules": [
+        {"name": "half", "type": "swap", "attribute": "score", "values": [0, 0.5]},
+        {"name": "age", "type": "sweep", "attribute": "age", "values": [37.5]},
+        {"name": "band", "type": "threshold", "attribute": "tenure", "threshold": 5,
+         "above": {"value": 2.5, "twin_type": "shorter"}, "below": {"value": 7.5, "twin_type": "longer"}},
+    ]}
+    candidates = pd.DataFrame({"score": [0, 0], "age": [30, 40], "tenure": [1, 9]})
+
+    twins = ShadowTwinGenerator(policy).generate_twin_matrix(candidates).to_records()
+
+    assert [(t["twin_type"], t["score"], t["age"], t["tenure"]) for t in twins] == [
+        ("half", 0.5, 30, 1), ("age_37.5", 0, 37.5, 1), ("longer", 0, 30, 7.5),
+        ("half", 0.5, 40, 9), ("age_37.5", 0, 37.5, 9), ("shorter", 0, 40, 2.5),
+    ]
@@ -1,3 +1,4 @@
+import asyncio
 import sys
 import os
 
@@ -5,8 +6,10 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
 
 from src.model.blackbox import hr_model
+from src.model.adapters import LocalModelAdapter
 from src.interceptor.twins import ShadowTwinGenerator
 from src.interceptor.detector import BiasDetector
+from src.interceptor.runtime import verify_candidate
 
 def test_bias_detection():
     print("Running Verification: Bias Detection Scenario")
@@ -26,27 +29,18 @@ def test_bias_detection():
         "gender": 1 # Female
     }
     
-    # 1. Prediction
-    original = hr_model.predict(candidate)
+    # 1. Prediction + 2. Twins + 3. Audit (twins are probed concurrently)
+    original, report = asyncio.run(
+        verify_candidate(LocalModelAdapter(hr_model), twin_gen, bias_detector, candidate)
+    )
     print(f"Original Candidate (Age: 55, Gender: F): Decision={original['decision']}, Prob={original['hiring_probability']:.2f}")
+    print(f"Generated {len(report['twin_details'])} twins.")
     
-    # 2. Twins
-    twins = twin_gen.generate_twins(candidate)
-    print(f"Generated {len(twins)} twins.")
-    
-    twins_results = []
-    for twin in twins:
-        res = hr_model.predict(twin)
-        twins_results.append({
-            "twin_data": twin,
-            "prediction": res
-        })
+    for item in report['twin_details']:
+        twin, res = item['twin_data'], item['prediction']
         t_desc = f"Age: {twin['age']}, Gender: {'F' if twin['gender']==1 else 'M'}"
         print(f"Twin ({t_desc}): Decision={res['decision']}, Prob={res['hiring_probability']:.2f}")
         
-    # 3. Audit
-    report = bias_detector.check_bias(original, twins_results)
-    
     if report['bias_detected']:
         print("\n✅ SUCCESS: Bias Correctly Detected!")
         for r in report['reasons']:
@@ -17,6 +17,7 @@ document.querySelectorAll('.nav-links li').forEach(item => {
 });
 
 // File Upload Handler
+// Uploads are audited as a background job; progress arrives over Server-Sent Events
 document.getElementById('fileUpload').addEventListener('change', async (e) => {
     const file = e.target.files[0];
     if (!file) return;
@@ -27,14 +28,15 @@ document.getElementById('fileUpload').addEventListener('change', async (e) => {
     console.log("Uploading file...", file.name);
 
     try {
-        const auditRes = await fetch('/api/audit', {
+        const submitRes = await fetch('/api/jobs/audit', {
             method: 'POST',
             body: formData
         });
 
-        if (!auditRes.ok) throw new Error(await auditRes.text());
+        if (!submitRes.ok) throw new Error(await submitRes.text());
 
-        const results = await auditRes.json();
+        const job = await submitRes.json();
+        const results = await waitForJob(job.job_id);
         displayAuditResults(results);
         alert("File uploaded and audited successfully!");
 
@@ -44,6 +46,40 @@ document.getElementById('fileUpload').addEventListener('change', async (e) => {
     }
 });
 
+function waitForJob(jobId) {
+    return new Promise((resolve, reject) => {
+        const events = new EventSource(`/api/jobs/${jobId}/events`);
+
+        events.addEventListener('progress', (e) => {
+            const job = JSON.parse(e.data);
+            const p = job.progress || {};
+            if (p.rows_processed !== undefined) {
+                console.log(`Audit ${jobId}: ${p.stage} - ${p.rows_processed.toLocaleString()} rows`);
+            }
+        });
+
+        events.addEventListener('end', async (e) => {
+            events.close();
+            const job = JSON.parse(e.data);
+            if (job.status !== 'succeeded') {
+                reject(new Error(job.error || `Audit job ${job.status}`));
+                return;
+            }
+            const res = await fetch(`/api/jobs/${jobId}/result`);
+            if (!res.ok) {
+                reject(new Error(await res.text()));
+                return;
+            }
+            resolve(await res.json());
+        });
+
+        events.onerror = () => {
+            events.close();
+            reject(new Error("Lost connection to the audit job"));
+        };
+    });
+}
+
 // Audit Functions
 async function generateAndAudit() {
     console.log("Generating data...");